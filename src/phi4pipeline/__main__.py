@@ -10,8 +10,7 @@ from phi4pipeline import cli
 
 
 def main(args):
-    cli.run(args)
-    return 0
+    return cli.run(args)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,192 @@
+# SPDX-FileCopyrightText: 2023-present James Seager <james.seager@rothamsted.ac.uk>
+#
+# SPDX-License-Identifier: MIT
+
+"""On-disk cache of parsed PHI-base spreadsheets."""
+
+import hashlib
+import os
+import pickle
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+from phi4pipeline.__about__ import __version__
+from phi4pipeline.frictionless import get_file_sha1_hash
+from phi4pipeline.load import get_dtype_plan, load_spreadsheet
+
+
+def get_default_cache_dir():
+    """Get the default directory for cached spreadsheets.
+
+    This is the phi4pipeline directory inside $XDG_CACHE_HOME, or inside
+    ~/.cache if XDG_CACHE_HOME is not set.
+
+    :returns: the path to the cache directory
+    :rtype: pathlib.Path
+    """
+    cache_home = os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache'
+    return Path(cache_home) / 'phi4pipeline'
+
+
+def get_cache_path(cache_dir, file_hash):
+    return Path(cache_dir) / f'{file_hash}.pickle'
+
+
+def make_cache_metadata(file_hash, chunksize=None):
+    """Make the metadata that must match for a cache entry to be used.
+
+    Entries are invalidated by a new version of pandas or phi4pipeline, or
+    a change to the column data types, since any of these may change how
+    the spreadsheet is parsed.
+    """
+    return {
+        'sha1': file_hash,
+        'pandas_version': pd.__version__,
+        'phi4pipeline_version': __version__,
+        'chunksize': chunksize,
+        'dtype_plan': get_dtype_plan(),
+    }
+
+
+def get_clean_state_source(path):
+    return str(Path(path).resolve())
+
+
+def get_clean_state_path(cache_dir, path):
+    source = get_clean_state_source(path)
+    source_hash = hashlib.sha1(source.encode('utf-8')).hexdigest()
+    return Path(cache_dir) / f'clean_state_{source_hash}.pickle'
+
+
+def make_clean_state_metadata(path, columns):
+    """Make the metadata that must match for a clean state to be used.
+
+    The state is only valid for the spreadsheet it was saved from, when the
+    spreadsheet has the same columns, and is invalidated by anything that
+    may change how rows are cleaned.
+    """
+    return {
+        'source': get_clean_state_source(path),
+        'pandas_version': pd.__version__,
+        'phi4pipeline_version': __version__,
+        'dtype_plan': get_dtype_plan(),
+        'columns': list(columns),
+    }
+
+
+def read_cache_entry(cache_path, metadata):
+    """Read a cached DataFrame, if it exists and its metadata matches.
+
+    :param cache_path: the path to the cache entry
+    :type cache_path: pathlib.Path
+    :param metadata: the expected metadata of the cache entry
+    :type metadata: dict
+    :returns: the cached DataFrame, or None if there is no valid entry
+    :rtype: pandas.DataFrame or None
+    """
+    try:
+        with open(cache_path, 'rb') as file:
+            entry = pickle.load(file)
+    except FileNotFoundError:
+        return None
+    except (pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        # Treat corrupt or incompatible entries as a cache miss
+        return None
+    if not isinstance(entry, dict) or entry.get('metadata') != metadata:
+        return None
+    return entry['data']
+
+
+def write_cache_entry(cache_path, metadata, phi_df):
+    """Write a DataFrame to the cache.
+
+    The entry is written to a temporary file first, so that an interrupted
+    write never leaves a partial entry in the cache.
+    """
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    entry = {'metadata': metadata, 'data': phi_df}
+    fd, temp_path = tempfile.mkstemp(dir=cache_path.parent, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            pickle.dump(entry, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, cache_path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def load_excel_cached(path, cache_dir, chunksize=None, jobs=1):
+    """Load the PHI-base Excel spreadsheet, using a cached copy if possible.
+
+    Cache entries are keyed by the SHA-1 hash of the spreadsheet, so any
+    change to the spreadsheet causes it to be parsed again. The DataFrame
+    is stored with pickle, since the mixed-type columns of the raw sheet
+    cannot be represented exactly in Arrow or Parquet. Only use a cache
+    directory that is not writable by untrusted users.
+
+    :param path: the path to the Excel spreadsheet
+    :type path: str
+    :param cache_dir: the directory containing cached spreadsheets
+    :type cache_dir: str or os.PathLike
+    :param chunksize: the number of rows to read at a time, or None to read
+    the whole sheet at once
+    :type chunksize: int or None
+    :param jobs: the number of processes used to parse the sheet, which
+    does not change the parsed DataFrame
+    :type jobs: int
+    :returns: the sheet as a pandas DataFrame
+    :rtype: pandas.DataFrame
+    """
+    file_hash = get_file_sha1_hash(path)
+    cache_path = get_cache_path(cache_dir, file_hash)
+    metadata = make_cache_metadata(file_hash, chunksize)
+    phi_df = read_cache_entry(cache_path, metadata)
+    if phi_df is None:
+        phi_df = load_spreadsheet(
+            path, input_format='excel', chunksize=chunksize, jobs=jobs
+        )
+        write_cache_entry(cache_path, metadata, phi_df)
+    return phi_df
+
+
+def read_clean_state(cache_dir, path, columns):
+    """Read the state saved by the last incremental cleaning run.
+
+    Each spreadsheet has its own state, so cleaning one spreadsheet does not
+    discard the state of another that uses the same cache directory.
+
+    :param cache_dir: the cache directory
+    :type cache_dir: str or os.PathLike
+    :param path: the path to the spreadsheet
+    :type path: str or os.PathLike
+    :param columns: the columns of the spreadsheet, before cleaning
+    :type columns: pandas.Index
+    :returns: the state, or None if there is no valid state
+    :rtype: dict or None
+    """
+    metadata = make_clean_state_metadata(path, columns)
+    return read_cache_entry(get_clean_state_path(cache_dir, path), metadata)
+
+
+def write_clean_state(cache_dir, path, columns, state):
+    """Save the state of an incremental cleaning run for the next run.
+
+    See phi4pipeline.clean.clean_phibase_incremental.
+    """
+    metadata = make_clean_state_metadata(path, columns)
+    write_cache_entry(get_clean_state_path(cache_dir, path), metadata, state)
+
+
+def clear_cache(cache_dir):
+    """Remove all cached spreadsheets from the cache directory.
+
+    Only cache entries are removed; other files in the directory are kept.
+    """
+    cache_dir = Path(cache_dir)
+    if not cache_dir.is_dir():
+        return
+    for pattern in ('*.pickle', '*.tmp'):
+        for path in cache_dir.glob(pattern):
+            path.unlink(missing_ok=True)
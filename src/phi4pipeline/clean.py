@@ -2,13 +2,21 @@
 #
 # SPDX-License-Identifier: MIT
 
-from datetime import datetime
+import concurrent.futures
+import functools
 import re
+from datetime import date, datetime
 
 import numpy as np
 import pandas as pd
+import pyarrow as pa
 
-from phi4pipeline.load import normalize_column_names
+from phi4pipeline.load import (
+    apply_dtype_plan,
+    convert_column_dtype,
+    get_dtype_plan,
+    normalize_column_names,
+)
 
 
 def remove_excluded_columns(phi_df):
@@ -48,6 +56,86 @@ def remove_excluded_columns(phi_df):
     return phi_df[included_columns]
 
 
+UNICODE_REPLACEMENTS = str.maketrans({
+    '\N{LATIN SMALL LIGATURE FFI}': 'ffi',
+    '\N{LATIN SMALL LIGATURE FL}': 'fl',
+    '\N{LATIN SMALL LIGATURE FF}': 'ff',
+    '\N{LATIN SMALL LIGATURE FFL}': 'ffl',
+    '\N{LATIN SMALL LIGATURE FI}': 'fi',
+    '\N{LEFT SINGLE QUOTATION MARK}': "'",
+    '\N{RIGHT SINGLE QUOTATION MARK}': "'",
+    '\N{LEFT DOUBLE QUOTATION MARK}': '"',
+    '\N{RIGHT DOUBLE QUOTATION MARK}': '"',
+    '\N{HYPHEN}': '-',
+    '\N{NON-BREAKING HYPHEN}': '-',
+    '\N{HEAVY WIDE-HEADED RIGHTWARDS ARROW}': '\N{RIGHTWARDS ARROW}',
+    '\N{LEFT-TO-RIGHT MARK}': '',
+    '\N{INCREMENT}': '\N{GREEK CAPITAL LETTER DELTA}',
+    '\N{WHITE UP-POINTING TRIANGLE}': '\N{GREEK CAPITAL LETTER DELTA}',
+    # Invalid characters
+    '\uf020': '',
+    '\uf031': '',
+    '\uf044': '',
+})
+
+MISSING_DATA_PLACEHOLDER = re.compile(r'(?i)^no data found$')
+
+# Columns where missing data placeholders are preserved
+PLACEHOLDER_COLUMNS = ('protein_id', 'doi')
+
+# Characters with a special meaning in regular expressions
+REGEX_SPECIAL_CHARS = frozenset('.^$*+?{}[]\\|()')
+
+
+def is_text_column(column):
+    """Check whether a column may contain strings."""
+    if not (column.dtype == object or isinstance(column.dtype, pd.StringDtype)):
+        return False
+    inferred_type = pd.api.types.infer_dtype(column, skipna=True)
+    return inferred_type in ('string', 'mixed', 'mixed-integer')
+
+
+def get_text_columns(phi_df):
+    """Get the columns of the PHI-base DataFrame that may contain strings."""
+    return [col for col in phi_df.columns if is_text_column(phi_df[col])]
+
+
+def map_text_values(column, func):
+    """Apply a function to each string in a column.
+
+    The function is called once for each distinct string, so its cost does
+    not depend on the number of repeated values. Values that are not
+    strings are left unchanged.
+
+    :param column: the column to transform
+    :type column: pandas.Series
+    :param func: a function from a string to a string or NaN
+    :type func: callable
+    :returns: the transformed column, with the same data type
+    :rtype: pandas.Series
+    """
+    values = column.to_numpy(dtype=object)
+    is_string = np.fromiter(
+        (isinstance(value, str) for value in values), bool, len(values)
+    )
+    codes, uniques = pd.factorize(values[is_string])
+    mapped = np.array([func(value) for value in uniques], dtype=object)
+    result = values.copy()
+    result[is_string] = mapped[codes]
+    return pd.Series(result, index=column.index, name=column.name).astype(
+        column.dtype
+    )
+
+
+def collapse_whitespace(value):
+    # Equivalent to replacing \s+ with a space, then stripping
+    return ' '.join(value.split())
+
+
+def replace_missing_data_placeholder(value):
+    return np.nan if MISSING_DATA_PLACEHOLDER.search(value) else value
+
+
 def fix_whitespace(phi_df):
     """Remove extra whitespace and replace all whitespace with spaces.
 
@@ -56,13 +144,54 @@ def fix_whitespace(phi_df):
     :return: the PHI-base DataFrame
     :rtype: pandas.DataFrame
     """
-    whitespace = re.compile(r'\s+')
-    object_columns = phi_df.select_dtypes('object')
-    for col in object_columns:
-        na_count = phi_df[col].isna().sum()
-        replaced = phi_df[col].str.replace(whitespace, ' ', regex=True).str.strip()
-        phi_df[col] = phi_df[col].mask(replaced.notna(), replaced)
-        assert na_count == phi_df[col].isna().sum()
+    for col in get_text_columns(phi_df):
+        phi_df[col] = map_text_values(phi_df[col], collapse_whitespace)
+    return phi_df
+
+
+def normalize_text_value(value):
+    value = collapse_whitespace(value)
+    if MISSING_DATA_PLACEHOLDER.search(value):
+        return np.nan
+    return value.translate(UNICODE_REPLACEMENTS)
+
+
+def normalize_text_value_keeping_placeholders(value):
+    return collapse_whitespace(value).translate(UNICODE_REPLACEMENTS)
+
+
+def normalize_column_text(column):
+    """Normalize whitespace and Unicode characters in a column, and replace
+    missing data placeholders with NaN unless the column is one of
+    PLACEHOLDER_COLUMNS.
+
+    :param column: the column, with a normalized column name
+    :type column: pandas.Series
+    :returns: the column with text normalized
+    :rtype: pandas.Series
+    """
+    if not is_text_column(column):
+        return column
+    if column.name in PLACEHOLDER_COLUMNS:
+        return map_text_values(column, normalize_text_value_keeping_placeholders)
+    return map_text_values(column, normalize_text_value)
+
+
+def normalize_text(phi_df):
+    """Normalize whitespace and Unicode characters, and replace missing data
+    placeholders with NaN, in one pass over each column.
+
+    This is equivalent to calling fix_whitespace, then
+    replace_missing_data_placeholders, then replacing the characters in
+    UNICODE_REPLACEMENTS.
+
+    :param phi_df: the PHI-base DataFrame, with normalized column names
+    :type phi_df: pandas.DataFrame
+    :return: the PHI-base DataFrame with text normalized
+    :rtype: pandas.DataFrame
+    """
+    for col in get_text_columns(phi_df):
+        phi_df[col] = normalize_column_text(phi_df[col])
     return phi_df
 
 
@@ -109,8 +238,15 @@ def get_formatted_disease_names(diseases):
     ]
     pattern = re.compile(fr"\b({'|'.join(words_to_capitalize)})\b")
     replacements = {word: word.title() for word in words_to_capitalize}
-    replace = lambda match: replacements[match.group(0)]
-    return diseases.str.lower().str.replace(pattern, replace, regex=True)
+
+    def replace(match):
+        return replacements[match.group(0)]
+
+    if diseases.isna().all():
+        return diseases
+    return map_text_values(
+        diseases, lambda value: pattern.sub(replace, value.lower())
+    )
 
 
 def format_tissue_names(tissues):
@@ -152,8 +288,95 @@ def format_tissue_names(tissues):
         return tissues
     pattern = re.compile(fr"\b({'|'.join(words_to_lowercase)})\b")
     replacements = {word: word.lower() for word in words_to_lowercase}
-    replace = lambda match: replacements[match.group(0)]
-    return tissues.str.replace(pattern, replace, regex=True)
+
+    def replace(match):
+        return replacements[match.group(0)]
+
+    return map_text_values(tissues, lambda value: pattern.sub(replace, value))
+
+
+# Recognises all formats of gene inducer ID
+GENE_INDUCER_ID_PATTERN = re.compile(
+    '(?:(?P<label>anti-infective)'
+    r'|CHEBI:\s*(?P<chebi_id>\d+)\s*'
+    r'|(?i:CAS\s*(?::|No[.:])\s*)?(?P<cas_id>\d+-\d+-\d+)'
+    r'|(?P<text>[^\s:(]+|\(.+?\))'
+    r'|(?P<whitespace>\s+))'
+)
+
+# The separator written before each label, name and chemical ID in a gene
+# inducer ID, keyed by the type of the previous token and the type of the
+# last label or name.
+GENE_INDUCER_ID_SEPARATORS = {
+    (None, None): {'label': '', 'name': '', 'chem_id': ''},
+    ('label', 'label'): {'label': '; ', 'name': ': ', 'chem_id': ', '},
+    ('name', 'name'): {'label': '; ', 'name': ', ', 'chem_id': ': '},
+    ('chem_id', None): {'label': '; ', 'name': '; ', 'chem_id': '; '},
+    ('chem_id', 'label'): {'label': '; ', 'name': '; ', 'chem_id': ', '},
+    ('chem_id', 'name'): {'label': '; ', 'name': '; ', 'chem_id': ', '},
+}
+
+
+def format_gene_inducer_id(value):
+    """Convert a gene inducer ID to a consistent format.
+
+    Labels, chemical names and chemical IDs are written as they are read,
+    with the separator before each one looked up from the type of the
+    previous token.
+
+    :param value: the gene inducer ID
+    :type value: str
+    :returns: the formatted gene inducer ID
+    :rtype: str
+    """
+    parts = []
+    state = (None, None)
+    name = []
+    in_name = False
+
+    def write(token_type, text):
+        nonlocal state
+        parts.append(GENE_INDUCER_ID_SEPARATORS[state][token_type])
+        parts.append(text)
+        # Chemical IDs belong to the last label or name
+        context = state[1] if token_type == 'chem_id' else token_type
+        state = (token_type, context)
+
+    for match in GENE_INDUCER_ID_PATTERN.finditer(value):
+        group = match.lastgroup
+        text = match.group(group)
+        if group == 'whitespace':
+            if in_name:
+                name.append(' ')
+            continue
+        if group != 'text':
+            if in_name:
+                # Done parsing names; join and write the name parts
+                write('name', ''.join(name).rstrip())
+                in_name = False
+                name = []
+            if group == 'chebi_id':
+                write('chem_id', f'CHEBI:{text}')
+            elif group == 'cas_id':
+                write('chem_id', f'CAS:{text}')
+            else:
+                write('label', 'anti-infective')
+        elif text in (':', ';', ','):
+            # Don't include separators
+            continue
+        elif text.isdigit():
+            # Treat single digits as chemical IDs
+            write('chem_id', text)
+        else:
+            # Otherwise assume the text is a chemical name
+            in_name = True
+            if text[-1] in ':;,':
+                name.append(text[:-1])
+                write('name', ' '.join(name))
+                name = []
+            else:
+                name.append(text)
+    return ''.join(parts)
 
 
 def parse_gene_inducer_ids(gene_inducer_ids):
@@ -164,125 +387,34 @@ def parse_gene_inducer_ids(gene_inducer_ids):
     :return: the reformatted gene inducer ID column
     :rtype: pandas.Series
     """
-
-    def make_pattern():
-        # Make a regular expression to recognise all formats of gene inducer ID.
-        anti_infective_label = '(?P<anti_inf>anti-infective)'
-        chebi_id = 'CHEBI:\s*(?P<chebi_id>\d+)\s*'
-        cas_id = '(?i:CAS\s*(?::|No[.:])\s*)?(?P<cas_id>\d+-\d+-\d+)'
-        text = '(?P<text>[^\s:(]+|\(.+?\))'
-        whitespace = '(?P<whitespace>\s+)'
-        alternatives = (
-            f'(?:{anti_infective_label}|{chebi_id}|{cas_id}|{text}|{whitespace})'
-        )
-        pattern = re.compile(alternatives)
-        return pattern
-
-    def lex_id_rows(rows, pattern):
-        # Convert gene inducer IDs into a list of lexical tokens.
-        lexed_rows = []
-        for row in rows:
-            if pd.isna(row):
-                lexed_rows.append(row)
-                continue
-            symbols = []
-            name = []
-            in_name = False
-            sep_pattern = re.compile('[:;,]$')
-            for match in pattern.finditer(row):
-                group = match.lastgroup
-                text = match.group(group)
-                if group not in ('text', 'whitespace') and in_name:
-                    # Done parsing names; join and append the name parts
-                    symbols.append(('name', ''.join(name).rstrip()))
-                    in_name = False
-                    name = []
-                if group == 'chebi_id':
-                    symbols.append(('chem_id', f'CHEBI:{text}'))
-                elif group == 'cas_id':
-                    symbols.append(('chem_id', f'CAS:{text}'))
-                elif group == 'anti_inf':
-                    symbols.append(('label', 'anti-infective'))
-                elif group == 'whitespace':
-                    if in_name:
-                        name.append(' ')
-                elif group == 'text':
-                    if sep_pattern.fullmatch(text):
-                        # Don't include separators
-                        continue
-                    if text.isdigit():
-                        # Treat single digits as chemical IDs
-                        symbols.append(('chem_id', text))
-                        continue
-                    # Otherwise assume the text is a chemical name
-                    in_name = True
-                    end_sep_match = sep_pattern.search(text)
-                    if end_sep_match:
-                        name.append(sep_pattern.sub('', text))
-                        symbols.append(('name', ' '.join(name)))
-                        name = []
-                    else:
-                        name.append(text)
-            lexed_rows.append(symbols)
-        return lexed_rows
-
-    def parse_lexed_rows(rows):
-        # Parse the lexical tokens and create a correctly formatted
-        # representation of each gene inducer ID.
-        parsed_rows = []
-        for row in rows:
-            if not isinstance(row, list):
-                # Assume the row is NaN if it's not a list.
-                parsed_rows.append(row)
-                continue
-            row_text = []
-            context = None
-            previous_token = None
-            for token_type, value in row:
-                if token_type == 'label':
-                    if previous_token:
-                        row_text.append('; ')
-                    row_text.append(value)
-                    context = 'label'
-
-                elif token_type == 'name':
-                    if previous_token == 'chem_id':
-                        row_text.append('; ')
-                    elif previous_token == 'name':
-                        row_text.append(', ')
-                    elif previous_token == 'label':
-                        row_text.append(': ')
-                    row_text.append(value)
-                    context = 'name'
-
-                elif token_type == 'chem_id':
-                    if previous_token == 'name':
-                        row_text.append(': ')
-                    elif context:
-                        row_text.append(', ')
-                    elif previous_token:
-                        row_text.append('; ')
-                    row_text.append(value)
-                else:
-                    raise ValueError(f'unsupported token type {token_type}')
-                previous_token = token_type
-
-            parsed_rows.append(''.join(row_text))
-        return parsed_rows
-
     if gene_inducer_ids.isna().all():
         return gene_inducer_ids
     # Trailing semicolons are a formatting error
-    ids = gene_inducer_ids.str.rstrip(';').values
-    pattern = make_pattern()
-    lexed_rows = lex_id_rows(ids, pattern)
-    parsed_rows = parse_lexed_rows(lexed_rows)
-    series = pd.Series(
-        parsed_rows,
-        index=gene_inducer_ids.index,
-        name=gene_inducer_ids.name,
+    ids = gene_inducer_ids.str.rstrip(';')
+    return map_text_values(ids, format_gene_inducer_id)
+
+
+def parse_gene_inducer_id_array(values):
+    """Convert an array of gene inducer IDs to a consistent format.
+
+    :param values: the gene inducer IDs, with missing values as null, None
+    or NaN
+    :type values: pyarrow.Array or pyarrow.ChunkedArray or numpy.ndarray
+    :returns: the formatted gene inducer IDs, as the same type of array
+    :rtype: pyarrow.Array or pyarrow.ChunkedArray or numpy.ndarray
+    """
+    is_arrow = isinstance(values, (pa.Array, pa.ChunkedArray))
+    column = pd.Series(
+        values.to_numpy(zero_copy_only=False) if is_arrow else values,
+        dtype=object,
     )
-    return series
+    parsed = parse_gene_inducer_ids(column).to_numpy(dtype=object)
+    if not is_arrow:
+        return parsed
+    array = pa.array(parsed, type=values.type, from_pandas=True)
+    if isinstance(values, pa.ChunkedArray):
+        return pa.chunked_array([array], type=values.type)
+    return array
 
 
 def parse_go_annotation(go_annotation):
@@ -296,13 +428,10 @@ def parse_go_annotation(go_annotation):
     go_id = '(?P<go_id>GO:\d+)'
     evidence = '(?P<evidence>IDA|IEA|IGI|IMP|IPI|ISS|NAS|ND|TAS)'
     pattern = re.compile(f'{go_id}(?:[,;]\s*{evidence})?')
-    parsed_rows = []
-    for row in go_annotation.values:
-        if row is np.nan:
-            parsed_rows.append(row)
-            continue
+
+    def parse(value):
         parsed = []
-        for match in pattern.finditer(row):
+        for match in pattern.finditer(value):
             go_id, evidence = match.group('go_id'), match.group('evidence')
             if go_id:
                 parts = [go_id]
@@ -310,15 +439,10 @@ def parse_go_annotation(go_annotation):
                     parts.append(evidence)
                 parsed.append(', '.join(parts))
         if parsed:
-            parsed_rows.append('; '.join(parsed))
-        else:
-            parsed_rows.append(row)  # Keep the original value
-    series = pd.Series(
-        parsed_rows,
-        index=go_annotation.index,
-        name=go_annotation.name,
-    )
-    return series
+            return '; '.join(parsed)
+        return value  # Keep the original value
+
+    return map_text_values(go_annotation, parse)
 
 
 def parse_interacting_partners_id(interacting_partners_ids):
@@ -327,11 +451,8 @@ def parse_interacting_partners_id(interacting_partners_ids):
         r'|(?P<nan>no data found)'
         r'|(?P<word>\S+)'
     )
-    parsed_rows = []
-    for value in interacting_partners_ids.values:
-        if pd.isna(value):
-            parsed_rows.append(value)
-            continue
+
+    def parse(value):
         parsed = []
         partner = []
         state = None
@@ -359,53 +480,255 @@ def parse_interacting_partners_id(interacting_partners_ids):
                         state = 'gene'
                 case _:
                     raise NotImplementedError
-        parsed_rows.append(' '.join(parsed).rstrip(';'))
+        return ' '.join(parsed).rstrip(';')
+
+    return map_text_values(interacting_partners_ids, parse)
+
+
+def split_go_annotation(value):
+    """Split a formatted GO annotation into GO IDs and evidence codes.
+
+    :param value: a GO annotation, as formatted by parse_go_annotation
+    :type value: str
+    :returns: pairs of a GO ID and an evidence code, or None if there is
+    no evidence code
+    :rtype: list[tuple]
+    """
+    rows = []
+    for annotation in value.split('; '):
+        go_id, _, evidence = annotation.partition(', ')
+        rows.append((go_id, evidence or None))
+    return rows
+
+
+def split_interacting_partners_id(value):
+    """Split a formatted interacting partners ID into partners.
 
-    series = pd.Series(
-        parsed_rows,
-        index=interacting_partners_ids.index,
-        name=interacting_partners_ids.name,
+    Missing data placeholders are skipped. Parts that are not in the
+    expected format are kept, so that they can be found by validation: an
+    ID without a database has an accession of None.
+
+    :param value: an interacting partners ID, as formatted by
+    parse_interacting_partners_id
+    :type value: str
+    :returns: tuples of the partner gene, or None if there is no gene, the
+    database and the accession
+    :rtype: list[tuple]
+    """
+    rows = []
+    for partner in value.split('; '):
+        if partner == 'no data found':
+            continue
+        ids = partner.split(', ')
+        gene = ids.pop(0) if len(ids) > 1 else None
+        for partner_id in ids:
+            db, sep, accession = partner_id.partition(': ')
+            rows.append((gene, db, accession if sep else None))
+    return rows
+
+
+def explode_column(column, record_ids, split, columns):
+    """Split a multi-valued column into a long-format child table.
+
+    Each distinct value is only split once. Child rows are in the same order
+    as their parent rows, and the child rows of the parent row at position
+    i are at positions offsets[i] to offsets[i + 1] of the child table.
+
+    :param column: the multi-valued column
+    :type column: pandas.Series
+    :param record_ids: the record ID of each row of the column
+    :type record_ids: pandas.Series
+    :param split: a function that splits a string into a list of tuples
+    :type split: callable
+    :param columns: the names of the values in each tuple
+    :type columns: list[str]
+    :returns: the child table, with a record_id column, and the offsets
+    :rtype: tuple[pandas.DataFrame, numpy.ndarray]
+    """
+    values = column.to_numpy(dtype=object)
+    is_string = np.fromiter(
+        (isinstance(value, str) for value in values), bool, len(values)
+    )
+    codes = np.full(len(values), -1)
+    codes[is_string], uniques = pd.factorize(values[is_string])
+    unique_rows = [split(value) for value in uniques]
+    # Missing values have the code -1, which selects the trailing zero
+    unique_counts = np.array([len(rows) for rows in unique_rows] + [0])
+    unique_starts = np.cumsum(unique_counts) - unique_counts
+    counts = unique_counts[codes]
+    offsets = np.zeros(len(values) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    parents = np.repeat(np.arange(len(values)), counts)
+    positions = (
+        unique_starts[codes[parents]]
+        + np.arange(offsets[-1])
+        - offsets[parents]
     )
-    return series
+    unique_table = pd.DataFrame.from_records(
+        [row for rows in unique_rows for row in rows], columns=columns
+    )
+    table = unique_table.iloc[positions].reset_index(drop=True)
+    table.insert(0, 'record_id', record_ids.to_numpy()[parents])
+    return table, offsets
+
+
+def make_child_tables(phi_df):
+    """Split multi-valued columns of the cleaned PHI-base DataFrame into
+    long-format child tables.
+
+    The tables are:
+
+    - go_annotation: record_id, go_id, evidence
+    - interacting_partners: record_id, partner_gene, db, accession
+
+    :param phi_df: the cleaned PHI-base DataFrame
+    :type phi_df: pandas.DataFrame
+    :returns: a mapping between table names and pairs of the table and
+    its offsets, as returned by explode_column
+    :rtype: dict
+    """
+    return {
+        'go_annotation': explode_column(
+            phi_df.go_annotation,
+            phi_df.record_id,
+            split_go_annotation,
+            ['go_id', 'evidence'],
+        ),
+        'interacting_partners': explode_column(
+            phi_df.interacting_partners_id,
+            phi_df.record_id,
+            split_interacting_partners_id,
+            ['partner_gene', 'db', 'accession'],
+        ),
+    }
+
+
+# Formats of curation dates in PHI-base. Each has a pattern that matches
+# dates in the format, a replacement that converts matching dates to a
+# fixed format, and the fixed format. Two-digit years are in the 2000s.
+CURATION_DATE_FORMATS = {
+    'iso': (r'\d{4}-\d{2}-\d{2}', r'\g<0>', '%Y-%m-%d'),
+    'iso_datetime': (
+        r'\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}', r'\g<0>', '%Y-%m-%d %H:%M:%S'
+    ),
+    'day_month_year': (r'\d{1,2}/\d{1,2}/\d{4}', r'\g<0>', '%d/%m/%Y'),
+    'day_month_yy': (
+        r'(\d{1,2})-([A-Z][a-z]{2})[a-z]*-(\d{2})', r'\1-\2-20\3', '%d-%b-%Y'
+    ),
+    'month_yy': (r'([A-Z][a-z]{2})[a-z]*-(\d{2})', r'\1-20\2', '%b-%Y'),
+    'yy_month': (r'(\d{2})-([A-Z][a-z]{2})[a-z]*', r'\2-20\1', '%b-%Y'),
+    'month_year': (r'([A-Z][a-z]{2})[a-z]*[- ](\d{4})', r'\1-\2', '%b-%Y'),
+    'excel_serial': (r'\d{5}(?:\.0*)?', r'\g<0>', None),
+}
+
+# Excel stores dates as the number of days since this date
+EXCEL_EPOCH = '1899-12-30'
+
+
+def get_curation_date_format(value):
+    """Get the format of a curation date.
+
+    :param value: the curation date
+    :returns: the name of the format in CURATION_DATE_FORMATS, 'datetime'
+    for dates that are already parsed, 'missing' for missing dates, or None
+    if the format is not recognised
+    :rtype: str or None
+    """
+    if isinstance(value, (datetime, date)):
+        return 'datetime'
+    if isinstance(value, (int, float, np.number)) and not isinstance(value, bool):
+        return 'missing' if pd.isna(value) else 'excel_serial'
+    if pd.isna(value) or not value.strip():
+        return 'missing'
+    for name, (pattern, _, _) in CURATION_DATE_FORMATS.items():
+        if re.fullmatch(pattern, value.strip()):
+            return name
+    return None
 
 
 def get_converted_curation_dates(curation_dates):
     """Convert curation dates in PHI-base to ISO 8601 format.
 
+    Each distinct date is classified into one of the formats in
+    CURATION_DATE_FORMATS, then the dates in each format are converted
+    together with a fixed format. Dates in none of these formats are
+    parsed with mixed formats, day first.
+
     :param curation_dates: the curation dates from PHI-base
     :type curation_dates: pandas.Series
+    :raises ValueError: if any date cannot be parsed
     :returns: the converted curation dates
     :rtype: pandas.Series
     """
-
-    # Some months use long names, which fail to parse, so convert
-    # these to short (3-letter) names.
-    long_month_pattern = r'^([A-Z][a-z]{2})[a-z]+-(\d{2})$'
-    # Now fix inconsistent month-year and year-month dates with two-digit
-    # years, which fail to parse.
-    month_year_pattern = r'^([A-Z][a-z]{2})-(\d{2})$'
-    year_month_pattern = r'^(\d{2})-([A-Z][a-z]{2})$'
-    fixed_dates = (
-        curation_dates
-        .astype(str)
-        .str.strip()
-        .str.replace(long_month_pattern, r'\1-\2', regex=True)
-        .str.replace(month_year_pattern, r'\1-20\2', regex=True)
-        .str.replace(year_month_pattern, r'\2-20\1', regex=True)
-    )
-    converted_dates = pd.to_datetime(
-        fixed_dates, format='mixed', dayfirst=True,
+    codes, uniques = pd.factorize(curation_dates.to_numpy(dtype=object))
+    if not len(uniques):
+        return pd.Series(
+            pd.NaT,
+            index=curation_dates.index,
+            name=curation_dates.name,
+            dtype='M8[ns]',
+        )
+    formats = [get_curation_date_format(value) for value in uniques]
+    unique_dates = pd.Series(pd.NaT, index=range(len(uniques)), dtype='M8[ns]')
+    for name in set(formats) - {'missing', None}:
+        positions = [i for i, format_ in enumerate(formats) if format_ == name]
+        values = uniques[positions]
+        if name == 'datetime':
+            dates = pd.to_datetime(values)
+        elif name == 'excel_serial':
+            dates = pd.to_datetime(
+                values.astype(float), unit='D', origin=EXCEL_EPOCH
+            )
+        else:
+            pattern, replacement, date_format = CURATION_DATE_FORMATS[name]
+            fixed_values = [
+                re.sub(pattern, replacement, value.strip()) for value in values
+            ]
+            dates = pd.to_datetime(
+                fixed_values, format=date_format, errors='coerce'
+            )
+            # Values that match a pattern can still be invalid dates
+            for i, is_invalid in zip(positions, dates.isna()):
+                if is_invalid:
+                    formats[i] = None
+        unique_dates[positions] = dates
+    positions = [i for i, format_ in enumerate(formats) if format_ is None]
+    if positions:
+        values = [str(value).strip() for value in uniques[positions]]
+        dates = pd.to_datetime(
+            values, format='mixed', dayfirst=True, errors='coerce'
+        )
+        unique_dates[positions] = dates
+        for i, is_valid in zip(positions, dates.notna()):
+            if is_valid:
+                formats[i] = 'mixed'
+    unrecognised = [
+        str(value) for value, format_ in zip(uniques, formats) if format_ is None
+    ]
+    if unrecognised:
+        raise ValueError(
+            f'curation dates in an unknown format: {", ".join(unrecognised)}'
+        )
+    converted_dates = pd.Series(
+        unique_dates.to_numpy()[codes],
+        index=curation_dates.index,
+        name=curation_dates.name,
     )
+    # Missing values have the code -1
+    converted_dates[codes == -1] = pd.NaT
     return converted_dates
 
 
-def apply_replacements(phi_df):
-    """Replace incorrect values in PHI-base.
+def get_replacements():
+    """Get the replacements for incorrect values in PHI-base.
 
-    :param phi_df: the PHI-base DataFrame
-    :type phi_df: pandas.DataFrame
-    :returns: the PHI-base DataFrame with replacements applied
-    :rtype: pandas.DataFrame
+    Replacements are applied in order. Each pattern is a regular expression
+    that replaces every match in a value with a string, or replaces the
+    whole value with NaN if the replacement is NaN.
+
+    :returns: a mapping between column names and mappings between patterns
+    and replacement values
+    :rtype: dict
     """
     yes_no_replacement = {
         '(?i)(yes)': 'yes',
@@ -580,7 +903,201 @@ def apply_replacements(phi_df):
             '\N{RIGHT TRIANGLE}': '\N{GREEK CAPITAL LETTER DELTA}',
         }
     }
-    return phi_df.replace(replacements, regex=True)
+    return replacements
+
+
+def get_literal_pattern(pattern):
+    """Get the text matched by a pattern without special characters.
+
+    :returns: the text, or None if the pattern has special characters
+    :rtype: str or None
+    """
+    if any(char in REGEX_SPECIAL_CHARS for char in pattern):
+        return None
+    return pattern
+
+
+def compile_replacement_rule(pattern, value):
+    """Compile a replacement into functions that test and apply it.
+
+    The functions are equivalent to replacing with a regular expression, as
+    in pandas.Series.replace with regex=True. Patterns that match literal
+    text, or a whole literal value, are applied without using regular
+    expressions.
+
+    :param pattern: the regular expression to replace
+    :type pattern: str
+    :param value: the replacement value, or NaN to replace the whole value
+    :type value: str or float
+    :returns: a function that tests whether the pattern matches a string,
+    and a function that applies the replacement to a string
+    :rtype: tuple[callable, callable]
+    """
+    regex = re.compile(pattern)
+    is_text = isinstance(value, str)
+    literal = exact = None
+    # Replacements with backslashes may refer to groups in the pattern
+    if not (is_text and '\\' in value):
+        literal = get_literal_pattern(pattern)
+        if pattern.startswith('^') and pattern.endswith('$'):
+            exact = get_literal_pattern(pattern[1:-1])
+
+    def replace_regex(text):
+        if is_text:
+            return regex.sub(value, text)
+        return value if regex.search(text) else text
+
+    if literal is not None:
+        def matches(text):
+            return literal in text
+
+        def replace(text):
+            if literal not in text:
+                return text
+            return text.replace(literal, value) if is_text else value
+    elif exact is not None:
+        def matches(text):
+            # $ also matches before a newline at the end of the string
+            return text == exact or text == f'{exact}\n'
+
+        def replace(text):
+            if text == exact:
+                return value
+            if text == f'{exact}\n':
+                return replace_regex(text)
+            return text
+    else:
+        def matches(text):
+            return regex.search(text) is not None
+
+        replace = replace_regex
+    return matches, replace
+
+
+def compile_replacements(replacements):
+    """Compile the replacements for each column.
+
+    Each column gets a combined pattern that matches if any of its patterns
+    match, so that values with nothing to replace are skipped quickly.
+
+    :param replacements: replacements, as returned by get_replacements
+    :type replacements: dict
+    :returns: a mapping between column names and pairs of the combined
+    pattern and a list of rules, which are tuples of the pattern and the
+    functions returned by compile_replacement_rule
+    :rtype: dict
+    """
+    compiled = {}
+    for col, column_replacements in replacements.items():
+        alternatives = []
+        rules = []
+        for pattern, value in column_replacements.items():
+            # Global flags are only allowed at the start of a pattern
+            flags, inline_pattern = re.fullmatch(
+                r'(\(\?[aiLmsux]+\))?(.*)', pattern, re.DOTALL
+            ).groups()
+            if flags:
+                inline_pattern = f'{flags[:-1]}:{inline_pattern})'
+            alternatives.append(f'(?:{inline_pattern})')
+            rules.append((pattern, *compile_replacement_rule(pattern, value)))
+        compiled[col] = (re.compile('|'.join(alternatives)), rules)
+    return compiled
+
+
+@functools.lru_cache(maxsize=None)
+def get_replacement_rules():
+    """Get the compiled replacements, compiling them on first use."""
+    return compile_replacements(get_replacements())
+
+
+def apply_replacement_rules(column, combined_pattern, rules, rule_counts=None):
+    """Apply compiled replacements to a column, in order.
+
+    As in pandas.DataFrame.replace with regex=True, each rule is applied to
+    the output of the rules before it, but only to values where its pattern
+    matches the original value.
+
+    :param column: the column to apply replacements to
+    :type column: pandas.Series
+    :param combined_pattern: a pattern that matches if any rule matches
+    :type combined_pattern: re.Pattern
+    :param rules: tuples of a pattern and its test and replacement
+    functions; see compile_replacements
+    :type rules: list[tuple]
+    :param rule_counts: if given, updated with the number of cells changed
+    by each rule, keyed by column name and pattern
+    :type rule_counts: dict or None
+    :returns: the column with replacements applied
+    :rtype: pandas.Series
+    """
+    changes = {}
+
+    def replace(original):
+        if not combined_pattern.search(original):
+            return original
+        text = original
+        for pattern, matches, rule in rules:
+            if not matches(original):
+                continue
+            replaced = rule(text)
+            if replaced is not text and replaced != text:
+                changes.setdefault(original, []).append(pattern)
+            text = replaced
+            if not isinstance(text, str):
+                break
+        return text
+
+    replaced = map_text_values(column, replace)
+    if rule_counts is not None:
+        for pattern, *_ in rules:
+            rule_counts.setdefault((column.name, pattern), 0)
+        if changes:
+            value_counts = column[column.isin(list(changes))].value_counts()
+            for value, patterns in changes.items():
+                for pattern in patterns:
+                    rule_counts[column.name, pattern] += value_counts[value]
+    return replaced
+
+
+def apply_column_replacements(column, rule_counts=None):
+    """Replace incorrect values in a column of PHI-base.
+
+    See apply_replacements.
+    """
+    combined_pattern, rules = get_replacement_rules()[column.name]
+    return apply_replacement_rules(column, combined_pattern, rules, rule_counts)
+
+
+def apply_replacements(phi_df, rule_counts=None):
+    """Replace incorrect values in PHI-base.
+
+    Replacements are only matched against distinct values, and values that
+    no pattern matches are skipped with a single search.
+
+    :param phi_df: the PHI-base DataFrame
+    :type phi_df: pandas.DataFrame
+    :param rule_counts: if given, updated with the number of cells changed
+    by each replacement, keyed by column name and pattern, which shows
+    replacements that no longer change any values
+    :type rule_counts: dict or None
+    :returns: the PHI-base DataFrame with replacements applied
+    :rtype: pandas.DataFrame
+    """
+    for col in get_replacement_rules():
+        phi_df[col] = apply_column_replacements(phi_df[col], rule_counts)
+    return phi_df
+
+
+INTEGER_COLUMNS = (
+    'pathogen_id',
+    'host_id',
+    'pmid',
+    'year',
+)
+
+
+def convert_integer_column(column):
+    return pd.to_numeric(column).astype('Int64')
 
 
 def convert_integer_columns(phi_df):
@@ -589,57 +1106,49 @@ def convert_integer_columns(phi_df):
     Specifically, convert to Int64, which supports NaN without coercing
     numeric values to float.
     """
-    integer_columns = (
-        'pathogen_id',
-        'host_id',
-        'pmid',
-        'year',
-    )
-    for col in integer_columns:
-        phi_df[col] = pd.to_numeric(phi_df[col]).astype('Int64')
+    for col in INTEGER_COLUMNS:
+        phi_df[col] = convert_integer_column(phi_df[col])
     return phi_df
 
 
-def fix_casing(phi_df):
-    """Convert columns to lowercase while preserving special casing.
+@functools.lru_cache(maxsize=None)
+def get_variable_casing_pattern(excluded_words):
+    """Make a pattern that matches the first letter of words to lowercase.
 
-    :param phi_df: the PHI-base DataFrame
-    :type phi_df: pandas.DataFrame
-    :returns: the PHI-base DataFrame with case conversion applied
-    :rtype: pandas.DataFrame
+    Words are separated by whitespace and punctuation. A word is lowercased
+    if it starts with a capital letter followed by a word character other
+    than a digit or capital letter, so acronyms keep their casing, and it
+    does not start with one of the excluded words.
+
+    :param excluded_words: words that keep their casing
+    :type excluded_words: tuple[str]
+    :returns: the compiled pattern
+    :rtype: re.Pattern
     """
+    separator_chars = r'\s()\[\]:;,./-'
+    # Excluded words can only match within a single word
+    excluded_words = [
+        word for word in excluded_words
+        if not re.search(f'[{separator_chars}]', word)
+    ]
+    exclusion = '|'.join(re.escape(word) for word in excluded_words)
+    return re.compile(
+        # Start of a word
+        f'(?<![^{separator_chars}])'
+        # Not an excluded word
+        + (fr'(?!\b(?:{exclusion})\b)' if exclusion else '')
+        + r'[A-Z](?=[^\W0-9A-Z])'
+    )
 
-    def variable_casing(column, excluded_words):
-        exclude_pattern = re.compile(
-            fr"\b({'|'.join(re.escape(word) for word in excluded_words)})\b"
-        )
-        ignore_pattern = re.compile(r'[^A-Z]|[A-Z](?=[0-9A-Z-]|\b)')
-        separators = re.compile(r'(\s+|[()\[\]:;,./-])')
-        cased = []
-        for value in column.values:
-            if pd.isna(value):
-                cased.append(value)
-                continue
-            words = separators.split(value)
-            cased_words = []
-            for word in words:
-                if not word:
-                    # Skip empty strings from re.split
-                    continue
-                ignore = (
-                    ignore_pattern.match(word)
-                    or separators.match(word)
-                    or exclude_pattern.match(word)
-                )
-                if ignore:
-                    cased_words.append(word)
-                else:
-                    cased_word = word[0].lower() + word[1:]
-                    cased_words.append(cased_word)
-            cased.append(''.join(cased_words))
-        assert len(cased) == len(column)
-        return pd.Series(cased, index=column.index, name=column.name)
 
+def get_casing_exclusions():
+    """Get the columns to convert to lowercase, and the words in each
+    column that keep their casing.
+
+    :returns: a mapping between column names and lists of excluded words,
+    which are empty if the whole column is converted to lowercase
+    :rtype: dict
+    """
     pathway_exclusions = [
         'AbaA',
         'BfmR',
@@ -1281,21 +1790,59 @@ def fix_casing(phi_df):
         'gene_inducer': gene_inducer_exclusions,
         'gene_inducer_id': gene_inducer_id_exclusions,
     }
-    for col in columns:
-        column = phi_df[col]
-        if column.isna().all():
-            continue
-        column_exclusions = exclusions.get(col)
-        if column_exclusions:
-            phi_df[col] = variable_casing(column, column_exclusions)
-        else:
-            phi_df[col] = column.str.lower()
+    return {col: exclusions.get(col, []) for col in columns}
 
-    # Fix some already lowercased values
-    if phi_df.vegetative_spores.notna().any():
-        phi_df.vegetative_spores = phi_df.vegetative_spores.str.replace(
-            r'\bwt\b', 'WT', regex=True
-        )
+
+def fix_column_casing(column, excluded_words):
+    """Convert a column to lowercase while preserving special casing.
+
+    :param column: the column to convert
+    :type column: pandas.Series
+    :param excluded_words: words that keep their casing; if empty, the
+    whole column is converted to lowercase
+    :type excluded_words: list[str]
+    :returns: the converted column
+    :rtype: pandas.Series
+    """
+    if column.isna().all():
+        return column
+    if not excluded_words:
+        return column.str.lower()
+    pattern = get_variable_casing_pattern(tuple(excluded_words))
+
+    def lower(match):
+        return match.group(0).lower()
+
+    return map_text_values(column, lambda value: pattern.sub(lower, value))
+
+
+def fix_vegetative_spores_casing(vegetative_spores):
+    """Fix values in the vegetative spores column that were wrongly
+    converted to lowercase.
+    """
+    if vegetative_spores.isna().all():
+        return vegetative_spores
+    # Match with Python's regular expressions, so that its definition of a
+    # word boundary is used rather than pyarrow's.
+    pattern = re.compile(r'\bwt\b')
+    return map_text_values(
+        vegetative_spores, lambda value: pattern.sub('WT', value)
+    )
+
+
+def fix_casing(phi_df):
+    """Convert columns to lowercase while preserving special casing.
+
+    :param phi_df: the PHI-base DataFrame
+    :type phi_df: pandas.DataFrame
+    :returns: the PHI-base DataFrame with case conversion applied
+    :rtype: pandas.DataFrame
+    """
+    for col, excluded_words in get_casing_exclusions().items():
+        phi_df[col] = fix_column_casing(phi_df[col], excluded_words)
+    phi_df.vegetative_spores = fix_vegetative_spores_casing(
+        phi_df.vegetative_spores
+    )
     return phi_df
 
 
@@ -1310,76 +1857,447 @@ def replace_missing_data_placeholders(phi_df):
     :return: the PHI-base DataFrame with missing data placeholders replaced
     :rtype: pandas.DataFrame
     """
-    pattern = re.compile(r'(?i)^no data found$')
-    ignore_columns = ['protein_id', 'doi']
-    columns = phi_df.columns.difference(ignore_columns)
-    phi_df[columns] = phi_df[columns].replace(pattern, np.nan)
+    for col in get_text_columns(phi_df):
+        if col not in PLACEHOLDER_COLUMNS:
+            phi_df[col] = map_text_values(
+                phi_df[col], replace_missing_data_placeholder
+            )
+    return phi_df
+
+
+def extract_multiple_mutation_ids(multiple_mutation):
+    if multiple_mutation.isna().all():
+        return multiple_mutation
+    # Extract PHI IDs and rejoin them to fix whitespace
+    return multiple_mutation.str.findall(r'PHI:\d+').str.join('; ')
+
+
+def convert_to_lowercase(column):
+    if column.isna().all():
+        return column
+    return column.str.lower()
+
+
+def make_cleaning_step(name, func, reads, writes=None):
+    """Make a step of a cleaning plan.
+
+    :param name: the name of the step
+    :type name: str
+    :param func: a function that is called with the columns that the step
+    reads, and returns the columns that it writes: a Series, or a tuple of
+    Series if the step writes more than one column. Functions should be
+    picklable so that steps can run in other processes.
+    :type func: callable
+    :param reads: the names of the columns that the step reads
+    :type reads: tuple[str]
+    :param writes: the names of the columns that the step writes, or None
+    if these are the columns that it reads
+    :type writes: tuple[str] or None
+    :returns: the step
+    :rtype: dict
+    """
+    return {
+        'name': name,
+        'func': func,
+        'reads': tuple(reads),
+        'writes': tuple(reads if writes is None else writes),
+    }
+
+
+def get_cleaning_plan(columns):
+    """Get the steps that clean the PHI-base DataFrame.
+
+    Steps are listed in the order they were written, but a step only needs
+    to run after the earlier steps that use the same columns (see
+    get_step_dependencies).
+
+    :param columns: the normalized column names of the PHI-base DataFrame
+    :type columns: list[str]
+    :returns: the steps, as returned by make_cleaning_step
+    :rtype: list[dict]
+    """
+    plan = []
+
+    def add_step(name, func, *columns):
+        plan.append(make_cleaning_step(name, func, columns))
+
+    for col in columns:
+        add_step('normalize_text', normalize_column_text, col)
+    for col in get_replacement_rules():
+        add_step('apply_replacements', apply_column_replacements, col)
+    for col in INTEGER_COLUMNS:
+        add_step('convert_integer_column', convert_integer_column, col)
+    for col, excluded_words in get_casing_exclusions().items():
+        func = functools.partial(fix_column_casing, excluded_words=excluded_words)
+        add_step('fix_casing', func, col)
+    add_step(
+        'fix_casing', fix_vegetative_spores_casing, 'vegetative_spores'
+    )
+    add_step(
+        'extract_multiple_mutation_ids',
+        extract_multiple_mutation_ids,
+        'multiple_mutation',
+    )
+    add_step(
+        'convert_curation_dates', get_converted_curation_dates, 'curation_date'
+    )
+    add_step('format_disease_names', get_formatted_disease_names, 'disease')
+    add_step('format_tissue_names', format_tissue_names, 'tissue')
+    add_step('convert_to_lowercase', convert_to_lowercase, 'mutant_phenotype')
+    add_step('parse_gene_inducer_ids', parse_gene_inducer_ids, 'gene_inducer_id')
+    add_step('parse_go_annotation', parse_go_annotation, 'go_annotation')
+    add_step(
+        'parse_interacting_partners_id',
+        parse_interacting_partners_id,
+        'interacting_partners_id',
+    )
+    dtype_plan = get_dtype_plan()
+    for col in columns:
+        if col in dtype_plan:
+            func = functools.partial(convert_column_dtype, dtype=dtype_plan[col])
+            add_step('apply_dtype_plan', func, col)
+    return plan
+
+
+def get_step_dependencies(plan):
+    """Get the earlier steps that each step of a cleaning plan depends on.
+
+    A step depends on the last earlier step that writes a column it reads
+    or writes, and on earlier steps that read a column it writes.
+
+    :param plan: the cleaning plan
+    :type plan: list[dict]
+    :returns: the positions in the plan of the steps that each step depends
+    on
+    :rtype: list[set[int]]
+    """
+    last_writers = {}
+    readers = {}
+    dependencies = []
+    for i, step in enumerate(plan):
+        step_dependencies = {
+            last_writers[col]
+            for col in (*step['reads'], *step['writes'])
+            if col in last_writers
+        }
+        for col in step['writes']:
+            step_dependencies.update(readers.get(col, ()))
+        dependencies.append(step_dependencies)
+        for col in step['reads']:
+            readers.setdefault(col, set()).add(i)
+        for col in step['writes']:
+            last_writers[col] = i
+            readers[col] = set()
+    return dependencies
+
+
+def select_cleaning_steps(plan, columns):
+    """Select the steps of a cleaning plan needed to clean some columns.
+
+    :param plan: the cleaning plan
+    :type plan: list[dict]
+    :param columns: the names of the columns to clean
+    :type columns: list[str]
+    :returns: the selected steps, in the same order
+    :rtype: list[dict]
+    """
+    needed = set(columns)
+    selected = []
+    for step in reversed(plan):
+        if needed.isdisjoint(step['writes']):
+            continue
+        selected.append(step)
+        needed.difference_update(step['writes'])
+        needed.update(step['reads'])
+    return selected[::-1]
+
+
+def write_step_result(phi_df, step, result):
+    columns = (result,) if len(step['writes']) == 1 else result
+    for col, column in zip(step['writes'], columns, strict=True):
+        phi_df[col] = column
+
+
+def run_cleaning_plan(phi_df, plan, executor=None):
+    """Run the steps of a cleaning plan on the PHI-base DataFrame.
+
+    :param phi_df: the PHI-base DataFrame, with normalized column names
+    :type phi_df: pandas.DataFrame
+    :param plan: the cleaning plan
+    :type plan: list[dict]
+    :param executor: an executor used to run steps that do not depend on
+    each other concurrently, or None to run steps in order
+    :type executor: concurrent.futures.Executor or None
+    :returns: the PHI-base DataFrame with the plan applied
+    :rtype: pandas.DataFrame
+    """
+    if executor is None:
+        for step in plan:
+            result = step['func'](*(phi_df[col] for col in step['reads']))
+            write_step_result(phi_df, step, result)
+        return phi_df
+
+    dependencies = get_step_dependencies(plan)
+    n_waiting = [len(step_dependencies) for step_dependencies in dependencies]
+    dependents = [[] for _ in plan]
+    for i, step_dependencies in enumerate(dependencies):
+        for j in step_dependencies:
+            dependents[j].append(i)
+    futures = {}
+
+    def submit(i):
+        step = plan[i]
+        columns = [phi_df[col] for col in step['reads']]
+        futures[executor.submit(step['func'], *columns)] = i
+
+    try:
+        for i, n in enumerate(n_waiting):
+            if n == 0:
+                submit(i)
+        while futures:
+            done, _ = concurrent.futures.wait(
+                futures, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            for future in done:
+                i = futures.pop(future)
+                write_step_result(phi_df, plan[i], future.result())
+                for j in dependents[i]:
+                    n_waiting[j] -= 1
+                    if n_waiting[j] == 0:
+                        submit(j)
+    finally:
+        for future in futures:
+            future.cancel()
     return phi_df
 
 
-def clean_phibase(phi_df):
+def clean_phibase(phi_df, columns=None, executor=None, jobs=1):
     """Apply cleaning functions to the PHI-base DataFrame.
 
+    Cleaning steps on different columns are independent, so they can be
+    run concurrently in a process pool. The result is the same as running
+    the steps in order.
+
     :param phi_df: the PHI-base DataFrame
     :type phi_df: pandas.DataFrame
+    :param columns: the normalized names of the columns to clean and return,
+    or None for all columns. Only the cleaning steps needed for these
+    columns are run.
+    :type columns: list[str] or None
+    :param executor: an executor used to run independent cleaning steps
+    concurrently, or None to run steps in order
+    :type executor: concurrent.futures.Executor or None
+    :param jobs: the number of processes used to run cleaning steps, if no
+    executor is given
+    :type jobs: int
+    :raises ValueError: if jobs is less than one
     :return: the cleaned PHI-base DataFrame
     :rtype: pandas.DataFrame
     """
+    if jobs < 1:
+        raise ValueError(f'jobs must be a positive integer: {jobs}')
     phi_df = phi_df.rename(columns=lambda x: x.strip())  # strip column names
     phi_df = remove_excluded_columns(phi_df)
-    phi_df = fix_whitespace(phi_df)
     phi_df = normalize_column_names(phi_df)
-    phi_df = replace_missing_data_placeholders(phi_df)
-
-    # Normalize Unicode characters
-    phi_df = phi_df.replace(
-        {
-            '\N{LATIN SMALL LIGATURE FFI}': 'ffi',
-            '\N{LATIN SMALL LIGATURE FL}': 'fl',
-            '\N{LATIN SMALL LIGATURE FF}': 'ff',
-            '\N{LATIN SMALL LIGATURE FFL}': 'ffl',
-            '\N{LATIN SMALL LIGATURE FI}': 'fi',
-            '\N{LEFT SINGLE QUOTATION MARK}': "'",
-            '\N{RIGHT SINGLE QUOTATION MARK}': "'",
-            '\N{LEFT DOUBLE QUOTATION MARK}': '"',
-            '\N{RIGHT DOUBLE QUOTATION MARK}': '"',
-            '\N{HYPHEN}': '-',
-            '\N{NON-BREAKING HYPHEN}': '-',
-            '\N{HEAVY WIDE-HEADED RIGHTWARDS ARROW}': '\N{RIGHTWARDS ARROW}',
-            '\N{LEFT-TO-RIGHT MARK}': '',
-            '\N{INCREMENT}': '\N{GREEK CAPITAL LETTER DELTA}',
-            '\N{WHITE UP-POINTING TRIANGLE}': '\N{GREEK CAPITAL LETTER DELTA}',
-            # Invalid characters
-            '\uf020': '',
-            '\uf031': '',
-            '\uf044': '',
-        },
-        regex=True,
-    )
-
     columns_to_clear = ['curation_comments', 'todo', 'aa_sequence', 'nt_sequence']
     phi_df[columns_to_clear] = np.nan
+    plan = get_cleaning_plan(phi_df.columns)
+    if columns is not None:
+        plan = select_cleaning_steps(plan, columns)
+        needed = set(columns).union(*(step['reads'] for step in plan))
+        phi_df = phi_df[[col for col in phi_df.columns if col in needed]].copy()
+    if executor is None and jobs > 1:
+        # Columns are sent to the workers by pickling, which copies the
+        # Arrow buffers of string columns without converting them
+        with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as own_executor:
+            phi_df = run_cleaning_plan(phi_df, plan, own_executor)
+    else:
+        phi_df = run_cleaning_plan(phi_df, plan, executor)
+    if columns is not None:
+        phi_df = phi_df[list(columns)]
+    return phi_df
 
-    phi_df = apply_replacements(phi_df)
-    phi_df = convert_integer_columns(phi_df)
-    phi_df = fix_casing(phi_df)
 
-    if phi_df.multiple_mutation.notna().any():
-        # Extract PHI IDs and rejoin them to fix whitespace
-        phi_df.multiple_mutation = (
-            phi_df.multiple_mutation
-            .str.findall('PHI:\d+')
-            .str.join('; ')
-        )
+def iter_clean_phibase(chunks, jobs=1):
+    """Clean chunks of rows of the PHI-base DataFrame.
 
-    phi_df.curation_date = get_converted_curation_dates(phi_df.curation_date)
-    phi_df.disease = get_formatted_disease_names(phi_df.disease)
-    phi_df.tissue = format_tissue_names(phi_df.tissue)
-    phi_df.mutant_phenotype = phi_df.mutant_phenotype.str.lower()
-    phi_df.gene_inducer_id = parse_gene_inducer_ids(phi_df.gene_inducer_id)
-    phi_df.go_annotation = parse_go_annotation(phi_df.go_annotation)
-    phi_df.interacting_partners_id = (
-        parse_interacting_partners_id(phi_df.interacting_partners_id)
+    Every cleaning function works on each row separately, and columns are
+    excluded and renamed based on the header alone, so the cleaned values
+    are the same as those from cleaning the whole DataFrame. Only one chunk
+    is cleaned at a time. Column types may differ between chunks, since
+    they depend on the values in each chunk.
+
+    :param chunks: chunks of the PHI-base DataFrame, with the original
+    column names, as returned by phi4pipeline.load.iter_spreadsheet_chunks
+    :type chunks: Iterable[pandas.DataFrame]
+    :param jobs: the number of processes used to run cleaning steps; the
+    same process pool is used for every chunk
+    :type jobs: int
+    :raises ValueError: if jobs is less than one
+    :returns: an iterator of cleaned chunks
+    :rtype: Iterator[pandas.DataFrame]
+    """
+    if jobs < 1:
+        raise ValueError(f'jobs must be a positive integer: {jobs}')
+    if jobs == 1:
+        for chunk_df in chunks:
+            yield clean_phibase(chunk_df)
+        return
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+        for chunk_df in chunks:
+            yield clean_phibase(chunk_df, executor=executor)
+
+
+def get_raw_record_ids(phi_df):
+    """Get the record IDs of the PHI-base DataFrame before cleaning.
+
+    :param phi_df: the PHI-base DataFrame, with the original column names
+    :type phi_df: pandas.DataFrame
+    :raises KeyError: if there is no record ID column
+    :returns: the record IDs
+    :rtype: pandas.Series
+    """
+    names = phi_df.columns.get_level_values(-1).str.strip()
+    positions = names.isin(['RecordID', 'Record ID']).nonzero()[0]
+    if len(positions) == 0:
+        raise KeyError('no record ID column found')
+    return phi_df.iloc[:, positions[0]]
+
+
+def get_row_fingerprints(phi_df):
+    """Get a fingerprint of each row of the PHI-base DataFrame.
+
+    Rows with the same values have the same fingerprint. Values are
+    compared regardless of the data type of their column, since the type
+    of a column can change when values in other rows change: for example,
+    whole numbers become floats when a missing value is added.
+
+    :param phi_df: the PHI-base DataFrame
+    :type phi_df: pandas.DataFrame
+    :returns: the fingerprints, with the same index as the DataFrame
+    :rtype: pandas.Series
+    """
+    columns = {}
+    for position, (_, column) in enumerate(phi_df.items()):
+        values = column.astype(object).where(column.notna(), np.nan)
+        if pd.api.types.is_float_dtype(column):
+            is_whole = column.notna() & (column % 1 == 0)
+            values[is_whole] = column[is_whole].astype('int64').astype(object)
+        columns[position] = values
+    return pd.util.hash_pandas_object(pd.DataFrame(columns), index=False)
+
+
+def find_changed_rows(phi_df, previous_df):
+    """Find the rows of the PHI-base DataFrame that are new or changed
+    since an earlier version of the spreadsheet.
+
+    Rows are matched by record ID, as in clean_phibase_incremental. Rows
+    without a unique record ID in both versions are treated as changed, as
+    is every row if the versions have different columns.
+
+    :param phi_df: the PHI-base DataFrame, with the original column names
+    :type phi_df: pandas.DataFrame
+    :param previous_df: the earlier version of the DataFrame
+    :type previous_df: pandas.DataFrame
+    :returns: a boolean Series that is True for changed rows, with the
+    same index as phi_df
+    :rtype: pandas.Series
+    """
+    is_changed = pd.Series(True, index=phi_df.index)
+    if not phi_df.columns.equals(previous_df.columns):
+        return is_changed
+    previous_ids = get_raw_record_ids(previous_df)
+    is_previous_keyed = previous_ids.notna() & ~previous_ids.duplicated(keep=False)
+    previous_fingerprints = pd.Series(
+        get_row_fingerprints(previous_df)[is_previous_keyed].values,
+        index=previous_ids[is_previous_keyed].values,
     )
+    record_ids = get_raw_record_ids(phi_df)
+    is_keyed = record_ids.notna() & ~record_ids.duplicated(keep=False)
+    matched = previous_fingerprints.reindex(record_ids[is_keyed].values)
+    fingerprints = get_row_fingerprints(phi_df)[is_keyed]
+    is_changed[is_keyed] = matched.values != fingerprints.values
+    return is_changed
 
-    return phi_df
+
+def merge_cleaned_rows(reused_df, changed_df):
+    """Concatenate two DataFrames of cleaned rows.
+
+    Column types are the same as if all of the rows were cleaned together:
+    a column that is empty in one DataFrame takes its type from the other,
+    and categories are recalculated from the merged values.
+
+    :param reused_df: rows cleaned in an earlier run
+    :type reused_df: pandas.DataFrame
+    :param changed_df: rows cleaned in this run
+    :type changed_df: pandas.DataFrame
+    :returns: the merged rows
+    :rtype: pandas.DataFrame
+    """
+    reused_empty = reused_df.isna().all()
+    changed_empty = changed_df.isna().all()
+    reused_df = reused_df.astype({
+        col: changed_df[col].dtype
+        for col in reused_df.columns[reused_empty & ~changed_empty]
+    })
+    changed_df = changed_df.astype({
+        col: reused_df[col].dtype
+        for col in changed_df.columns[changed_empty & ~reused_empty]
+    })
+    merged_df = pd.concat([reused_df, changed_df])
+    categorical = merged_df.columns[merged_df.dtypes == 'category']
+    merged_df = merged_df.astype({
+        col: merged_df[col].cat.categories.dtype for col in categorical
+    })
+    return apply_dtype_plan(merged_df)
+
+
+def clean_phibase_incremental(phi_df, previous_state=None, jobs=1):
+    """Clean the PHI-base DataFrame, reusing rows cleaned in an earlier run.
+
+    Rows are matched to the earlier run by record ID, and a row is only
+    reused if its values are unchanged. Other rows, including rows without
+    a unique record ID, are cleaned with clean_phibase. Since every
+    cleaning function works on each row separately, the result is the same
+    as cleaning the whole DataFrame.
+
+    :param phi_df: the PHI-base DataFrame, with the original column names
+    :type phi_df: pandas.DataFrame
+    :param previous_state: the state returned by an earlier run, or None
+    to clean every row
+    :type previous_state: dict or None
+    :param jobs: the number of processes used to clean the changed rows
+    :type jobs: int
+    :returns: the cleaned PHI-base DataFrame, the rows of it that were
+    cleaned in this run, and the state to pass to the next run
+    :rtype: tuple[pandas.DataFrame, pandas.DataFrame, dict]
+    """
+    record_ids = get_raw_record_ids(phi_df)
+    fingerprints = get_row_fingerprints(phi_df)
+    is_keyed = record_ids.notna() & ~record_ids.duplicated(keep=False)
+    is_reused = pd.Series(False, index=phi_df.index)
+    if previous_state is not None:
+        previous_fingerprints = previous_state['fingerprints']
+        matched = previous_fingerprints.reindex(record_ids[is_keyed].values)
+        is_reused[is_keyed] = matched.values == fingerprints[is_keyed].values
+
+    if len(phi_df) and is_reused.all():
+        cleaned_df = previous_state['cleaned'].loc[record_ids.values]
+        cleaned_df = cleaned_df.set_axis(phi_df.index)
+        changed_df = cleaned_df.iloc[:0]
+    else:
+        changed_df = clean_phibase(phi_df[~is_reused].copy(), jobs=jobs)
+        if is_reused.any():
+            reused_df = previous_state['cleaned'].loc[record_ids[is_reused].values]
+            reused_df = reused_df.set_axis(phi_df.index[is_reused])
+            cleaned_df = merge_cleaned_rows(reused_df, changed_df)
+            cleaned_df = cleaned_df.reindex(phi_df.index)
+        else:
+            cleaned_df = changed_df
+
+    keyed_ids = record_ids[is_keyed].values
+    state = {
+        'fingerprints': pd.Series(fingerprints[is_keyed].values, index=keyed_ids),
+        'cleaned': cleaned_df[is_keyed].set_axis(keyed_ids),
+    }
+    return cleaned_df, changed_df, state
@@ -5,11 +5,36 @@
 """Command line interface for the phi4pipeline package."""
 
 import argparse
+import sys
 
+from phi4pipeline.cache import clear_cache, get_default_cache_dir
+from phi4pipeline.load import INPUT_READERS
 from phi4pipeline.release import (
     make_files_for_zenodo,
+    make_release_files,
     prepare_spreadsheet_for_excel,
+    validate_spreadsheet,
 )
+from phi4pipeline.validate import ValidationError, get_validated_columns
+
+# Exit status when the spreadsheet fails validation
+VALIDATION_FAILED_STATUS = 1
+
+
+def parse_column_names(value):
+    """Parse a comma-separated list of columns to validate.
+
+    :raises argparse.ArgumentTypeError: if a column has no validation rules
+    """
+    columns = [col.strip() for col in value.split(',') if col.strip()]
+    validated_columns = get_validated_columns()
+    unknown_columns = [col for col in columns if col not in validated_columns]
+    if unknown_columns:
+        raise argparse.ArgumentTypeError(
+            f'no validation rules for columns: {", ".join(unknown_columns)} '
+            f'(choose from {", ".join(validated_columns)})'
+        )
+    return columns
 
 
 def parse_args(args):
@@ -19,6 +44,86 @@ def parse_args(args):
         'help': 'the path to the PHI-base 4 spreadsheet',
     }
 
+    def add_loading_arguments(subparser):
+        subparser.add_argument(
+            '--chunksize',
+            metavar='N',
+            type=int,
+            default=None,
+            help=(
+                'read the spreadsheet N rows at a time instead of reading '
+                'the whole sheet at once'
+            ),
+        )
+        subparser.add_argument(
+            '--jobs',
+            metavar='N',
+            type=int,
+            default=1,
+            help=(
+                'the number of processes used to parse Excel spreadsheets '
+                'and to clean columns (default: 1)'
+            ),
+        )
+        subparser.add_argument(
+            '--input-format',
+            choices=list(INPUT_READERS),
+            default=None,
+            help=(
+                'the format of the spreadsheet file (default: detect from the '
+                'file extension or contents)'
+            ),
+        )
+        subparser.add_argument(
+            '--cache-dir',
+            metavar='DIR',
+            type=str,
+            default=None,
+            help=(
+                'directory for cached copies of parsed spreadsheets '
+                f'(default: {get_default_cache_dir()})'
+            ),
+        )
+        subparser.add_argument(
+            '--no-cache',
+            action='store_true',
+            help='always parse the spreadsheet, without reading or writing the cache',
+        )
+        subparser.add_argument(
+            '--clear-cache',
+            action='store_true',
+            help='remove all cached spreadsheets before running',
+        )
+        subparser.add_argument(
+            '--validation-report',
+            metavar='FILE',
+            type=str,
+            default=None,
+            help=(
+                'write every validation failure to FILE, as JSON if FILE ends '
+                'in .json, or as CSV otherwise'
+            ),
+        )
+        subparser.add_argument(
+            '--pattern-time-budget',
+            metavar='SECONDS',
+            type=float,
+            default=None,
+            help=(
+                'match validation patterns in linear time with RE2 where '
+                'possible, and limit the time spent matching each value with '
+                'any other pattern to SECONDS'
+            ),
+        )
+        subparser.add_argument(
+            '--incremental',
+            action='store_true',
+            help=(
+                'only clean and validate rows that changed since the last '
+                'incremental run, using the cleaned rows saved in the cache'
+            ),
+        )
+
     parser = argparse.ArgumentParser(
         prog='phi4pipeline',
         description='Apply cleaning to the PHI-base 4 spreadsheet.',
@@ -30,6 +135,7 @@ def parse_args(args):
 
     parser_excel = subparsers.add_parser('excel')
     parser_excel.add_argument('input', **input_args)
+    add_loading_arguments(parser_excel)
     parser_excel.add_argument(
         '-o',
         '--output',
@@ -39,51 +145,178 @@ def parse_args(args):
         help='the output path for the cleaned PHI-base 4 spreadsheet',
     )
 
+    def add_zenodo_arguments(subparser):
+        subparser.add_argument(
+            '--contributors',
+            metavar='PATH',
+            type=str,
+            required=True,
+            help='path to contributors file',
+        )
+        subparser.add_argument(
+            '--doi',
+            metavar='DOI',
+            type=str,
+            required=True,
+            help='DOI for the dataset',
+        )
+        subparser.add_argument(
+            '--fasta',
+            metavar='PATH',
+            type=str,
+            required=True,
+            help='path to FASTA file for the dataset',
+        )
+        subparser.add_argument(
+            '-o',
+            '--out_dir',
+            metavar='DIR',
+            required=True,
+            type=str,
+            help='the output directory for the datapackage files',
+        )
+        subparser.add_argument(
+            '--year',
+            metavar='YEAR',
+            type=int,
+            required=True,
+            help='year of dataset publication',
+        )
+        subparser.add_argument(
+            '--child-tables',
+            action='store_true',
+            help=(
+                'also write the GO annotations and interacting partners as '
+                'long-format CSV files in the output directory, with one row '
+                'for each value'
+            ),
+        )
+
     parser_zenodo = subparsers.add_parser('zenodo')
     parser_zenodo.add_argument('input', **input_args)
+    add_loading_arguments(parser_zenodo)
+    add_zenodo_arguments(parser_zenodo)
     parser_zenodo.add_argument(
-        '--contributors',
-        metavar='PATH',
-        type=str,
-        required=True,
-        help='path to contributors file',
+        '--stream',
+        action='store_true',
+        help=(
+            'load, clean, validate and write the spreadsheet one chunk of rows '
+            'at a time to limit memory use, with chunks of --chunksize rows '
+            '(default: 10000); the cache is not used'
+        ),
     )
-    parser_zenodo.add_argument(
-        '--doi',
-        metavar='DOI',
-        type=str,
+
+    parser_all = subparsers.add_parser('all')
+    parser_all.add_argument('input', **input_args)
+    add_loading_arguments(parser_all)
+    add_zenodo_arguments(parser_all)
+    parser_all.add_argument(
+        '--excel',
+        metavar='FILE',
         required=True,
-        help='DOI for the dataset',
-    )
-    parser_zenodo.add_argument(
-        '--fasta',
-        metavar='PATH',
         type=str,
-        required=True,
-        help='path to FASTA file for the dataset',
+        help='the output path for the cleaned PHI-base 4 spreadsheet',
     )
-    parser_zenodo.add_argument(
-        '-o',
-        '--out_dir',
-        metavar='DIR',
-        required=True,
-        type=str,
-        help='the output directory for the datapackage files',
+    parser_validate = subparsers.add_parser('validate')
+    parser_validate.add_argument('input', **input_args)
+    add_loading_arguments(parser_validate)
+    parser_validate.add_argument(
+        '--columns',
+        metavar='COLUMNS',
+        type=parse_column_names,
+        default=None,
+        help=(
+            'a comma-separated list of the columns to validate, with the '
+            'normalized column names (for example, phi_id,gene_id)'
+        ),
     )
-    parser_zenodo.add_argument(
-        '--year',
-        metavar='YEAR',
+    row_selection = parser_validate.add_mutually_exclusive_group()
+    row_selection.add_argument(
+        '--sample',
+        metavar='N',
         type=int,
-        required=True,
-        help='year of dataset publication',
+        default=None,
+        help='only validate N randomly chosen rows',
     )
-    return parser.parse_args(args)
+    row_selection.add_argument(
+        '--changed-since',
+        metavar='SPREADSHEET',
+        type=str,
+        default=None,
+        help=(
+            'only validate rows that are new or changed since an earlier '
+            'version of the spreadsheet, matched by record ID'
+        ),
+    )
+
+    parsed_args = parser.parse_args(args)
+    if parsed_args.target == 'validate' and parsed_args.incremental:
+        parser.error('--incremental cannot be used with validate')
+    if getattr(parsed_args, 'sample', None) is not None and parsed_args.sample < 1:
+        parser.error('--sample must be a positive integer')
+    if parsed_args.incremental and parsed_args.no_cache:
+        parser.error('--incremental cannot be used with --no-cache')
+    if parsed_args.incremental and getattr(parsed_args, 'stream', False):
+        parser.error('--incremental cannot be used with --stream')
+    if getattr(parsed_args, 'child_tables', False) and getattr(
+        parsed_args, 'stream', False
+    ):
+        parser.error('--child-tables cannot be used with --stream')
+    return parsed_args
+
+
+def get_cache_dir(args):
+    """Get the cache directory from the parsed arguments, clearing it if needed.
+
+    :returns: the cache directory, or None if caching is disabled
+    :rtype: pathlib.Path or str or None
+    """
+    cache_dir = args.cache_dir or get_default_cache_dir()
+    if args.clear_cache:
+        clear_cache(cache_dir)
+    return None if args.no_cache else cache_dir
+
+
+def get_load_kwargs(args):
+    """Get the keyword arguments for loading the spreadsheet.
+
+    :returns: keyword arguments for phi4pipeline.release.load_clean_phibase
+    :rtype: dict
+    """
+    return {
+        'chunksize': args.chunksize,
+        'jobs': args.jobs,
+        'cache_dir': get_cache_dir(args),
+        'input_format': args.input_format,
+        'incremental': args.incremental,
+        'report_path': args.validation_report,
+        'pattern_time_budget': args.pattern_time_budget,
+    }
 
 
 def run(args):
+    """Run the pipeline with command line arguments.
+
+    :returns: the exit status, which is non-zero if validation failed
+    :rtype: int
+    """
     args = parse_args(args)
+    load_kwargs = get_load_kwargs(args)
+    try:
+        run_target(args, load_kwargs)
+    except ValidationError as error:
+        # Validation errors list every invalid value, so a traceback would
+        # only hide them.
+        sys.stderr.write(f'{error}\n')
+        return VALIDATION_FAILED_STATUS
+    return 0
+
+
+def run_target(args, load_kwargs):
+    if getattr(args, 'child_tables', False):
+        load_kwargs = {**load_kwargs, 'child_tables_dir': args.out_dir}
     if args.target == 'excel':
-        phi_df = prepare_spreadsheet_for_excel(args.input)
+        phi_df = prepare_spreadsheet_for_excel(args.input, **load_kwargs)
         phi_df.to_excel(args.output, index=False)
     elif args.target == 'zenodo':
         make_files_for_zenodo(
@@ -92,7 +325,27 @@ def run(args):
             doi=args.doi,
             year=args.year,
             fasta_path=args.fasta,
-            contributors_path=args.contributors)
+            contributors_path=args.contributors,
+            stream=args.stream,
+            **load_kwargs)
+    elif args.target == 'validate':
+        validate_spreadsheet(
+            args.input,
+            columns=args.columns,
+            sample=args.sample,
+            changed_since=args.changed_since,
+            **load_kwargs,
+        )
+    elif args.target == 'all':
+        make_release_files(
+            spreadsheet_path=args.input,
+            excel_path=args.excel,
+            out_dir=args.out_dir,
+            doi=args.doi,
+            year=args.year,
+            fasta_path=args.fasta,
+            contributors_path=args.contributors,
+            **load_kwargs)
     else:
         # argparse should prevent this from being reached
         raise ValueError(f'unsupported target type: {args.target}')
@@ -3,26 +3,30 @@
 # SPDX-License-Identifier: MIT
 
 import hashlib
-import importlib.resources
 import json
 import os
 import re
 import textwrap
 from datetime import datetime
 from os import PathLike
-from string import Template
 
 import markdown
 import pandas as pd
 
-DATA_DIR = importlib.resources.files('phi4pipeline') / 'metadata'
+from phi4pipeline.resources import (
+    load_datapackage_template,
+    load_description_template,
+    load_readme_template,
+    load_schema,
+)
+
+# Files are hashed and copied in chunks of this many bytes, so that memory
+# use does not depend on the size of the file.
+FILE_CHUNK_SIZE = 1024 * 1024
 
 
 def load_formatted_datapackage(format_args: dict[str, str], contributors: dict) -> dict:
-    template_path = DATA_DIR / 'datapackage_template.json'
-    with open(template_path, encoding='utf-8') as file:
-        template_str = file.read()
-    template = Template(template_str)
+    template = load_datapackage_template()
     datapackage = json.loads(template.substitute(**format_args))
     for resource in datapackage['resources']:
         resource['bytes'] = int(resource['bytes'])
@@ -179,10 +183,58 @@ def format_datapackage_readme(
     return formatted_readme_str
 
 
+def iter_file_chunks(file):
+    """Iterate over the contents of a binary file in chunks.
+
+    The same buffer is reused for every chunk, so each chunk must be used
+    before the next one is read.
+    """
+    buffer = bytearray(FILE_CHUNK_SIZE)
+    view = memoryview(buffer)
+    while size := file.readinto(buffer):
+        yield view[:size]
+
+
 def get_file_sha1_hash(path: PathLike) -> str:
+    file_hash = hashlib.sha1()
     with open(path, 'rb') as file:
-        file_hash = hashlib.sha1(file.read()).hexdigest()
-    return file_hash
+        for chunk in iter_file_chunks(file):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
+
+
+def copy_file_with_stats(
+    source_path: PathLike,
+    target_path: PathLike,
+    count_records: bool = False,
+) -> dict[str, str | int]:
+    """Copy a file, getting its SHA-1 hash and size in the same pass.
+
+    :param source_path: the path to the file to copy
+    :param target_path: the path to copy the file to
+    :param count_records: whether to count the records in the file, which
+    must be in FASTA format
+    :returns: the SHA-1 hash and size in bytes of the file, and the number
+    of records if count_records is True
+    """
+    file_hash = hashlib.sha1()
+    n_bytes = 0
+    n_records = 0
+    # Records start with '>' at the start of a line.
+    last_byte = ord('\n')
+    with open(source_path, 'rb') as source, open(target_path, 'wb') as target:
+        for chunk in iter_file_chunks(source):
+            file_hash.update(chunk)
+            target.write(chunk)
+            n_bytes += len(chunk)
+            if count_records:
+                n_records += chunk.obj.count(b'\n>', 0, len(chunk))
+                n_records += last_byte == ord('\n') and chunk[0] == ord('>')
+                last_byte = chunk[-1]
+    stats = {'sha1': file_hash.hexdigest(), 'bytes': n_bytes}
+    if count_records:
+        stats['records'] = n_records
+    return stats
 
 
 def make_datapackage_json(
@@ -192,13 +244,19 @@ def make_datapackage_json(
     version: str,
     doi: str,
     contributors: dict,
+    fasta_stats: dict[str, str | int] | None = None,
 ) -> dict:
-    phibase_hash, fasta_hash = (
-        get_file_sha1_hash(path) for path in (csv_path, fasta_path)
-    )
-    phibase_bytes, fasta_bytes = (
-        os.path.getsize(path) for path in (csv_path, fasta_path)
-    )
+    # The FASTA file is large, so avoid reading it again if it was hashed
+    # while being copied (see copy_file_with_stats).
+    if fasta_stats is None:
+        fasta_stats = {
+            'sha1': get_file_sha1_hash(fasta_path),
+            'bytes': os.path.getsize(fasta_path),
+        }
+    phibase_hash = get_file_sha1_hash(csv_path)
+    phibase_bytes = os.path.getsize(csv_path)
+    fasta_hash = fasta_stats['sha1']
+    fasta_bytes = fasta_stats['bytes']
     format_args = {
         'version': version,
         'doi': f'https://doi.org/{doi}',
@@ -210,6 +268,16 @@ def make_datapackage_json(
     return load_formatted_datapackage(format_args, contributors)
 
 
+# Columns with the unique values counted by each statistic
+DATA_STATS_COLUMNS = {
+    'n_pubs': ('pmid',),
+    'n_interactions': ('pathogen_species', 'host_species'),
+    'n_pathogen_genes': ('gene',),
+    'n_pathogens': ('pathogen_species',),
+    'n_hosts': ('host_species',),
+}
+
+
 def get_data_stats(phi_df: pd.DataFrame) -> dict[str, int]:
     return {
         'n_pubs': phi_df.pmid.nunique(),
@@ -225,6 +293,46 @@ def get_data_stats(phi_df: pd.DataFrame) -> dict[str, int]:
     }
 
 
+def collect_data_stats(
+    phi_df: pd.DataFrame, unique_values: dict[str, set] | None = None
+) -> dict[str, set]:
+    """Collect the unique values counted by get_data_stats from a chunk of
+    rows of the PHI-base DataFrame.
+
+    Values from earlier chunks are passed in unique_values, which is
+    updated in place. Pass the result to count_data_stats to get the same
+    statistics as get_data_stats for all of the chunks.
+    """
+    if unique_values is None:
+        unique_values = {name: set() for name in DATA_STATS_COLUMNS}
+    for name, columns in DATA_STATS_COLUMNS.items():
+        rows = phi_df[list(columns)].dropna()
+        unique_values[name].update(rows.itertuples(index=False, name=None))
+    return unique_values
+
+
+def count_data_stats(unique_values: dict[str, set]) -> dict[str, int]:
+    return {name: len(values) for name, values in unique_values.items()}
+
+
+def get_csv_data_stats(
+    csv_path: PathLike, chunksize: int = 100_000
+) -> dict[str, int]:
+    """Get the statistics from get_data_stats for the PHI-base CSV file.
+
+    The file is read in chunks of rows, and only the columns needed for the
+    statistics are read, as strings.
+    """
+    columns = sorted({col for names in DATA_STATS_COLUMNS.values() for col in names})
+    unique_values = {name: set() for name in DATA_STATS_COLUMNS}
+    with pd.read_csv(
+        csv_path, usecols=columns, dtype=str, chunksize=chunksize
+    ) as reader:
+        for chunk_df in reader:
+            collect_data_stats(chunk_df, unique_values)
+    return count_data_stats(unique_values)
+
+
 def make_datapackage_readme(
     csv_path: PathLike,
     version: str,
@@ -233,12 +341,10 @@ def make_datapackage_readme(
     doi: str,
     contributors_data: list[dict[str, str]],
 ) -> str:
-    with open(DATA_DIR / 'readme_template.md', encoding='utf-8') as file:
-        readme_str = file.read()
-    with open(DATA_DIR / 'phi-base_schema.json', encoding='utf-8') as file:
-        data_dict = json.load(file)
+    readme_str = load_readme_template()
+    data_dict = load_schema()
 
-    data_stats = get_data_stats(pd.read_csv(csv_path, low_memory=False))
+    data_stats = get_csv_data_stats(csv_path)
     format_args = {
         'version': version,
         'semver': semver,
@@ -287,9 +393,7 @@ def convert_readme_to_html(readme_str):
 
 
 def format_zenodo_description(version, data_stats):
-    template_path = DATA_DIR / 'description_template.md'
-    with open(template_path, encoding='utf-8') as file:
-        description = file.read()
+    description = load_description_template()
     # Separate thousands with commas
     formatted_numbers = {k: f'{v:,}' for k, v in data_stats.items()}
     formatted_text = description.format(version=version, **formatted_numbers)
@@ -2,31 +2,52 @@
 #
 # SPDX-License-Identifier: MIT
 
+import collections
+import csv
+import io
+import itertools
 import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
 
+import openpyxl
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pandas.io.parsers import TextParser
 
+try:
+    # Private: only used with the versions in PARALLEL_OPENPYXL_VERSIONS
+    from openpyxl.worksheet._reader import WorkSheetParser
+except ImportError:
+    WorkSheetParser = None
 
-def get_column_header_mapping(phi_df):
-    """Map from the normalized column names to the original column names.
+from phi4pipeline.resources import load_schema
 
-    The MultiIndex header rows need to be restored after processing in order
-    to export to a spreadsheet in the correct format.
+# Versions of openpyxl whose private worksheet parser and workbook
+# attributes are known to work with iter_sheet_rows_parallel
+PARALLEL_OPENPYXL_VERSIONS = ('3.1.',)
 
-    :param phi_df: the PHI-base DataFrame
-    :type phi_df: pandas.DataFrame
-    :return: a mapping between normalized column names and original names
-    :rtype: dict
-    """
-    renames = get_normalized_column_names()
-    columns = phi_df.rename(columns=lambda x: x.strip()).columns
-    level_0 = columns.get_level_values(0)
-    level_1 = columns.get_level_values(1)
-    index = level_1.isin(renames)
-    label_zip = zip(renames.values(), level_0[index], level_1[index])
-    return {
-        norm_name: (header_0, header_1) for norm_name, header_0, header_1 in label_zip
-    }
+# Workbook data needed to parse worksheet XML, set in each worker process
+# by init_sheet_worker.
+_SHEET_WORKER_CONTEXT = {}
+
+# Worksheet XML is read in blocks of this many bytes, and split into
+# fragments of at least this many bytes to parse in parallel: see
+# split_sheet_xml
+SHEET_XML_BLOCK_SIZE = 1 << 20
+SHEET_FRAGMENT_SIZE = 1 << 22
+
+# Columns with few distinct values, in addition to those with an enum
+# constraint in the PHI-base schema.
+CATEGORY_COLUMNS = (
+    'protein_id_source',
+    'gene_id_source',
+    'database',
+    'reference_source',
+    'curator_organization',
+)
 
 
 def get_normalized_column_names(mode='excel'):
@@ -188,6 +209,25 @@ def get_normalized_column_names(mode='excel'):
         }
 
 
+def get_header_mode(columns):
+    """Detect whether column names come from the Excel or CSV spreadsheet.
+
+    Column names from the Excel spreadsheet have two header rows, but may
+    have been reduced to the second header row.
+
+    :param columns: the column names
+    :type columns: pandas.Index
+    :returns: the mode for get_normalized_column_names: 'excel' or 'csv'
+    :rtype: str
+    """
+    if columns.nlevels > 1:
+        return 'excel'
+    names = {str(name).strip() for name in columns}
+    if 'Record ID' in names and 'RecordID' not in names:
+        return 'csv'
+    return 'excel'
+
+
 def normalize_column_names(phi_df):
     """Convert column names to snake case, removing multiple header rows.
 
@@ -196,8 +236,7 @@ def normalize_column_names(phi_df):
     :return: the PHI-base DataFrame with columns renamed
     :rtype: pandas.DataFrame
     """
-    # TODO: Replace this hack with a check at the start of the pipeline
-    mode = 'csv' if phi_df.columns[0] == 'Record ID' else 'excel'
+    mode = get_header_mode(phi_df.columns)
     renames = get_normalized_column_names(mode)
     if phi_df.columns.nlevels > 1:
         phi_df.columns = phi_df.columns.get_level_values(1).str.strip()
@@ -206,6 +245,139 @@ def normalize_column_names(phi_df):
     return phi_df
 
 
+def get_dtype_plan():
+    """Get the data type for each PHI-base column.
+
+    Data types are derived from the field types in the PHI-base schema:
+    integer and year fields use the nullable Int64 type, fields with few
+    distinct values use the category type, and other string fields use
+    pyarrow-backed strings. Date fields are not included, since they are
+    converted during cleaning.
+
+    :returns: a mapping between normalized column names and data types
+    :rtype: dict
+    """
+    schema = load_schema()
+    schema_types = {
+        'integer': 'Int64',
+        'year': 'Int64',
+        'string': 'string[pyarrow]',
+    }
+    dtype_plan = {}
+    for field in schema['fields']:
+        dtype = schema_types.get(field['type'])
+        if dtype is None:
+            continue
+        if dtype == 'string[pyarrow]' and (
+            'enum' in field or field['name'] in CATEGORY_COLUMNS
+        ):
+            dtype = 'category'
+        dtype_plan[field['name']] = dtype
+    for column in CATEGORY_COLUMNS:
+        dtype_plan.setdefault(column, 'category')
+    return dtype_plan
+
+
+def convert_column_dtype(column, dtype):
+    """Convert a column to a data type, if it can be converted without loss.
+
+    Integer columns are only converted if every value is a whole number,
+    and string or category columns are only converted if every value is a
+    string. Otherwise the column is returned unchanged, and is left for
+    the cleaning functions to fix.
+
+    :param column: the column to convert
+    :type column: pandas.Series
+    :param dtype: the data type
+    :type dtype: str
+    :returns: the converted column
+    :rtype: pandas.Series
+    """
+    if column.dtype == dtype:
+        return column
+    if dtype == 'Int64':
+        try:
+            numeric = pd.to_numeric(column)
+        except (ValueError, TypeError):
+            return column
+        if not pd.api.types.is_numeric_dtype(numeric):
+            return column
+        values = numeric.dropna()
+        if not (values % 1 == 0).all():
+            return column
+        return numeric.astype(dtype)
+    if pd.api.types.infer_dtype(column, skipna=True) not in ('string', 'empty'):
+        return column
+    if column.isna().all():
+        # Converting empty columns saves no memory.
+        return column
+    return column.astype(dtype)
+
+
+def get_planned_dtypes(names):
+    """Get the planned data type of each column from its name.
+
+    :param names: the column names, which may be normalized, or the names
+    from the last header row of the spreadsheet
+    :type names: list[str]
+    :returns: the data type of each column from get_dtype_plan, or None if
+    a column has no planned type
+    :rtype: list[str or None]
+    """
+    dtype_plan = get_dtype_plan()
+    renames = {
+        **get_normalized_column_names('csv'),
+        **get_normalized_column_names('excel'),
+    }
+    names = [name.strip() for name in names]
+    return [dtype_plan.get(renames.get(name, name)) for name in names]
+
+
+def get_text_column_dtypes(names, dtype):
+    """Get the dtype argument for a pandas parser that reads columns with a
+    planned text type as the given type, instead of inferring their types.
+
+    :param names: the column names, as for get_planned_dtypes
+    :type names: list[str]
+    :param dtype: the type to read text columns as
+    :type dtype: type
+    :returns: a mapping between column positions and dtype
+    :rtype: dict[int, type]
+    """
+    text_dtypes = ('string[pyarrow]', 'category')
+    planned_dtypes = get_planned_dtypes(names)
+    return {
+        i: dtype for i, planned in enumerate(planned_dtypes) if planned in text_dtypes
+    }
+
+
+def apply_dtype_plan(phi_df, categories=True):
+    """Convert the columns of the PHI-base DataFrame to their planned types.
+
+    The DataFrame may have normalized column names, or the original column
+    names from the spreadsheet (with one or two header rows).
+
+    :param phi_df: the PHI-base DataFrame
+    :type phi_df: pandas.DataFrame
+    :param categories: whether to convert columns to the category type; if
+    False, these columns are converted to strings instead. Regular
+    expression replacements are not applied to categorical columns, so
+    columns must be strings until cleaning is complete.
+    :type categories: bool
+    :returns: the PHI-base DataFrame with converted columns
+    :rtype: pandas.DataFrame
+    """
+    has_two_headers = phi_df.columns.nlevels > 1
+    names = [column[1] if has_two_headers else column for column in phi_df.columns]
+    for column, dtype in zip(phi_df.columns, get_planned_dtypes(names)):
+        if dtype is None:
+            continue
+        if dtype == 'category' and not categories:
+            dtype = 'string[pyarrow]'
+        phi_df[column] = convert_column_dtype(phi_df[column], dtype)
+    return phi_df
+
+
 def get_version_from_filename(path):
     match = re.search(r'(\d[-.]\d\d)', path)
     if match is None:
@@ -213,26 +385,748 @@ def get_version_from_filename(path):
     return match.group(1)
 
 
-def load_excel(path):
-    """Load the PHI-base Excel spreadsheet from a given path.
+def get_sheet_name(path):
+    """Get the name of the sheet containing the PHI-base dataset.
+
+    :param path: the path to the Excel spreadsheet
+    :type path: str
+    :returns: the sheet name
+    :rtype: str
+    """
+    phibase_version = get_version_from_filename(str(path))
+    return f'{phibase_version} phibase_all'
+
+
+def convert_excel_cell(value):
+    """Convert a cell value in the same way as pandas.read_excel.
+
+    Empty cells become empty strings (parsed later as missing values) and
+    whole-number floats become integers.
+    """
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def fill_header_row(row, control_row):
+    """Forward fill blank cells in a header row, as pandas.read_excel does.
+
+    Blank cells are only filled from a cell in the same parent header, so
+    that filling does not propagate across merged cells in the row above.
+    """
+    row = list(row)
+    last = row[0]
+    for i in range(1, len(row)):
+        if not control_row[i]:
+            last = row[i]
+        if row[i] == '':
+            row[i] = last
+        else:
+            control_row[i] = False
+            last = row[i]
+    return row, control_row
+
+
+def fill_header_rows(header):
+    """Pad header rows to the same width and forward fill blank cells."""
+    width = max(len(row) for row in header)
+    control_row = [True] * width
+    filled = []
+    for row in header:
+        row, control_row = fill_header_row(row + [''] * (width - len(row)), control_row)
+        filled.append(row)
+    return filled
+
+
+def trim_row(row):
+    """Remove empty cells from the end of a row of converted cell values."""
+    end = len(row)
+    while end and row[end - 1] == '':
+        end -= 1
+    return row[:end]
+
+
+def iter_sheet_rows(path, sheet_name):
+    """Iterate over the rows of a sheet as lists of converted cell values.
+
+    Like pandas.read_excel, the dimensions stored in the sheet are ignored,
+    and empty cells are trimmed from the end of each row.
+    """
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        worksheet = workbook[sheet_name]
+        worksheet.reset_dimensions()
+        for row in worksheet.iter_rows(values_only=True):
+            yield trim_row([convert_excel_cell(value) for value in row])
+    finally:
+        workbook.close()
+
+
+def find_numbered_row(xml, row_pattern, start, end):
+    """Find the first row element with a row number in part of worksheet XML.
+
+    :returns: the offset of the row element, or None if there is none
+    :rtype: int or None
+    """
+    for row in row_pattern.finditer(xml, start, end):
+        if re.search(rb'\sr=', row.group(1)):
+            return row.start()
+    return None
+
+
+def split_sheet_xml(source, fragment_size):
+    """Split worksheet XML into fragments of rows, reading it from a file.
+
+    Each fragment has the XML before the first row, a range of rows and
+    the closing tags of the sheet data, so the fragments can be parsed
+    separately. Rows are numbered by counting unless they have a row
+    number, so every fragment after the first starts with a numbered row.
+    The XML is read as the fragments are iterated over, so only about one
+    fragment is held in memory at a time.
+
+    :param source: the worksheet XML file, opened in binary mode
+    :type source: typing.BinaryIO
+    :param fragment_size: the number of bytes of rows after which a
+    fragment ends at the next numbered row
+    :type fragment_size: int
+    :returns: an iterator of fragments, or None if there is no sheet data
+    with rows
+    :rtype: Iterator[bytes] or None
+    """
+    buffer = b''
+    sheet_data = None
+    while sheet_data is None:
+        block = source.read(SHEET_XML_BLOCK_SIZE)
+        if not block:
+            return None
+        buffer += block
+        sheet_data = re.search(rb'<(?:(\w+):)?sheetData>', buffer)
+    root = re.search(rb'<((?:\w+:)?worksheet)\b', buffer)
+    if root is None:
+        return None
+    prefix = sheet_data.group(1) + b':' if sheet_data.group(1) else b''
+    row_pattern = re.compile(b'<' + re.escape(prefix) + rb'row\b([^>]*)>')
+    end_tag = b'</' + prefix + b'sheetData>'
+    head = buffer[:sheet_data.end()]
+    tail = end_tag + b'</' + root.group(1) + b'>'
+
+    def iter_fragments(rows):
+        # Offset in rows from which to search for the end of the fragment
+        search_start = fragment_size
+        while True:
+            end = rows.find(end_tag)
+            limit = len(rows) if end == -1 else end
+            cut = find_numbered_row(rows, row_pattern, search_start, limit)
+            if cut is not None:
+                yield head + rows[:cut] + tail
+                rows = rows[cut:]
+                search_start = fragment_size
+                continue
+            if end != -1:
+                if row_pattern.search(rows, 0, end):
+                    yield head + rows[:end] + tail
+                return
+            block = source.read(SHEET_XML_BLOCK_SIZE)
+            if not block:
+                # Let the parser report the unclosed sheet data
+                yield head + rows
+                return
+            # A row element may be split between blocks
+            search_start = max(fragment_size, len(rows) - SHEET_XML_BLOCK_SIZE)
+            rows += block
+
+    return iter_fragments(buffer[sheet_data.end():])
+
+
+def can_parse_sheets_in_parallel():
+    """Check whether the installed openpyxl can parse sheets in parallel.
+
+    Parsing sheets in parallel uses private parts of openpyxl, so it is only
+    used with the versions in PARALLEL_OPENPYXL_VERSIONS.
+
+    :rtype: bool
+    """
+    return WorkSheetParser is not None and openpyxl.__version__.startswith(
+        PARALLEL_OPENPYXL_VERSIONS
+    )
+
+
+def init_sheet_worker(path, sheet_name):
+    """Load the shared strings and date formats of a workbook in a worker."""
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    _SHEET_WORKER_CONTEXT.update(
+        shared_strings=workbook[sheet_name]._shared_strings,
+        epoch=workbook.epoch,
+        date_formats=workbook._date_formats,
+        timedelta_formats=workbook._timedelta_formats,
+    )
+    workbook.close()
+
+
+def parse_sheet_rows(xml):
+    """Parse worksheet XML into row numbers and converted cell values.
+
+    This runs in a worker process started with init_sheet_worker.
+
+    :param xml: the worksheet XML
+    :type xml: bytes
+    :returns: a list of row numbers and rows
+    :rtype: list[tuple[int, list]]
+    """
+    parser = WorkSheetParser(io.BytesIO(xml), data_only=True, **_SHEET_WORKER_CONTEXT)
+    rows = []
+    for row_number, cells in parser.parse():
+        values = [None] * (cells[-1]['column'] if cells else 0)
+        for cell in cells:
+            values[cell['column'] - 1] = cell['value']
+        rows.append((row_number, trim_row([convert_excel_cell(v) for v in values])))
+    return rows
+
+
+def map_ahead(executor, func, items, size):
+    """Like Executor.map, but only submit up to size items ahead of the
+    result being waited for, so that items are read as they are needed.
+
+    :param executor: the executor
+    :type executor: concurrent.futures.Executor
+    :param func: the function to call with each item
+    :type func: Callable
+    :param items: the items
+    :type items: Iterable
+    :param size: the maximum number of items submitted at a time
+    :type size: int
+    :returns: an iterator of the results, in the order of the items
+    :rtype: Iterator
+    """
+    futures = collections.deque()
+    for item in items:
+        futures.append(executor.submit(func, item))
+        if len(futures) >= size:
+            yield futures.popleft().result()
+    while futures:
+        yield futures.popleft().result()
+
+
+def iter_sheet_rows_parallel(path, sheet_name, jobs):
+    """Iterate over the rows of a sheet, parsing its XML in parallel.
+
+    The worksheet XML is split into fragments with split_sheet_xml, which
+    are parsed by a pool of worker processes, and the rows are returned in
+    order. Only a few fragments for each worker are read ahead. This gives
+    the same rows as iter_sheet_rows, which is used instead if the sheet
+    cannot be split or openpyxl is not a supported version (see
+    can_parse_sheets_in_parallel).
 
     :param path: the path to the Excel spreadsheet
     :type path: str
-    :param sheet_name: the name of the sheet to be loaded
+    :param sheet_name: the name of the sheet
     :type sheet_name: str
+    :param jobs: the number of worker processes
+    :type jobs: int
+    :returns: an iterator of rows of converted cell values
+    :rtype: Iterator[list]
+    """
+    if not can_parse_sheets_in_parallel():
+        yield from iter_sheet_rows(path, sheet_name)
+        return
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        with workbook[sheet_name]._get_source() as source:
+            fragments = split_sheet_xml(source, SHEET_FRAGMENT_SIZE)
+            if fragments is None:
+                yield from iter_sheet_rows(path, sheet_name)
+                return
+            with ProcessPoolExecutor(
+                max_workers=jobs,
+                initializer=init_sheet_worker,
+                initargs=(path, sheet_name),
+            ) as executor:
+                next_row_number = 1
+                results = map_ahead(executor, parse_sheet_rows, fragments, jobs * 2)
+                for rows in results:
+                    for row_number, row in rows:
+                        if row_number < next_row_number:
+                            # openpyxl skips rows that are out of order
+                            continue
+                        for _ in range(next_row_number, row_number):
+                            yield []
+                        yield row
+                        next_row_number = row_number + 1
+    finally:
+        workbook.close()
+
+
+def iter_excel_chunks(path, chunksize=10_000, jobs=1, infer_text_types=True):
+    """Iterate over the PHI-base Excel spreadsheet in chunks of rows.
+
+    The sheet is read with a read-only, row-iterating workbook, so only one
+    chunk of rows is held in memory at a time. Each chunk has the same
+    two-level column header as the DataFrame returned by load_excel, and
+    the row index continues across chunks.
+
+    Cell values are converted with the same rules as pandas.read_excel,
+    but column types are inferred separately for each chunk, like
+    pandas.read_csv with a chunksize. Columns with a planned text type
+    can be kept as cell values instead, so that a chunk where a text
+    column only contains numbers does not convert them to floats.
+
+    :param path: the path to the Excel spreadsheet
+    :type path: str
+    :param chunksize: the maximum number of rows in each chunk
+    :type chunksize: int
+    :param jobs: the number of processes used to parse the sheet; if more
+    than one, see iter_sheet_rows_parallel
+    :type jobs: int
+    :param infer_text_types: whether to infer the types of columns with a
+    planned text type (see get_dtype_plan); if False, these columns have
+    the object type in every chunk
+    :type infer_text_types: bool
+    :raises ValueError: if a row has more cells than the header
+    :returns: an iterator of DataFrame chunks
+    :rtype: Iterator[pandas.DataFrame]
+    """
+    if chunksize < 1:
+        raise ValueError(f'chunksize must be a positive integer: {chunksize}')
+    if jobs < 1:
+        raise ValueError(f'jobs must be a positive integer: {jobs}')
+    sheet_name = get_sheet_name(path)
+    if jobs > 1:
+        rows = iter_sheet_rows_parallel(path, sheet_name, jobs)
+    else:
+        rows = iter_sheet_rows(path, sheet_name)
+    try:
+        header = list(itertools.islice(rows, 2))
+        if len(header) < 2:
+            raise ValueError(f'sheet {sheet_name} has fewer than two header rows')
+        header = fill_header_rows(header)
+        width = len(header[0])
+        dtype = None if infer_text_types else get_text_column_dtypes(header[1], object)
+
+        start = 0
+        chunk = []
+        empty_rows = []
+        for row_number, row in enumerate(rows, start=len(header) + 1):
+            if not row:
+                # Empty rows are only kept if followed by a non-empty row,
+                # since pandas.read_excel trims trailing empty rows.
+                empty_rows.append(row)
+                continue
+            if len(row) > width:
+                raise ValueError(
+                    f'row {row_number} of sheet {sheet_name} has more cells '
+                    'than the header'
+                )
+            for pending in itertools.chain(empty_rows, [row]):
+                chunk.append(pending + [''] * (width - len(pending)))
+                if len(chunk) == chunksize:
+                    yield parse_excel_chunk(header, chunk, start, dtype)
+                    start += len(chunk)
+                    chunk = []
+            empty_rows = []
+        if chunk or start == 0:
+            yield parse_excel_chunk(header, chunk, start, dtype)
+    finally:
+        rows.close()
+
+
+def parse_excel_chunk(header, rows, start, dtype=None):
+    """Convert rows of cell values into a DataFrame with a two-level header.
+
+    :param header: the two header rows of the sheet
+    :type header: list[list]
+    :param rows: the data rows of the chunk
+    :type rows: list[list]
+    :param start: the row index of the first row of the chunk
+    :type start: int
+    :param dtype: the types of columns that are not inferred, by position
+    :type dtype: dict[int, type] or None
+    :returns: the chunk as a pandas DataFrame
+    :rtype: pandas.DataFrame
+    """
+    parser = TextParser(
+        header + rows, header=[0, 1], skip_blank_lines=False, dtype=dtype
+    )
+    chunk_df = parser.read()
+    parser.close()
+    chunk_df.index = pd.RangeIndex(start, start + len(chunk_df))
+    return chunk_df
+
+
+def infer_text_column_types(phi_df):
+    """Infer the types of columns with a planned text type from their values.
+
+    The values of each column are converted as pandas.read_excel converts
+    the values of a whole sheet, so that numbers in a text column are only
+    converted to floats if the column has no other values.
+
+    :param phi_df: the PHI-base DataFrame, with the original column names
+    and text columns read as cell values
+    :type phi_df: pandas.DataFrame
+    :returns: the PHI-base DataFrame with inferred column types
+    :rtype: pandas.DataFrame
+    """
+    if phi_df.empty:
+        return phi_df
+    names = phi_df.columns.get_level_values(-1)
+    for i in get_text_column_dtypes(names, object):
+        parser = TextParser(
+            [[value] for value in phi_df.iloc[:, i]],
+            header=None,
+            skip_blank_lines=False,
+        )
+        column = parser.read()[0]
+        parser.close()
+        phi_df.isetitem(i, column.set_axis(phi_df.index))
+    return phi_df
+
+
+def load_excel(path, chunksize=None, jobs=1):
+    """Load the PHI-base Excel spreadsheet from a given path.
+
+    If chunksize is given, the sheet is read in chunks of rows with
+    iter_excel_chunks, which avoids building the whole workbook in memory.
+    The chunks are then joined, so the DataFrame still holds every row:
+    use iter_spreadsheet_chunks to limit memory use to one chunk.
+
+    If jobs is more than one, the sheet is parsed by that many processes.
+    The DataFrame is the same as the one loaded with a single process.
+
+    :param path: the path to the Excel spreadsheet
+    :type path: str
+    :param chunksize: the number of rows to read at a time, or None to read
+    the whole sheet at once
+    :type chunksize: int or None
+    :param jobs: the number of processes used to parse the sheet
+    :type jobs: int
     :returns: the sheet as a pandas DataFrame
     :rtype: pandas.DataFrame
     """
-    phibase_version = get_version_from_filename(path)
-    sheet_name = f'{phibase_version} phibase_all'
+    if chunksize is not None or jobs > 1:
+        # Types inferred from a chunk may differ from those inferred from
+        # the whole sheet, so text columns are inferred after joining.
+        chunksize = chunksize or sys.maxsize
+        chunks = iter_excel_chunks(
+            path, chunksize, jobs=jobs, infer_text_types=False
+        )
+        return infer_text_column_types(pd.concat(chunks))
+    sheet_name = get_sheet_name(path)
     return pd.read_excel(path, sheet_name, header=[0, 1])
 
 
+def read_csv_header_rows(path, nrows=2):
+    """Read the first rows of a CSV file without parsing the whole file."""
+    with open(path, newline='', encoding='utf-8-sig') as file:
+        return list(itertools.islice(csv.reader(file), nrows))
+
+
+def get_csv_read_options(path):
+    """Get the options for reading a PHI-base CSV file with pandas.read_csv.
+
+    :param path: the path to the CSV file
+    :type path: str
+    :returns: keyword arguments for pandas.read_csv, and the column header
+    to set on the parsed DataFrame, or None to keep the parsed header
+    :rtype: tuple[dict, pandas.MultiIndex or None]
+    """
+    header_rows = read_csv_header_rows(path)
+    has_excel_header = (
+        len(header_rows) == 2
+        and 'RecordID' in (name.strip() for name in header_rows[1])
+    )
+    if not has_excel_header:
+        return {}, None
+    # The pyarrow engine does not support multiple header rows, so read the
+    # data without a header and add the header afterwards.
+    return {'header': None, 'skiprows': 2}, pd.MultiIndex.from_arrays(header_rows)
+
+
+def iter_csv_chunks(path, chunksize, infer_text_types=True):
+    """Iterate over the PHI-base spreadsheet in a CSV file in chunks of rows.
+
+    Column types are inferred separately for each chunk, and the row index
+    continues across chunks.
+
+    :param path: the path to the CSV file
+    :type path: str
+    :param chunksize: the maximum number of rows in each chunk
+    :type chunksize: int
+    :param infer_text_types: whether to infer the types of columns with a
+    planned text type (see get_dtype_plan); if False, these columns are
+    read as strings in every chunk
+    :type infer_text_types: bool
+    :returns: an iterator of DataFrame chunks
+    :rtype: Iterator[pandas.DataFrame]
+    """
+    read_kwargs, columns = get_csv_read_options(path)
+    if not infer_text_types:
+        if columns is None:
+            names = pd.read_csv(path, nrows=0).columns
+        else:
+            names = columns.get_level_values(-1)
+        read_kwargs['dtype'] = get_text_column_dtypes(names, str)
+    with pd.read_csv(path, chunksize=chunksize, **read_kwargs) as reader:
+        for chunk_df in reader:
+            if columns is not None:
+                chunk_df.columns = columns
+            yield chunk_df
+
+
+def load_csv(path, chunksize=None):
+    """Load the PHI-base spreadsheet from a CSV file.
+
+    The CSV file may have either the two header rows of the Excel
+    spreadsheet, or the single header row used in CSV releases of PHI-base.
+    The file is parsed with the multithreaded pyarrow engine, unless
+    chunksize is given.
+
+    :param path: the path to the CSV file
+    :type path: str
+    :param chunksize: the number of rows to read at a time, or None to read
+    the whole file at once
+    :type chunksize: int or None
+    :returns: the spreadsheet as a pandas DataFrame
+    :rtype: pandas.DataFrame
+    """
+    if chunksize is not None:
+        return pd.concat(iter_csv_chunks(path, chunksize))
+    read_kwargs, columns = get_csv_read_options(path)
+    phi_df = pd.read_csv(path, engine='pyarrow', **read_kwargs)
+    if columns is not None:
+        phi_df.columns = columns
+    return phi_df
+
+
+def iter_parquet_chunks(path, chunksize):
+    """Iterate over the PHI-base spreadsheet in a Parquet file in chunks of
+    rows, with the row index continuing across chunks.
+    """
+    parquet_file = pq.ParquetFile(path)
+    start = 0
+    for batch in parquet_file.iter_batches(batch_size=chunksize):
+        yield batch_to_dataframe(batch, start)
+        start += batch.num_rows
+
+
+def iter_arrow_chunks(path, chunksize):
+    """Iterate over the PHI-base spreadsheet in an Arrow IPC file in chunks
+    of rows, with the row index continuing across chunks.
+    """
+    table = read_arrow_table(path)
+    start = 0
+    for batch in table.to_batches(max_chunksize=chunksize):
+        yield batch_to_dataframe(batch, start)
+        start += batch.num_rows
+
+
+def batch_to_dataframe(batch, start):
+    chunk_df = pa.Table.from_batches([batch]).to_pandas()
+    chunk_df.index = pd.RangeIndex(start, start + len(chunk_df))
+    return chunk_df
+
+
+def load_parquet(path, chunksize=None):
+    """Load the PHI-base spreadsheet from a Parquet file.
+
+    :param path: the path to the Parquet file
+    :type path: str
+    :param chunksize: the number of rows to convert to pandas at a time, or
+    None to convert the whole file at once
+    :type chunksize: int or None
+    :returns: the spreadsheet as a pandas DataFrame
+    :rtype: pandas.DataFrame
+    """
+    if chunksize is not None:
+        return pd.concat(iter_parquet_chunks(path, chunksize))
+    return pq.read_table(path).to_pandas()
+
+
+def load_arrow(path, chunksize=None):
+    """Load the PHI-base spreadsheet from an Arrow IPC (Feather) file.
+
+    Both the Arrow IPC file format and the streaming format are supported.
+    The file is memory-mapped, so chunksize only limits how many rows are
+    converted to pandas at a time.
+
+    :param path: the path to the Arrow file
+    :type path: str
+    :param chunksize: the number of rows to convert to pandas at a time, or
+    None to convert the whole file at once
+    :type chunksize: int or None
+    :returns: the spreadsheet as a pandas DataFrame
+    :rtype: pandas.DataFrame
+    """
+    if chunksize is not None:
+        return pd.concat(iter_arrow_chunks(path, chunksize))
+    return read_arrow_table(path).to_pandas()
+
+
+def read_arrow_table(path):
+    """Read an Arrow IPC file in either the file or the streaming format."""
+    with pa.memory_map(str(path)) as source:
+        try:
+            return pa.ipc.open_file(source).read_all()
+        except pa.ArrowInvalid:
+            source.seek(0)
+            return pa.ipc.open_stream(source).read_all()
+
+
+INPUT_READERS = {
+    'excel': load_excel,
+    'csv': load_csv,
+    'parquet': load_parquet,
+    'arrow': load_arrow,
+}
+
+CHUNK_READERS = {
+    'excel': iter_excel_chunks,
+    'csv': iter_csv_chunks,
+    'parquet': iter_parquet_chunks,
+    'arrow': iter_arrow_chunks,
+}
+
+INPUT_FORMAT_SUFFIXES = {
+    '.xlsx': 'excel',
+    '.xlsm': 'excel',
+    '.csv': 'csv',
+    '.parquet': 'parquet',
+    '.pq': 'parquet',
+    '.arrow': 'arrow',
+    '.feather': 'arrow',
+    '.ipc': 'arrow',
+}
+
+
+def detect_input_format(path):
+    """Detect the format of a PHI-base spreadsheet file.
+
+    The format is detected from the file extension, or from the first bytes
+    of the file if the extension is not recognized. Files that are not
+    recognized as Excel, Parquet or Arrow are assumed to be CSV.
+
+    :param path: the path to the spreadsheet file
+    :type path: str
+    :returns: the name of the format, which is a key of INPUT_READERS
+    :rtype: str
+    """
+    suffix_format = INPUT_FORMAT_SUFFIXES.get(Path(path).suffix.lower())
+    if suffix_format:
+        return suffix_format
+    with open(path, 'rb') as file:
+        magic = file.read(8)
+    if magic.startswith(b'PK\x03\x04'):
+        return 'excel'
+    if magic.startswith(b'PAR1'):
+        return 'parquet'
+    if magic.startswith((b'ARROW1', b'\xff\xff\xff\xff')):
+        return 'arrow'
+    return 'csv'
+
+
+def load_spreadsheet(
+    path,
+    input_format=None,
+    chunksize=None,
+    use_dtype_plan=True,
+    jobs=1,
+):
+    """Load the PHI-base spreadsheet from a file in any supported format.
+
+    Columns are converted to the data types from get_dtype_plan, except
+    that categorical columns are loaded as strings: see apply_dtype_plan.
+
+    :param path: the path to the spreadsheet file
+    :type path: str
+    :param input_format: the format of the file (one of the keys of
+    INPUT_READERS), or None to detect the format
+    :type input_format: str or None
+    :param chunksize: the number of rows to read at a time, or None to read
+    the whole file at once
+    :type chunksize: int or None
+    :param use_dtype_plan: whether to convert columns to the planned types
+    :type use_dtype_plan: bool
+    :param jobs: the number of processes used to parse Excel spreadsheets;
+    the other formats are already read with multiple threads by pyarrow
+    :type jobs: int
+    :raises ValueError: if the format is not supported
+    :returns: the spreadsheet as a pandas DataFrame
+    :rtype: pandas.DataFrame
+    """
+    if input_format is None:
+        input_format = detect_input_format(path)
+    reader = INPUT_READERS.get(input_format)
+    if reader is None:
+        raise ValueError(f'unsupported input format: {input_format}')
+    reader_kwargs = {'chunksize': chunksize}
+    if input_format == 'excel':
+        reader_kwargs['jobs'] = jobs
+    phi_df = reader(path, **reader_kwargs)
+    if use_dtype_plan:
+        phi_df = apply_dtype_plan(phi_df, categories=False)
+    return phi_df
+
+
+def iter_spreadsheet_chunks(
+    path,
+    input_format=None,
+    chunksize=10_000,
+    use_dtype_plan=True,
+    jobs=1,
+):
+    """Iterate over the PHI-base spreadsheet in chunks of rows.
+
+    Only one chunk is held in memory at a time, and the row index
+    continues across chunks. If use_dtype_plan is True, columns with a
+    planned text type are not inferred from the values in each chunk, but
+    the types of other columns may still differ between chunks.
+
+    :param path: the path to the spreadsheet file
+    :type path: str
+    :param input_format: the format of the file (one of the keys of
+    CHUNK_READERS), or None to detect the format
+    :type input_format: str or None
+    :param chunksize: the maximum number of rows in each chunk
+    :type chunksize: int
+    :param use_dtype_plan: whether to convert columns to the planned types,
+    as in load_spreadsheet
+    :type use_dtype_plan: bool
+    :param jobs: the number of processes used to parse Excel spreadsheets
+    :type jobs: int
+    :raises ValueError: if the format is not supported
+    :returns: an iterator of DataFrame chunks
+    :rtype: Iterator[pandas.DataFrame]
+    """
+    if input_format is None:
+        input_format = detect_input_format(path)
+    reader = CHUNK_READERS.get(input_format)
+    if reader is None:
+        raise ValueError(f'unsupported input format: {input_format}')
+    if chunksize < 1:
+        raise ValueError(f'chunksize must be a positive integer: {chunksize}')
+    reader_kwargs = {}
+    if input_format == 'excel':
+        reader_kwargs['jobs'] = jobs
+    if input_format in ('excel', 'csv') and use_dtype_plan:
+        # Types inferred from a chunk may differ from those inferred from
+        # the whole sheet: a text column with only numbers in a chunk would
+        # be read as floats, for example.
+        reader_kwargs['infer_text_types'] = False
+    for chunk_df in reader(path, chunksize, **reader_kwargs):
+        if use_dtype_plan:
+            chunk_df = apply_dtype_plan(chunk_df, categories=False)
+        yield chunk_df
+
+
 def get_column_header_mapping(phi_df):
     """Map from the normalized column names to the original column names.
 
     The MultiIndex header rows need to be restored after processing in order
-    to export to a spreadsheet in the correct format.
+    to export to a spreadsheet in the correct format. If the DataFrame only
+    has one header row (for example, when loaded from a CSV file), the
+    second header row is taken from the column names of the Excel
+    spreadsheet, and columns missing from the DataFrame use the Excel
+    column name for both header rows.
 
     :param phi_df: the PHI-base DataFrame
     :type phi_df: pandas.DataFrame
@@ -240,6 +1134,16 @@ def get_column_header_mapping(phi_df):
     :rtype: dict
     """
     renames = get_normalized_column_names()
+    if phi_df.columns.nlevels == 1:
+        csv_renames = get_normalized_column_names('csv')
+        excel_names = {v: k for k, v in renames.items()}
+        # Include every Excel column, since cleaning adds columns that may
+        # be missing from the file.
+        mapping = {norm_name: (name, name) for name, norm_name in renames.items()}
+        for column in phi_df.columns.str.strip():
+            norm_name = csv_renames.get(column) or renames.get(column) or column
+            mapping[norm_name] = (column, excel_names.get(norm_name, column))
+        return mapping
     columns = phi_df.rename(columns=lambda x: x.strip()).columns
     level_0 = columns.get_level_values(0)
     level_1 = columns.get_level_values(1)
@@ -250,6 +1154,143 @@ def get_column_header_mapping(phi_df):
     }
 
 
+def find_phibase_sheet_name(sheet_names, version=None):
+    """Find the sheet containing the PHI-base dataset in a list of sheets.
+
+    :param sheet_names: the names of the sheets in the workbook
+    :type sheet_names: list[str]
+    :param version: the expected PHI-base version, or None for any version
+    :type version: str or None
+    :returns: the sheet name, or None if there is no PHI-base sheet
+    :rtype: str or None
+    """
+    for sheet_name in sheet_names:
+        match = re.fullmatch(r'(\d[-.]\d\d) phibase_all', sheet_name)
+        if match and version in (None, match.group(1)):
+            return sheet_name
+    return None
+
+
+def read_excel_header(path, version=None):
+    """Read the sheet names and header rows of an Excel workbook.
+
+    The workbook is opened in read-only mode and only the first two rows
+    of the PHI-base sheet are parsed, so this is fast even for large
+    workbooks.
+
+    :param path: the path to the Excel spreadsheet
+    :type path: str
+    :param version: the expected PHI-base version, or None for any version
+    :type version: str or None
+    :raises ValueError: if there is no PHI-base sheet, or it has fewer than
+    two header rows
+    :returns: the name of the PHI-base sheet and the column names
+    :rtype: tuple[str, pandas.MultiIndex]
+    """
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        sheet_name = find_phibase_sheet_name(workbook.sheetnames, version)
+        if sheet_name is None:
+            raise ValueError(f'no PHI-base sheet found in {path}')
+        worksheet = workbook[sheet_name]
+        # Like pandas.read_excel, ignore the dimensions stored in the sheet.
+        worksheet.reset_dimensions()
+        header = [
+            trim_row([convert_excel_cell(value) for value in row])
+            for row in worksheet.iter_rows(max_row=2, values_only=True)
+        ]
+    finally:
+        workbook.close()
+    if len(header) < 2 or not all(header):
+        raise ValueError(f'sheet {sheet_name} has fewer than two header rows')
+    columns = parse_excel_chunk(fill_header_rows(header), [], 0).columns
+    return sheet_name, columns
+
+
+def read_header(path, input_format):
+    """Read the column names of a CSV, Parquet or Arrow spreadsheet file.
+
+    :param path: the path to the spreadsheet file
+    :type path: str
+    :param input_format: the format of the file
+    :type input_format: str
+    :raises ValueError: if the format is not supported
+    :returns: the column names
+    :rtype: pandas.Index
+    """
+    if input_format == 'csv':
+        header_rows = read_csv_header_rows(path)
+        if len(header_rows) == 2 and 'RecordID' in (
+            name.strip() for name in header_rows[1]
+        ):
+            return pd.MultiIndex.from_arrays(header_rows)
+        return pd.read_csv(path, nrows=0).columns
+    if input_format == 'parquet':
+        schema = pq.read_schema(path)
+    elif input_format == 'arrow':
+        with pa.memory_map(str(path)) as source:
+            try:
+                schema = pa.ipc.open_file(source).schema
+            except pa.ArrowInvalid:
+                source.seek(0)
+                schema = pa.ipc.open_stream(source).schema
+    else:
+        raise ValueError(f'unsupported input format: {input_format}')
+    # An empty table restores the column index from the pandas metadata.
+    return schema.empty_table().to_pandas().columns
+
+
+def probe_spreadsheet(path, input_format=None):
+    """Detect the version and column layout of a PHI-base spreadsheet.
+
+    Only the header of the spreadsheet is read, so this can be used to
+    check a spreadsheet before it is loaded. For Excel spreadsheets, the
+    version is detected from the name of the PHI-base sheet; for other
+    formats, it is taken from the file name, if present.
+
+    :param path: the path to the spreadsheet file
+    :type path: str
+    :param input_format: the format of the file, or None to detect the
+    format
+    :type input_format: str or None
+    :raises ValueError: if the spreadsheet cannot be loaded by the pipeline
+    :returns: the input format, version, sheet name (or None if the file
+    has no sheets), header mode (see get_header_mode), column names, and
+    a mapping between normalized column names and the original header rows
+    :rtype: dict
+    """
+    if input_format is None:
+        input_format = detect_input_format(path)
+    try:
+        file_version = get_version_from_filename(str(path))
+    except ValueError:
+        file_version = None
+    if input_format == 'excel':
+        sheet_name, columns = read_excel_header(path)
+        version = get_version_from_filename(sheet_name)
+        if file_version is not None and file_version != version:
+            raise ValueError(
+                f'file name has version {file_version}, but sheet {sheet_name} '
+                f'has version {version}'
+            )
+    else:
+        sheet_name = None
+        version = file_version
+        columns = read_header(path, input_format)
+    header_mode = get_header_mode(columns)
+    names = columns.get_level_values(-1).str.strip()
+    if not ({'RecordID', 'Record ID'} & set(names)):
+        raise ValueError(f'no Record ID column found in {path}')
+    return {
+        'input_format': input_format,
+        'version': version,
+        'sheet_name': sheet_name,
+        'header_mode': header_mode,
+        'columns': columns,
+        'column_mapping': get_column_header_mapping(pd.DataFrame(columns=columns)),
+    }
+
+
 def load_contributors_file(path):
     df = pd.read_csv(path)
     return df.where(df.notnull(), None).to_dict(orient='records')
@@ -2,32 +2,45 @@
 #
 # SPDX-License-Identifier: MIT
 
-import importlib
 import json
-import shutil
 from pathlib import Path
 
 import pandas as pd
 
-from phi4pipeline.clean import clean_phibase
+from phi4pipeline.cache import load_excel_cached, read_clean_state, write_clean_state
+from phi4pipeline.clean import (
+    clean_phibase,
+    clean_phibase_incremental,
+    find_changed_rows,
+    iter_clean_phibase,
+    make_child_tables,
+)
 from phi4pipeline.frictionless import (
+    DATA_STATS_COLUMNS,
     anonymize_contributors,
+    collect_data_stats,
     convert_readme_to_html,
+    copy_file_with_stats,
+    count_data_stats,
     format_zenodo_description,
-    get_data_stats,
     make_datapackage_json,
     make_datapackage_readme,
 )
 from phi4pipeline.load import (
+    detect_input_format,
     get_column_header_mapping,
     get_version_from_filename,
+    iter_spreadsheet_chunks,
     load_contributors_file,
-    load_excel,
+    load_spreadsheet,
+)
+from phi4pipeline.resources import read_resource_text
+from phi4pipeline.validate import (
+    collect_unique_values,
+    get_validated_columns,
+    iter_validated_chunks,
+    validate_phibase,
 )
-from phi4pipeline.validate import validate_phibase
-
-
-DATA_DIR = importlib.resources.files('phi4pipeline') / 'metadata'
 
 
 def restore_header_rows(column_header_mapping, phi_df):
@@ -46,25 +59,276 @@ def restore_header_rows(column_header_mapping, phi_df):
     return phi_df
 
 
-def load_phibase_spreadsheet(spreadsheet_path, keep_headers=True):
-    phi_df = load_excel(spreadsheet_path)
+def load_raw_phibase(
+    spreadsheet_path, chunksize=None, cache_dir=None, input_format=None, jobs=1
+):
+    """Load the PHI-base spreadsheet, without cleaning it.
+
+    The spreadsheet can be an Excel, CSV, Parquet or Arrow file: see
+    load_spreadsheet. Only Excel spreadsheets are cached, since the other
+    formats are fast to load. The parameters are the same as for
+    load_clean_phibase.
+
+    :returns: the PHI-base DataFrame, with the original column names
+    :rtype: pandas.DataFrame
+    """
+    if input_format is None:
+        input_format = detect_input_format(spreadsheet_path)
+    if cache_dir is None or input_format != 'excel':
+        return load_spreadsheet(
+            spreadsheet_path,
+            input_format=input_format,
+            chunksize=chunksize,
+            jobs=jobs,
+        )
+    return load_excel_cached(spreadsheet_path, cache_dir, chunksize=chunksize, jobs=jobs)
+
+
+def load_clean_phibase(
+    spreadsheet_path,
+    chunksize=None,
+    cache_dir=None,
+    input_format=None,
+    jobs=1,
+    incremental=False,
+    report_path=None,
+    pattern_time_budget=None,
+    child_tables_dir=None,
+):
+    """Load, clean and validate the PHI-base spreadsheet.
+
+    The spreadsheet can be an Excel, CSV, Parquet or Arrow file: see
+    load_spreadsheet. Only Excel spreadsheets are cached, since the other
+    formats are fast to load.
+
+    :param spreadsheet_path: the path to the PHI-base spreadsheet
+    :type spreadsheet_path: str
+    :param chunksize: the number of rows to read from the spreadsheet at a
+    time, or None to read the whole sheet at once
+    :type chunksize: int or None
+    :param cache_dir: the directory for cached spreadsheets, or None to
+    disable caching
+    :type cache_dir: str or None
+    :param input_format: the format of the spreadsheet file, or None to
+    detect the format
+    :type input_format: str or None
+    :param jobs: the number of processes used to parse Excel spreadsheets
+    and to clean columns
+    :type jobs: int
+    :param incremental: whether to only clean and validate rows that have
+    changed since the last incremental run, which is saved in cache_dir
+    :type incremental: bool
+    :param report_path: the path to write the validation report to, or
+    None to not write a report: see
+    phi4pipeline.validate.write_validation_report
+    :type report_path: str or None
+    :param pattern_time_budget: the number of seconds that matching a
+    validation pattern may take for each value, or None for no limit: see
+    phi4pipeline.validate.make_validation_report
+    :type pattern_time_budget: float or None
+    :param child_tables_dir: the directory to write the child tables of
+    multi-valued columns to, or None to not write them: see
+    write_child_tables
+    :type child_tables_dir: str or os.PathLike or None
+    :raises ValueError: if incremental is True and cache_dir is None
+    :raises phi4pipeline.validate.ValidationError: if any value fails validation
+    :return: the cleaned PHI-base DataFrame, and a mapping between
+    normalized column names and the original header rows
+    :rtype: tuple[pandas.DataFrame, dict]
+    """
+    if incremental and cache_dir is None:
+        raise ValueError('incremental cleaning requires a cache directory')
+    phi_df = load_raw_phibase(
+        spreadsheet_path,
+        chunksize=chunksize,
+        cache_dir=cache_dir,
+        input_format=input_format,
+        jobs=jobs,
+    )
     column_mapping = get_column_header_mapping(phi_df)
-    phi_df = clean_phibase(phi_df)
-    validate_phibase(phi_df)
+    if incremental:
+        columns = phi_df.columns
+        previous_state = read_clean_state(cache_dir, spreadsheet_path, columns)
+        phi_df, changed_df, state = clean_phibase_incremental(
+            phi_df, previous_state, jobs=jobs
+        )
+        # Unique values of the changed rows must not repeat those of the
+        # reused rows, which are not validated again.
+        reused_df = phi_df.drop(index=changed_df.index)
+        validate_phibase(
+            changed_df,
+            make_child_tables(changed_df),
+            report_path=report_path,
+            pattern_time_budget=pattern_time_budget,
+            seen_values=collect_unique_values(reused_df),
+        )
+        write_clean_state(cache_dir, spreadsheet_path, columns, state)
+        # Only the changed rows were split for validation
+        child_tables = None
+    else:
+        phi_df = clean_phibase(phi_df, jobs=jobs)
+        child_tables = make_child_tables(phi_df)
+        validate_phibase(
+            phi_df,
+            child_tables,
+            report_path=report_path,
+            pattern_time_budget=pattern_time_budget,
+        )
+    if child_tables_dir is not None:
+        write_child_tables(child_tables or make_child_tables(phi_df), child_tables_dir)
+    return phi_df, column_mapping
+
+
+def write_child_tables(child_tables, out_dir):
+    """Write the child tables of multi-valued columns as CSV files.
+
+    Each table is written to a file named after the table, such as
+    go_annotation.csv, with a record_id column that refers to the rows of
+    the PHI-base CSV file, so the tables can be loaded into a database.
+
+    :param child_tables: the child tables, as returned by
+    phi4pipeline.clean.make_child_tables
+    :type child_tables: dict
+    :param out_dir: the output directory for the CSV files
+    :type out_dir: str or os.PathLike
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for name, (table, _) in child_tables.items():
+        table.to_csv(out_dir / f'{name}.csv', index=False, lineterminator='\r\n')
+
+
+def validate_spreadsheet(
+    spreadsheet_path,
+    columns=None,
+    sample=None,
+    changed_since=None,
+    chunksize=None,
+    cache_dir=None,
+    input_format=None,
+    jobs=1,
+    incremental=False,
+    report_path=None,
+    pattern_time_budget=None,
+):
+    """Load, clean and validate the PHI-base spreadsheet, without writing
+    any release files.
+
+    Validation can be limited to some columns, and to some rows, for quick
+    feedback on edits to the spreadsheet. Only the cleaning steps needed
+    for the selected columns are run, and only on the selected rows.
+    Repeated values of unique columns are only found within the selected
+    rows. The parameters not listed here are the same as for
+    load_clean_phibase.
+
+    :param spreadsheet_path: the path to the PHI-base spreadsheet
+    :type spreadsheet_path: str
+    :param columns: the normalized names of the columns to validate, or
+    None to validate every column
+    :type columns: list[str] or None
+    :param sample: the number of randomly chosen rows to validate, or None
+    to validate every row
+    :type sample: int or None
+    :param changed_since: the path to an earlier version of the
+    spreadsheet, in any supported format, to only validate rows that are
+    new or changed since that version, or None to validate every row;
+    see phi4pipeline.clean.find_changed_rows
+    :type changed_since: str or None
+    :param incremental: not supported, since the selected rows are not
+    saved; accepted for consistency with load_clean_phibase
+    :type incremental: bool
+    :raises ValueError: if incremental is True, or a column has no
+    validation rules
+    :raises phi4pipeline.validate.ValidationError: if any value fails validation
+    :returns: the cleaned rows that were validated, with the selected
+    columns
+    :rtype: pandas.DataFrame
+    """
+    if incremental:
+        raise ValueError('incremental cleaning cannot be used when only validating')
+    clean_columns = None
+    if columns is not None:
+        unknown_columns = set(columns).difference(get_validated_columns())
+        if unknown_columns:
+            raise ValueError(
+                f'no validation rules for columns: {", ".join(sorted(unknown_columns))}'
+            )
+        # Record IDs are needed for the validation report
+        clean_columns = list(dict.fromkeys(['record_id', *columns]))
+    load_kwargs = {'chunksize': chunksize, 'cache_dir': cache_dir, 'jobs': jobs}
+    phi_df = load_raw_phibase(spreadsheet_path, input_format=input_format, **load_kwargs)
+    is_selected = pd.Series(True, index=phi_df.index)
+    if changed_since is not None:
+        previous_df = load_raw_phibase(changed_since, **load_kwargs)
+        is_selected = find_changed_rows(phi_df, previous_df)
+    if sample is not None and sample < is_selected.sum():
+        sampled = is_selected[is_selected].sample(n=sample).index
+        is_selected = phi_df.index.isin(sampled)
+    cleaned_df = clean_phibase(
+        phi_df[is_selected].copy(), columns=clean_columns, jobs=jobs
+    )
+    validate_phibase(
+        cleaned_df,
+        report_path=report_path,
+        pattern_time_budget=pattern_time_budget,
+        columns=columns,
+    )
+    return cleaned_df
+
+
+def iter_clean_phibase_chunks(
+    spreadsheet_path,
+    chunksize=10_000,
+    input_format=None,
+    jobs=1,
+    incremental=False,
+    report_path=None,
+    pattern_time_budget=None,
+):
+    """Load, clean and validate the PHI-base spreadsheet in chunks of rows.
+
+    Only one chunk of the spreadsheet is held in memory at a time. Invalid
+    values are collected from every chunk, and a ValidationError is raised
+    after the last chunk: see phi4pipeline.validate.iter_validated_chunks.
+    The parameters are the same as for load_clean_phibase, except that
+    there is no cache directory, since the whole spreadsheet would need to
+    be loaded to cache it.
+
+    :raises ValueError: if incremental is True
+    :returns: an iterator of cleaned chunks, with normalized column names
+    :rtype: Iterator[pandas.DataFrame]
+    """
+    if incremental:
+        raise ValueError('incremental cleaning cannot be used with chunks')
+    chunks = iter_spreadsheet_chunks(
+        spreadsheet_path,
+        input_format=input_format,
+        chunksize=chunksize or 10_000,
+        jobs=jobs,
+    )
+    return iter_validated_chunks(
+        iter_clean_phibase(chunks, jobs=jobs),
+        report_path=report_path,
+        pattern_time_budget=pattern_time_budget,
+    )
+
+
+def load_phibase_spreadsheet(spreadsheet_path, keep_headers=True, **load_kwargs):
+    phi_df, column_mapping = load_clean_phibase(spreadsheet_path, **load_kwargs)
     if keep_headers:
         phi_df = restore_header_rows(column_mapping, phi_df)
     return phi_df
 
 
-def prepare_spreadsheet_for_zenodo(spreadsheet_path):
-    """Prepare the PHI-base DataFrame for export as a CSV file.
+def select_zenodo_columns(phi_df):
+    """Remove columns that should not be included in the Zenodo release.
 
-    :param phi_df: the PHI-base DataFrame
+    :param phi_df: the cleaned PHI-base DataFrame, with normalized column
+    names
     :type phi_df: pandas.DataFrame
     :return: the PHI-base DataFrame
     :rtype: pandas.DataFrame
     """
-    phi_df = load_phibase_spreadsheet(spreadsheet_path, keep_headers=False)
     exclude_columns = [
         # Columns containing personal information that should not be shared.
         'author_email',
@@ -77,6 +341,23 @@ def prepare_spreadsheet_for_zenodo(spreadsheet_path):
     return phi_df.drop(exclude_columns, axis=1, errors='ignore')
 
 
+def prepare_spreadsheet_for_zenodo(spreadsheet_path, **load_kwargs):
+    """Prepare the PHI-base DataFrame for export as a CSV file.
+
+    :param phi_df: the PHI-base DataFrame
+    :type phi_df: pandas.DataFrame
+    :param load_kwargs: keyword arguments for loading the spreadsheet,
+    passed to load_clean_phibase
+    :type load_kwargs: dict
+    :return: the PHI-base DataFrame
+    :rtype: pandas.DataFrame
+    """
+    phi_df = load_phibase_spreadsheet(
+        spreadsheet_path, keep_headers=False, **load_kwargs
+    )
+    return select_zenodo_columns(phi_df)
+
+
 def make_files_for_zenodo(
     spreadsheet_path,
     out_dir,
@@ -85,37 +366,115 @@ def make_files_for_zenodo(
     year,
     fasta_path=None,
     contributors_path=None,
+    stream=False,
+    **load_kwargs,
 ):
-    out_dir = Path(out_dir)
-    phibase_version = get_version_from_filename(spreadsheet_path)
-    csv_filename = f'phi-base_{phibase_version}_data.csv'
-    csv_path = out_dir / csv_filename
-    fasta_filename = f'phi-base_{phibase_version}_fasta.fas'
-    fasta_out_path = out_dir / fasta_filename
+    """Make the Zenodo release files.
+
+    :param stream: whether to load, clean and write the spreadsheet in
+    chunks of rows, to limit memory use: see iter_clean_phibase_chunks
+    :type stream: bool
+    :param load_kwargs: keyword arguments for loading the spreadsheet,
+    passed to load_clean_phibase, or to iter_clean_phibase_chunks without
+    cache_dir if stream is True
+    :type load_kwargs: dict
+    """
     contributors = anonymize_contributors(
         load_contributors_file(contributors_path)
     )
+    if stream:
+        # Streamed spreadsheets are never cached
+        load_kwargs.pop('cache_dir', None)
+        phi_df = map(
+            select_zenodo_columns,
+            iter_clean_phibase_chunks(spreadsheet_path, **load_kwargs),
+        )
+    else:
+        phi_df = prepare_spreadsheet_for_zenodo(spreadsheet_path, **load_kwargs)
+    write_zenodo_files(
+        phi_df,
+        out_dir,
+        version=get_version_from_filename(spreadsheet_path),
+        doi=doi,
+        year=year,
+        fasta_path=fasta_path,
+        contributors=contributors,
+    )
+
 
-    phi_df = prepare_spreadsheet_for_zenodo(spreadsheet_path)
-    data_stats = get_data_stats(phi_df)
+def write_zenodo_csv(chunks, csv_path):
+    """Write the PHI-base CSV file for Zenodo from chunks of rows.
+
+    The file is removed if writing fails, including when validation of the
+    chunks fails after the last chunk.
+
+    :param chunks: chunks of the prepared PHI-base DataFrame
+    :type chunks: Iterable[pandas.DataFrame]
+    :param csv_path: the output path for the CSV file
+    :type csv_path: pathlib.Path
+    :returns: statistics of the data, as returned by
+    phi4pipeline.frictionless.get_data_stats
+    :rtype: dict[str, int]
+    """
+    unique_values = {name: set() for name in DATA_STATS_COLUMNS}
+    header = True
+    try:
+        with open(csv_path, 'w', encoding='utf-8', newline='') as file:
+            for chunk_df in chunks:
+                chunk_df.to_csv(file, index=False, header=header, lineterminator='\r\n')
+                header = False
+                collect_data_stats(chunk_df, unique_values)
+    except BaseException:
+        csv_path.unlink(missing_ok=True)
+        raise
+    return count_data_stats(unique_values)
+
+
+def write_zenodo_files(phi_df, out_dir, *, version, doi, year, fasta_path, contributors):
+    """Write the release files for Zenodo from the prepared DataFrame.
+
+    :param phi_df: the PHI-base DataFrame, as returned by
+    prepare_spreadsheet_for_zenodo, or an iterable of chunks of its rows
+    :type phi_df: pandas.DataFrame or Iterable[pandas.DataFrame]
+    :param out_dir: the output directory for the release files
+    :type out_dir: str or os.PathLike
+    :param version: the PHI-base version number
+    :type version: str
+    :param doi: the DOI name for the dataset
+    :type doi: str
+    :param year: the year of publication of the dataset
+    :type year: int
+    :param fasta_path: the path to the FASTA file for the dataset
+    :type fasta_path: str or os.PathLike
+    :param contributors: the anonymized contributors to the dataset
+    :type contributors: list[dict]
+    """
+    out_dir = Path(out_dir)
+    csv_filename = f'phi-base_{version}_data.csv'
+    csv_path = out_dir / csv_filename
+    fasta_filename = f'phi-base_{version}_fasta.fas'
+    fasta_out_path = out_dir / fasta_filename
+
+    chunks = [phi_df] if isinstance(phi_df, pd.DataFrame) else phi_df
     # Write files now so we can calculate file hash and size.
-    phi_df.to_csv(csv_path, index=False, lineterminator='\r\n')
-    shutil.copyfile(fasta_path, fasta_out_path)
+    data_stats = write_zenodo_csv(chunks, csv_path)
+    fasta_stats = copy_file_with_stats(fasta_path, fasta_out_path)
 
     datapackage_json = make_datapackage_json(
         csv_path,
         fasta_out_path,
-        version=phibase_version,
+        version=version,
         doi=doi,
         contributors=contributors,
+        fasta_stats=fasta_stats,
     )
     with open(out_dir / 'datapackage.json', 'w+', encoding='utf-8') as f:
         json.dump(datapackage_json, f, indent=4)
 
     readme_text = make_datapackage_readme(
         csv_path,
-        version=phibase_version,
-        semver=f'{phibase_version}.0',
+        version=version,
+        semver=f'{version}.0',
         year=year,
         doi=doi,
         contributors_data=contributors,
@@ -125,49 +484,43 @@ def make_files_for_zenodo(
     with open(out_dir / 'README.html', 'w+', encoding='utf-8') as f:
         f.write(convert_readme_to_html(readme_text))
 
-    schema_file = DATA_DIR / 'phi-base_schema.json'
-    schema_out = out_dir / 'phi-base_schema.json'
-    with (
-        open(schema_file, 'r', encoding='utf-8') as input_file,
-        open(schema_out, 'w+', encoding='utf-8') as output_file
-    ):
-        output_file.write(input_file.read())
+    with open(out_dir / 'phi-base_schema.json', 'w+', encoding='utf-8') as f:
+        f.write(read_resource_text('phi-base_schema.json'))
+    with open(out_dir / 'description.html', 'w+', encoding='utf-8') as f:
+        f.write(format_zenodo_description(version, data_stats))
 
-    description_file = DATA_DIR / 'description_template.md'
-    description_out = out_dir / 'description.html'
-    with (
-        open(description_file, 'r', encoding='utf-8') as input_file,
-        open(description_out, 'w+', encoding='utf-8') as output_file
-    ):
-        output_file.write(format_zenodo_description(phibase_version, data_stats))
 
-
-def prepare_spreadsheet_for_excel(spreadsheet_path):
-    """Prepare the PHI-base DataFrame for export to an Excel file.
+def format_spreadsheet_for_excel(phi_df):
+    """Format the PHI-base DataFrame for export to an Excel file.
 
     Convert pandas timestamps to date strings (without times), and remove
     the MultiIndex column headings by moving the second header row to the
     first row of the table. Changing the headers is the only way to avoid
     writing an index column.
 
-    :param phi_df: the PHI-base DataFrame
+    :param phi_df: the cleaned PHI-base DataFrame, with the original header
+    rows restored
     :type phi_df: pandas.DataFrame
     :return: the PHI-base DataFrame
     :rtype: pandas.DataFrame
     """
-    phi_df = load_phibase_spreadsheet(spreadsheet_path)
+    first_header = phi_df.columns.get_level_values(0)
+    second_header = phi_df.columns.get_level_values(1)
+
+    # Find columns by the second header row, since the first header row
+    # differs when the spreadsheet was not loaded from an Excel file.
+    def get_column(name):
+        return phi_df.columns[second_header == name][0]
 
     # Preserve existing behavior of truncating interacting partner IDs
-    interacting_ids = ('Interacting protein - locus ID', 'InteractingpartnersId')
+    interacting_ids = get_column('InteractingpartnersId')
     if phi_df[interacting_ids].notna().any():
         phi_df[interacting_ids] = phi_df[interacting_ids].str.slice(stop=92)
 
     # pandas.Series.dt.date is needed to remove timestamps from dates
-    date_column = ('Curation date', 'Curationdate')
+    date_column = get_column('Curationdate')
     phi_df[date_column] = phi_df[date_column].dt.date
 
-    first_header = phi_df.columns.get_level_values(0)
-    second_header = phi_df.columns.get_level_values(1)
     first_row = pd.DataFrame(
         data=[list(second_header)],
         index=[0],
@@ -180,3 +533,67 @@ def prepare_spreadsheet_for_excel(spreadsheet_path):
     phi_df.columns = first_header
 
     return phi_df
+
+
+def prepare_spreadsheet_for_excel(spreadsheet_path, **load_kwargs):
+    """Prepare the PHI-base DataFrame for export to an Excel file.
+
+    See format_spreadsheet_for_excel for the formatting that is applied.
+
+    :param phi_df: the PHI-base DataFrame
+    :type phi_df: pandas.DataFrame
+    :param load_kwargs: keyword arguments for loading the spreadsheet,
+    passed to load_clean_phibase
+    :type load_kwargs: dict
+    :return: the PHI-base DataFrame
+    :rtype: pandas.DataFrame
+    """
+    phi_df = load_phibase_spreadsheet(spreadsheet_path, **load_kwargs)
+    return format_spreadsheet_for_excel(phi_df)
+
+
+def make_release_files(
+    spreadsheet_path,
+    *,
+    excel_path,
+    out_dir,
+    doi,
+    year,
+    fasta_path=None,
+    contributors_path=None,
+    **load_kwargs,
+):
+    """Make both the Excel release and the Zenodo release files.
+
+    The spreadsheet is only loaded, cleaned and validated once, then used
+    for both releases.
+
+    :param spreadsheet_path: the path to the PHI-base spreadsheet
+    :type spreadsheet_path: str
+    :param excel_path: the output path for the cleaned spreadsheet
+    :type excel_path: str or os.PathLike
+    :param out_dir: the output directory for the Zenodo release files
+    :type out_dir: str or os.PathLike
+    :param load_kwargs: keyword arguments for loading the spreadsheet,
+    passed to load_clean_phibase
+    :type load_kwargs: dict
+    """
+    contributors = anonymize_contributors(
+        load_contributors_file(contributors_path)
+    )
+    phi_df, column_mapping = load_clean_phibase(spreadsheet_path, **load_kwargs)
+    # The Zenodo files must be written first, since formatting for Excel
+    # modifies the DataFrame in place.
+    write_zenodo_files(
+        select_zenodo_columns(phi_df),
+        out_dir,
+        version=get_version_from_filename(spreadsheet_path),
+        doi=doi,
+        year=year,
+        fasta_path=fasta_path,
+        contributors=contributors,
+    )
+    excel_df = format_spreadsheet_for_excel(
+        restore_header_rows(column_mapping, phi_df)
+    )
+    excel_df.to_excel(excel_path, index=False)
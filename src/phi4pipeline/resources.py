@@ -0,0 +1,62 @@
+# SPDX-FileCopyrightText: 2023-present James Seager <james.seager@rothamsted.ac.uk>
+#
+# SPDX-License-Identifier: MIT
+
+"""Metadata files packaged with phi4pipeline.
+
+Each file is read and parsed at most once per process. The returned objects
+are shared between callers, so they must not be modified.
+"""
+
+import functools
+import importlib.resources
+import json
+from string import Template
+
+DATA_DIR = importlib.resources.files('phi4pipeline') / 'metadata'
+
+
+@functools.lru_cache(maxsize=None)
+def read_resource_text(name):
+    """Read the text of a packaged metadata file.
+
+    :param name: the name of the file in the metadata directory
+    :type name: str
+    :returns: the contents of the file
+    :rtype: str
+    """
+    return (DATA_DIR / name).read_text(encoding='utf-8')
+
+
+@functools.lru_cache(maxsize=None)
+def load_schema():
+    """Load the PHI-base schema, in Frictionless Table Schema format.
+
+    :returns: the parsed schema
+    :rtype: dict
+    """
+    return json.loads(read_resource_text('phi-base_schema.json'))
+
+
+@functools.lru_cache(maxsize=None)
+def load_datapackage_template():
+    """Load the template for the Frictionless Data Package descriptor.
+
+    :returns: the template, with placeholders in string.Template format
+    :rtype: string.Template
+    """
+    return Template(read_resource_text('datapackage_template.json'))
+
+
+def load_readme_template():
+    """Load the template for the README, with placeholders in str.format
+    format.
+    """
+    return read_resource_text('readme_template.md')
+
+
+def load_description_template():
+    """Load the template for the Zenodo description, with placeholders in
+    str.format format.
+    """
+    return read_resource_text('description_template.md')
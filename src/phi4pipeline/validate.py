@@ -2,122 +2,792 @@
 #
 # SPDX-License-Identifier: MIT
 
+import functools
+import json
+import logging
 import re
+import signal
+import sys
+import threading
+import warnings
+from pathlib import Path
 
+import numpy as np
 import pandas as pd
 
+try:
+    import re2
+except ImportError:
+    # RE2 is optional: see compile_linear_pattern
+    re2 = None
 
-def validate_interacting_partners_id(interacting_partners_ids):
+from phi4pipeline.clean import explode_column, split_interacting_partners_id
+from phi4pipeline.resources import read_resource_text
+
+logger = logging.getLogger(__name__)
+
+# Columns of a validation report: see make_validation_report
+VALIDATION_REPORT_COLUMNS = ['column', 'rule', 'record_id', 'value', 'count']
+
+
+class ValidationError(AssertionError):
+    """Raised when values in PHI-base fail validation.
+
+    This is a subclass of AssertionError, which validation raised before
+    this class was added.
+    """
+
+
+def find_interacting_partners_id_violations(interacting_partners_ids, partners=None):
+    """Find the values of the interacting partners ID column of PHI-base that
+    break each validation rule.
+
+    :param interacting_partners_ids: the interacting partners ID column
+    :type interacting_partners_ids: pandas.Series
+    :param partners: the interacting partners child table and its offsets,
+    as returned by phi4pipeline.clean.make_child_tables, or None to split
+    the column
+    :type partners: tuple[pandas.DataFrame, numpy.ndarray] or None
+    :returns: a mapping between rule names and boolean arrays that are True
+    for the rows that break the rule
+    :rtype: dict[str, numpy.ndarray]
+    """
+    if partners is not None:
+        return find_partner_violations(*partners)
+    # Each distinct value is only split and checked once
+    codes, uniques = pd.factorize(interacting_partners_ids)
+    uniques = pd.Series(np.asarray(uniques, dtype=object))
+    table, offsets = explode_column(
+        uniques,
+        uniques.index.to_series(),
+        split_interacting_partners_id,
+        ['partner_gene', 'db', 'accession'],
+    )
+    # Missing values have a code of -1, which selects the last element
+    return {
+        rule: np.append(is_invalid, False)[codes]
+        for rule, is_invalid in find_partner_violations(table, offsets).items()
+    }
+
+
+def find_partner_violations(table, offsets):
+    """Find the parent rows of an interacting partners child table that
+    break each validation rule.
+
+    :param table: the interacting partners child table
+    :type table: pandas.DataFrame
+    :param offsets: the offsets of the child rows of each parent row, as
+    returned by phi4pipeline.clean.explode_column
+    :type offsets: numpy.ndarray
+    :returns: a mapping between rule names and boolean arrays that are True
+    for the parent rows that break the rule
+    :rtype: dict[str, numpy.ndarray]
+    """
     databases = {'UniProt', 'GenBank', 'EMBL', 'Ensembl Genomes'}
-    invalid = []
-    for row in interacting_partners_ids.values:
-        if pd.isna(row):
+
+    def is_blank(column):
+        return column.fillna('').str.strip().eq('')
+
+    rules = {
+        'blank_partner_gene': table.partner_gene.notna() & is_blank(table.partner_gene),
+        'unknown_database': ~table.db.isin(databases),
+        'blank_accession': is_blank(table.accession),
+        'nested_accession': table.accession.str.contains(': ', regex=False, na=False),
+    }
+    num_rows = len(offsets) - 1
+    parents = np.repeat(np.arange(num_rows), np.diff(offsets))
+    violations = {}
+    for rule, is_invalid in rules.items():
+        is_invalid_row = np.zeros(num_rows, dtype=bool)
+        is_invalid_row[parents[is_invalid.to_numpy(dtype=bool)]] = True
+        violations[rule] = is_invalid_row
+    return violations
+
+
+def validate_interacting_partners_id(
+    interacting_partners_ids, partners=None, record_ids=None, report_path=None
+):
+    """Validate the interacting partners ID column of PHI-base.
+
+    See find_interacting_partners_id_violations for the other parameters.
+
+    :param record_ids: the record IDs of the rows, in the same order, or
+    None to use the index of interacting_partners_ids instead
+    :type record_ids: pandas.Series or None
+    :param report_path: the path to write the validation report to, or
+    None to not write the report; see write_validation_report
+    :type report_path: str or os.PathLike or None
+    :raises ValidationError: if any value fails validation
+    """
+    violations = find_interacting_partners_id_violations(
+        interacting_partners_ids, partners
+    )
+    if record_ids is None:
+        record_ids = interacting_partners_ids.index
+    phi_df = pd.DataFrame({
+        'record_id': np.asarray(record_ids, dtype=object),
+        'interacting_partners_id': interacting_partners_ids.to_numpy(dtype=object),
+    })
+    reports = [
+        summarize_violations(phi_df, 'interacting_partners_id', rule, is_invalid)
+        for rule, is_invalid in violations.items()
+        if is_invalid.any()
+    ]
+    if reports:
+        report = sort_validation_report(pd.concat(reports, ignore_index=True))
+    else:
+        report = make_empty_validation_report()
+    if report_path is not None:
+        write_validation_report(report, report_path)
+    raise_for_validation_report(report)
+
+
+# Patterns for columns without a pattern in the PHI-base schema. These
+# use Python's regular expression syntax, so they are kept out of the
+# released schema.
+VALIDATION_PATTERNS = {
+    'protein_id_source': 'UniProt',
+    'protein_id': '[0-9A-Z]+(?:-[0-9A-Z]+)?|no data found',
+    'gene_id_source': (
+        '(EMBL|GenBank|Broad|Ensembl Genomes|MUMDB|ASAP|FCGP|JGI|BROAD|FGDB'
+        '|Ecogene|FTFD|Geo|FVG|MIPS|Author)'
+    ),
+    'gene_id': (
+        r'(?:AER|ABF)-\d+|\w+-\w+|(Ensembl: )?[\w.]+?'
+        r'(; (Ensembl: )?[\w.]+?)*|Myc .+|SPA0021 sRNA'
+    ),
+    'nt_sequence': '[ACGT]+',
+    'multiple_mutation': r'PHI:\d+(?:; PHI:\d+)*',
+    'pathogen_species': r"[A-Z][a-z]+ (?:sp\. '.+?'|[a-z]+(?:-[a-z]+)?)(?: VGIII)?",
+    'pathogen_strain_id': r'\d+(?:; \d+)*',
+    'host_species': (
+        r'[A-Z][a-z]+(?: (?:[a-z]+|x [a-z]+|[a-z]+ x [A-Z][a-z]+ [a-z]+))? \(.+?\)'
+    ),
+    'host_genotype_id': (
+        r'(?:.+ )?(?:UniProt: [0-9A-Z]+|(?:GenBank|Ensembl): \w+)'
+        r'(?:; (?:.+, )?(?:UniProt: [0-9A-Z]+|(?:GenBank|Ensembl): \w+))*'
+    ),
+    'go_annotation': (
+        r'GO:\d{7}(?:, (?:IDA|IEA|IGI|IMP|IPI|ISS|NAS|ND|TAS))?'
+        r'(?:; GO:\d{7}(?:, (?:IDA|IEA|IGI|IMP|IPI|ISS|NAS|ND|TAS))?)*'
+    ),
+    'database': 'GO',
+    'mating_defect': r'(?:yes|no)(?: \(.+?\))?',
+    'pre_penetration_defect': r'(?:yes|no)(?: \(.+?\))?',
+    'penetration_defect': r'(?:yes|no)(?: \(.+?\))?',
+    'post_penetration_defect': r'(?:yes|no|yes/no)(?: \(.+?\))?',
+    'essential_gene': '(?:yes|no)',
+    # Every non-empty line is a list of chemical names, so the grammar of
+    # gene inducer IDs accepts the same values as this pattern.
+    'gene_inducer_id': '.+',
+    'host_target_id': (
+        r'(?:.+ )?(?:UniProt: [0-9A-Z]+|GenBank: \w+|Ensembl: \S+)'
+        r'(?:; (?:.+, )?(?:UniProt: [0-9A-Z]+|GenBank: \w+|Ensembl: \S+))*'
+    ),
+    'species_expert': '[A-Z]+(?:; [A-Z]+)*',
+    'entered_by': '[A-Z]+(?:; [A-Z]+)*',
+    'reference_source': 'PubMed|ISBN|Not in PubMed',
+    'doi': r'\d+(?:\.\d+)?/.+|no data found',
+    'curator_organization': '(?:AC|MC|MU|RRes)(?:; (?:AC|MC|MU|RRes))*',
+}
+
+# Field constraints of the PHI-base schema that are checked by validation,
+# in the order they are checked for each column
+SCHEMA_CONSTRAINTS = ['required', 'unique', 'pattern']
+
+
+def get_validation_rules(schema=None):
+    """Get the validation rules for each column of PHI-base, compiled from
+    the constraints of the PHI-base schema and VALIDATION_PATTERNS.
+
+    :param schema: the schema, in the format of phi-base_schema.json, or
+    None to use the packaged schema
+    :type schema: dict or None
+    :returns: a mapping between column names and their rules; see
+    compile_validation_rules
+    :rtype: dict[str, dict]
+    """
+    if schema is None:
+        schema_text = read_resource_text('phi-base_schema.json')
+    else:
+        schema_text = json.dumps(schema, sort_keys=True)
+    return compile_validation_rules(schema_text)
+
+
+@functools.lru_cache(maxsize=None)
+def compile_validation_rules(schema_text):
+    """Compile the validation rules of a schema.
+
+    Rules are cached by the text of the schema, so patterns are only
+    compiled again when the schema changes. Columns without a pattern in
+    the schema use their pattern in VALIDATION_PATTERNS, if any.
+
+    :param schema_text: the schema, as a JSON string
+    :type schema_text: str
+    :returns: a mapping between column names and a mapping between the
+    constraints in SCHEMA_CONSTRAINTS and their values, with patterns
+    compiled; columns without constraints are omitted
+    :rtype: dict[str, dict]
+    """
+    fields = json.loads(schema_text)['fields']
+    # Columns that are validated but not released are not in the schema
+    field_names = {field['name'] for field in fields}
+    fields += [
+        {'name': column_name}
+        for column_name in VALIDATION_PATTERNS
+        if column_name not in field_names
+    ]
+    rules = {}
+    for field in fields:
+        field_rules = {
+            constraint: field[constraint]
+            for constraint in SCHEMA_CONSTRAINTS
+            if field.get(constraint) not in (None, False)
+        }
+        pattern = field_rules.get('pattern', VALIDATION_PATTERNS.get(field['name']))
+        if pattern is not None:
+            field_rules['pattern'] = re.compile(pattern)
+        if field_rules:
+            rules[field['name']] = field_rules
+    return rules
+
+
+def compile_linear_pattern(pattern):
+    """Compile a pattern with RE2, which matches in linear time, so it can
+    not backtrack heavily on long or malformed values.
+
+    RE2 does not support lookarounds or backreferences, and its \\d, \\s
+    and \\w only match ASCII characters, so the pattern is translated to
+    match the same values as the re module first: see
+    translate_re2_pattern.
+
+    :param pattern: the pattern
+    :type pattern: str
+    :returns: the compiled pattern, or None if RE2 is not installed or does
+    not support the pattern
+    :rtype: re2._Regexp or None
+    """
+    if re2 is None:
+        return None
+    re2_pattern = translate_re2_pattern(pattern)
+    if re2_pattern is None:
+        return None
+    return compile_re2_pattern(re2_pattern)
+
+
+@functools.lru_cache(maxsize=None)
+def compile_re2_pattern(pattern):
+    options = re2.Options()
+    # Unsupported patterns are reported by make_validation_report instead
+    options.log_errors = False
+    try:
+        return re2.compile(pattern, options=options)
+    except re2.error:
+        return None
+
+
+@functools.lru_cache(maxsize=None)
+def get_unicode_class_ranges(shorthand):
+    """Get the characters that a character class shorthand such as \\w
+    matches in the re module, as ranges of a character class in RE2 syntax.
+    """
+    all_chars = ''.join(map(chr, range(sys.maxunicode + 1)))
+    ranges = []
+    for match in re.finditer(f'\\{shorthand}+', all_chars):
+        start, end = match.start(), match.end() - 1
+        if start == end:
+            ranges.append(f'\\x{{{start:x}}}')
+        else:
+            ranges.append(f'\\x{{{start:x}}}-\\x{{{end:x}}}')
+    return ''.join(ranges)
+
+
+def translate_re2_pattern(pattern):
+    """Translate a pattern of the re module so that RE2 matches the same
+    values.
+
+    The \\d, \\s and \\w classes, and their negations, are replaced with
+    the Unicode characters that they match in the re module. Word
+    boundaries cannot be translated.
+
+    :param pattern: the pattern
+    :type pattern: str
+    :returns: the translated pattern, or None if it cannot be translated
+    :rtype: str or None
+    """
+    parts = []
+    in_class = False
+    for token in re.findall(r'\\.|\[\^?\]?|.', pattern, re.DOTALL):
+        shorthand = token[1:].lower()
+        if token[0] == '\\' and shorthand in ('d', 's', 'w'):
+            ranges = get_unicode_class_ranges(shorthand)
+            if in_class:
+                if token[1].isupper():
+                    # A negated class cannot be part of another class
+                    return None
+                parts.append(ranges)
+            else:
+                parts.append(f'[^{ranges}]' if token[1].isupper() else f'[{ranges}]')
+        elif token in ('\\b', '\\B'):
+            return None
+        else:
+            if token[0] == '[' and not in_class:
+                in_class = True
+            elif token == ']' and in_class:
+                in_class = False
+            parts.append(token)
+    return ''.join(parts)
+
+
+def raise_timeout(signum, frame):
+    raise TimeoutError
+
+
+def can_use_time_budget():
+    """Check whether matching can be interrupted by a timer, which needs
+    interval timers (not available on Windows) and the main thread.
+    """
+    return (
+        hasattr(signal, 'setitimer')
+        and threading.current_thread() is threading.main_thread()
+    )
+
+
+def find_pattern_violations(column, pattern, time_budget=None):
+    """Find the values of a column that do not fully match a pattern.
+
+    The pattern is matched once for each unique value. Missing values and
+    values that are not strings are not checked.
+
+    :param column: the column
+    :type column: pandas.Series
+    :param pattern: the pattern that every value must match
+    :type pattern: re.Pattern
+    :param time_budget: the number of seconds that matching each value may
+    take, or None for no limit; values that take longer are neither valid
+    nor invalid. The limit is only enforced if can_use_time_budget is True.
+    :type time_budget: float or None
+    :returns: a mapping from 'pattern' to a boolean array that is True for
+    invalid values, and from 'pattern_timeout' to a boolean array that is
+    True for values that ran out of time, if there is a time budget
+    :rtype: dict[str, numpy.ndarray]
+    """
+    codes, uniques = pd.factorize(column)
+    # Missing values have a code of -1, which selects the last element
+    is_invalid = np.zeros(len(uniques) + 1, dtype=bool)
+    is_timeout = np.zeros(len(uniques) + 1, dtype=bool)
+    if time_budget is None or not can_use_time_budget():
+        for i, value in enumerate(uniques):
+            is_invalid[i] = isinstance(value, str) and pattern.fullmatch(value) is None
+    else:
+        previous_handler = signal.signal(signal.SIGALRM, raise_timeout)
+        try:
+            for i, value in enumerate(uniques):
+                if not isinstance(value, str):
+                    continue
+                try:
+                    signal.setitimer(signal.ITIMER_REAL, time_budget)
+                    is_match = pattern.fullmatch(value) is not None
+                    signal.setitimer(signal.ITIMER_REAL, 0)
+                except TimeoutError:
+                    is_timeout[i] = True
+                else:
+                    is_invalid[i] = not is_match
+        finally:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous_handler)
+    violations = {'pattern': is_invalid[codes]}
+    if time_budget is not None:
+        violations['pattern_timeout'] = is_timeout[codes]
+    return violations
+
+
+def find_duplicate_violations(column, seen_values=None):
+    """Find the values of a column that repeat an earlier value.
+
+    The first row with each value is valid, so that the violations of
+    chunks of rows add up to the violations of the whole column.
+
+    :param column: the column
+    :type column: pandas.Series
+    :param seen_values: the values of the column in earlier chunks of rows,
+    which is updated with the values of this column, or None if there are
+    no earlier chunks
+    :type seen_values: set or None
+    :returns: a boolean array that is True for repeated values
+    :rtype: numpy.ndarray
+    """
+    is_present = column.notna()
+    is_invalid = column.duplicated() & is_present
+    if seen_values is not None:
+        is_invalid |= column.isin(seen_values) & is_present
+        seen_values.update(column[is_present])
+    return is_invalid.to_numpy(dtype=bool)
+
+
+def find_rule_violations(
+    column, constraint, value, seen_values=None, pattern_time_budget=None
+):
+    """Find the values of a column that break a constraint of the schema.
+
+    :param column: the column
+    :type column: pandas.Series
+    :param constraint: the name of the constraint, from SCHEMA_CONSTRAINTS
+    :type constraint: str
+    :param value: the compiled value of the constraint; see
+    compile_validation_rules
+    :param seen_values: see find_duplicate_violations
+    :type seen_values: set or None
+    :param pattern_time_budget: see find_pattern_violations
+    :type pattern_time_budget: float or None
+    :returns: a mapping between rule names, which are the name of the
+    constraint except for timeouts of patterns, and boolean arrays that
+    are True for invalid values
+    :rtype: dict[str, numpy.ndarray]
+    """
+    if constraint == 'required':
+        is_invalid = column.isna()
+    elif constraint == 'unique':
+        return {'unique': find_duplicate_violations(column, seen_values)}
+    elif constraint == 'pattern':
+        return find_pattern_violations(column, value, pattern_time_budget)
+    else:
+        raise ValueError(f'unknown constraint: {constraint}')
+    return {constraint: is_invalid.to_numpy(dtype=bool)}
+
+
+def summarize_violations(phi_df, column_name, rule, is_invalid):
+    """Summarize the rows of PHI-base that break a validation rule.
+
+    :param phi_df: the PHI-base DataFrame
+    :type phi_df: pandas.DataFrame
+    :param column_name: the name of the column that was validated
+    :type column_name: str
+    :param rule: the name of the rule
+    :type rule: str
+    :param is_invalid: a boolean array that is True for rows that break the
+    rule
+    :type is_invalid: numpy.ndarray
+    :returns: one row for each unique invalid value, with the record ID of
+    the first row with the value, the number of rows with the value, and
+    the position of the first row with the value
+    :rtype: pandas.DataFrame
+    """
+    positions = np.flatnonzero(is_invalid)
+    violations = pd.DataFrame({
+        'position': positions,
+        'record_id': phi_df.record_id.iloc[positions].to_numpy(dtype=object),
+        'value': phi_df[column_name].iloc[positions].to_numpy(dtype=object),
+    })
+    summary = (
+        violations.groupby('value', sort=False, dropna=False)
+        .agg(
+            position=('position', 'first'),
+            record_id=('record_id', 'first'),
+            count=('position', 'size'),
+        )
+        .reset_index()
+    )
+    summary.insert(0, 'column', column_name)
+    summary.insert(1, 'rule', rule)
+    return summary[[*VALIDATION_REPORT_COLUMNS, 'position']]
+
+
+def get_validated_columns():
+    """Get the names of the columns of PHI-base that have validation rules.
+
+    :returns: the column names, in the order the columns are validated
+    :rtype: list[str]
+    """
+    return list(dict.fromkeys([*get_validation_rules(), 'interacting_partners_id']))
+
+
+def sort_validation_report(report):
+    """Sort a validation report by column, in the order the columns are
+    validated, then by the first row with each value.
+    """
+    column_order = {
+        column_name: i for i, column_name in enumerate(get_validated_columns())
+    }
+    sort_keys = [report.column.map(column_order).to_numpy()]
+    if 'position' in report:
+        sort_keys.insert(0, report.position.to_numpy())
+        report = report.drop(columns='position')
+    # numpy.lexsort sorts by the last key first
+    order = np.lexsort(sort_keys)
+    return report.iloc[order].reset_index(drop=True)
+
+
+def make_validation_report(
+    phi_df, child_tables=None, seen_values=None, pattern_time_budget=None, columns=None
+):
+    """Check every validation rule on PHI-base, and collect the violations.
+
+    Rules do not stop at the first column with invalid values, so one
+    report has every problem in the DataFrame. The rules are compiled from
+    the PHI-base schema and VALIDATION_PATTERNS; see get_validation_rules.
+
+    With a pattern time budget, patterns are matched with RE2 where
+    possible, so that no value can stall validation. Patterns that RE2
+    does not support, or every pattern if RE2 is not installed, fall back
+    to the re module with a time limit for each value, and are reported
+    with a warning. The columns matched with RE2 are logged.
+
+    :param phi_df: the PHI-base DataFrame, or a chunk of its rows
+    :type phi_df: pandas.DataFrame
+    :param child_tables: child tables of multi-valued columns, as returned
+    by phi4pipeline.clean.make_child_tables, which are used instead of
+    splitting the columns again
+    :type child_tables: dict or None
+    :param seen_values: a mapping between the names of columns that must be
+    unique and the values of the column in earlier chunks of rows, which
+    is updated with the values of this chunk, or None if there are no
+    earlier chunks
+    :type seen_values: dict[str, set] or None
+    :param pattern_time_budget: the number of seconds that matching a
+    pattern may take for each value, or None to match every pattern with
+    the re module without a limit; values that run out of time break the
+    pattern_timeout rule
+    :type pattern_time_budget: float or None
+    :param columns: the names of the columns to validate, or None to
+    validate every column in get_validated_columns; the DataFrame only
+    needs these columns and record_id
+    :type columns: list[str] or None
+    :raises ValueError: if a column has no validation rules
+    :returns: the report, with one row for each unique invalid value of
+    each column and rule, and the columns in VALIDATION_REPORT_COLUMNS;
+    the report is empty if every value is valid
+    :rtype: pandas.DataFrame
+    """
+    validated_columns = get_validated_columns()
+    if columns is None:
+        columns = validated_columns
+    unknown_columns = [col for col in columns if col not in validated_columns]
+    if unknown_columns:
+        raise ValueError(f'no validation rules for columns: {", ".join(unknown_columns)}')
+    reports = []
+    linear_columns = []
+    fallback_columns = []
+    for column_name, rules in get_validation_rules().items():
+        if column_name not in columns:
             continue
-        level_1 = row.split('; ')
-        for s1 in level_1:
-            if s1 == 'no data found':
-                continue
-            level_2 = s1.split(', ')
-            try:
-                if len(level_2) > 1:
-                    gene = level_2[0]
-                    assert gene and not gene.isspace()
-                    level_2 = level_2[1:]
-                for s2 in level_2:
-                    level_3 = s2.split(': ')
-                    assert len(level_3) == 2
-                    db, accession = level_3
-                    assert db in databases
-                    assert accession and not accession.isspace()
-            except AssertionError:
-                invalid.append(row)
-    if invalid:
-        invalid_values = '\n'.join(invalid)
-        error_message = (
-            f'column interacting_partners_id has invalid values:\n{invalid_values}'
+        for constraint, value in rules.items():
+            seen = None
+            if constraint == 'unique' and seen_values is not None:
+                seen = seen_values.setdefault(column_name, set())
+            time_budget = None
+            if constraint == 'pattern' and pattern_time_budget is not None:
+                linear_pattern = compile_linear_pattern(value.pattern)
+                if linear_pattern is None:
+                    fallback_columns.append(column_name)
+                    time_budget = pattern_time_budget
+                else:
+                    linear_columns.append(column_name)
+                    value = linear_pattern
+            violations = find_rule_violations(
+                phi_df[column_name], constraint, value, seen, time_budget
+            )
+            for rule, is_invalid in violations.items():
+                if is_invalid.any():
+                    reports.append(
+                        summarize_violations(phi_df, column_name, rule, is_invalid)
+                    )
+    if linear_columns:
+        logger.info(
+            'patterns matched in linear time with RE2: %s', ', '.join(linear_columns)
+        )
+    if fallback_columns:
+        warnings.warn(
+            'patterns not matched in linear time, with a limit of '
+            f'{pattern_time_budget} seconds for each value: '
+            + ', '.join(fallback_columns),
+            stacklevel=2,
+        )
+    if 'interacting_partners_id' in columns:
+        violations = find_interacting_partners_id_violations(
+            phi_df.interacting_partners_id,
+            (child_tables or {}).get('interacting_partners'),
+        )
+        for rule, is_invalid in violations.items():
+            if is_invalid.any():
+                reports.append(
+                    summarize_violations(
+                        phi_df, 'interacting_partners_id', rule, is_invalid
+                    )
+                )
+    if not reports:
+        return make_empty_validation_report()
+    return sort_validation_report(pd.concat(reports, ignore_index=True))
+
+
+def merge_validation_reports(reports):
+    """Merge the validation reports of chunks of rows of PHI-base.
+
+    :param reports: the reports, in the order of the chunks
+    :type reports: Iterable[pandas.DataFrame]
+    :returns: the report for all of the chunks, which is the same as the
+    report for the whole DataFrame
+    :rtype: pandas.DataFrame
+    """
+    reports = [report for report in reports if len(report)]
+    if not reports:
+        return make_empty_validation_report()
+    report = (
+        pd.concat(reports, ignore_index=True)
+        .groupby(['column', 'rule', 'value'], sort=False, dropna=False)
+        .agg(record_id=('record_id', 'first'), count=('count', 'sum'))
+        .reset_index()
+    )
+    return sort_validation_report(report[VALIDATION_REPORT_COLUMNS])
+
+
+def make_empty_validation_report():
+    report = pd.DataFrame(columns=VALIDATION_REPORT_COLUMNS, dtype=object)
+    return report.astype({'count': 'int64'})
+
+
+def format_validation_report(report):
+    """Format the invalid values of each column in a validation report.
+
+    :param report: the validation report
+    :type report: pandas.DataFrame
+    :returns: a message listing the unique invalid values of each column
+    :rtype: str
+    """
+    messages = []
+    for column_name, rows in report.groupby('column', sort=False):
+        values = '\n'.join(
+            dict.fromkeys(
+                '(missing)' if pd.isna(value) else str(value) for value in rows.value
+            )
         )
-        assert False, error_message
+        messages.append(f'column {column_name} has invalid values:\n{values}')
+    return '\n'.join(messages)
+
+
+def raise_for_validation_report(report):
+    """Raise a ValidationError if a validation report has any violations.
+
+    The error is raised explicitly, so validation is not skipped when
+    Python is run with optimizations (-O).
+
+    :param report: the validation report
+    :type report: pandas.DataFrame
+    :raises ValidationError: if the report is not empty
+    """
+    if len(report):
+        raise ValidationError(format_validation_report(report))
+
+
+def write_validation_report(report, path):
+    """Write a validation report to a JSON file, if the path ends in .json,
+    or a CSV file otherwise.
+
+    :param report: the validation report
+    :type report: pandas.DataFrame
+    :param path: the output path
+    :type path: str or os.PathLike
+    """
+    if Path(path).suffix.lower() == '.json':
+        report.to_json(path, orient='records', indent=2)
+    else:
+        report.to_csv(path, index=False)
+
+
+def collect_unique_values(phi_df):
+    """Collect the values of the columns of PHI-base that must be unique.
+
+    The values can be passed to make_validation_report as seen_values, so
+    that rows validated separately are checked against these rows.
+
+    :param phi_df: the PHI-base DataFrame, or some of its rows
+    :type phi_df: pandas.DataFrame
+    :returns: a mapping between column names and sets of their values
+    :rtype: dict[str, set]
+    """
+    return {
+        column_name: set(phi_df[column_name].dropna())
+        for column_name, rules in get_validation_rules().items()
+        if 'unique' in rules and column_name in phi_df
+    }
 
 
-def validate_phibase(phi_df):
+def validate_phibase(
+    phi_df,
+    child_tables=None,
+    report_path=None,
+    pattern_time_budget=None,
+    columns=None,
+    seen_values=None,
+):
     """Validate values in all columns of PHI-base.
 
     :param phi_df: the PHI-base DataFrame
     :type phi_df: pandas.DataFrame
-    :raises AssertionError: if any value fails validation
-    """
-
-    def make_gene_inducer_pattern():
-        repeat = lambda pat, sep: f'{pat}(?:{sep} {pat})*'
-        chebi = 'CHEBI:\d+'
-        cas = 'CAS:\d+-\d+-\d+'
-        chem_id = f'(?:{chebi}|{cas}|\d+)'
-        chem_ids_L1 = repeat(chem_id, ';')
-        chem_ids_L2 = repeat(chem_id, ',')
-        chem_name = '.+(?=([;,]|$))'
-        chem_names = repeat(chem_name, ',')
-        anti_infs = repeat(f'anti-infective: {chem_names}: {chem_ids_L2}', ';')
-        labelled_ids = repeat(f'{chem_names}: {chem_ids_L2}', ';')
-        pattern = f'(?:{anti_infs}|{labelled_ids}|{chem_ids_L1}|{chem_names})'
-        return pattern
-
-    validation_patterns = {
-        'record_id': 'Record \d+',
-        'phi_id': 'PHI:\d+',
-        'protein_id_source': 'UniProt',
-        'protein_id': '[0-9A-Z]+(?:-[0-9A-Z]+)?|no data found',
-        'gene_id_source': (
-            '(EMBL|GenBank|Broad|Ensembl Genomes|MUMDB|ASAP|FCGP|JGI|BROAD|FGDB'
-            '|Ecogene|FTFD|Geo|FVG|MIPS|Author)'
-        ),
-        'gene_id': (
-            '(?:AER|ABF)-\d+|\w+-\w+|(Ensembl: )?[\w.]+?'
-            '(; (Ensembl: )?[\w.]+?)*|Myc .+|SPA0021 sRNA'
-        ),
-        'nt_sequence': '[ACGT]+',
-        'multiple_mutation': 'PHI:\d+(?:; PHI:\d+)*',
-        'pathogen_species': "[A-Z][a-z]+ (?:sp\. '.+?'|[a-z]+(?:-[a-z]+)?)(?: VGIII)?",
-        'pathogen_strain_id': r'\d+(?:; \d+)*',
-        'host_species': (
-            '[A-Z][a-z]+(?: (?:[a-z]+|x [a-z]+|[a-z]+ x [A-Z][a-z]+ [a-z]+))? \(.+?\)'
-        ),
-        'host_genotype_id': (
-            '(?:.+ )?(?:UniProt: [0-9A-Z]+|(?:GenBank|Ensembl): \w+)'
-            '(?:; (?:.+, )?(?:UniProt: [0-9A-Z]+|(?:GenBank|Ensembl): \w+))*'
-        ),
-        'go_annotation': (
-            'GO:\d{7}(?:, (?:IDA|IEA|IGI|IMP|IPI|ISS|NAS|ND|TAS))?'
-            '(?:; GO:\d{7}(?:, (?:IDA|IEA|IGI|IMP|IPI|ISS|NAS|ND|TAS))?)*'
-        ),
-        'database': 'GO',
-        'mating_defect': '(?:yes|no)(?: \(.+?\))?',
-        'pre_penetration_defect': '(?:yes|no)(?: \(.+?\))?',
-        'penetration_defect': '(?:yes|no)(?: \(.+?\))?',
-        'post_penetration_defect': '(?:yes|no|yes/no)(?: \(.+?\))?',
-        'essential_gene': '(?:yes|no)',
-        'gene_inducer_id': make_gene_inducer_pattern(),
-        'host_target_id': (
-            '(?:.+ )?(?:UniProt: [0-9A-Z]+|GenBank: \w+|Ensembl: \S+)'
-            '(?:; (?:.+, )?(?:UniProt: [0-9A-Z]+|GenBank: \w+|Ensembl: \S+))*'
-        ),
-        'species_expert': '[A-Z]+(?:; [A-Z]+)*',
-        'entered_by': '[A-Z]+(?:; [A-Z]+)*',
-        'reference_source': 'PubMed|ISBN|Not in PubMed',
-        'doi': '\d+(?:\.\d+)?/.+|no data found',
-        'curator_organization': '(?:AC|MC|MU|RRes)(?:; (?:AC|MC|MU|RRes))*',
-    }
-    validation_patterns = {k: re.compile(v) for k, v in validation_patterns.items()}
+    :param child_tables: child tables of multi-valued columns, as returned
+    by phi4pipeline.clean.make_child_tables, which are used instead of
+    splitting the columns again
+    :type child_tables: dict or None
+    :param report_path: the path to write the validation report to, or
+    None to not write the report; see write_validation_report
+    :type report_path: str or os.PathLike or None
+    :param pattern_time_budget: the number of seconds that matching a
+    pattern may take for each value; see make_validation_report
+    :type pattern_time_budget: float or None
+    :param columns: the names of the columns to validate, or None to
+    validate every column; see make_validation_report
+    :type columns: list[str] or None
+    :param seen_values: the values of unique columns in rows that are not
+    in phi_df, as returned by collect_unique_values, or None
+    :type seen_values: dict[str, set] or None
+    :raises ValidationError: if any value fails validation, with a message
+    listing the invalid values of every column
+    """
+    report = make_validation_report(
+        phi_df,
+        child_tables,
+        seen_values=seen_values,
+        pattern_time_budget=pattern_time_budget,
+        columns=columns,
+    )
+    if report_path is not None:
+        write_validation_report(report, report_path)
+    raise_for_validation_report(report)
 
-    for column_name, pattern in validation_patterns.items():
-        column = phi_df[column_name]
-        if column.isna().all():
-            continue
-        is_invalid = ~column.str.fullmatch(pattern, na=True)
-        if is_invalid.any():
-            index = is_invalid[lambda x: x].index
-            invalid_rows = column[index].drop_duplicates()
-            invalid_values = '\n'.join(invalid_rows.values)
-            error_message = f'column {column_name} has invalid values:\n{invalid_values}'
-            assert False, error_message
-
-    validate_interacting_partners_id(phi_df.interacting_partners_id)
+
+def iter_validated_chunks(chunks, report_path=None, pattern_time_budget=None):
+    """Validate chunks of rows of the cleaned PHI-base DataFrame while
+    passing them through.
+
+    The reports of every chunk are merged and checked after the last chunk
+    has been passed through, so the error is the same as the one raised by
+    validate_phibase for the whole DataFrame.
+
+    :param chunks: the cleaned chunks
+    :type chunks: Iterable[pandas.DataFrame]
+    :param report_path: the path to write the validation report to, or
+    None to not write the report; see write_validation_report
+    :type report_path: str or os.PathLike or None
+    :param pattern_time_budget: the number of seconds that matching a
+    pattern may take for each value; see make_validation_report
+    :type pattern_time_budget: float or None
+    :raises ValidationError: after the last chunk, if any value failed
+    validation
+    :returns: an iterator of the same chunks
+    :rtype: Iterator[pandas.DataFrame]
+    """
+    reports = []
+    seen_values = {}
+    for chunk_df in chunks:
+        reports.append(
+            make_validation_report(
+                chunk_df,
+                seen_values=seen_values,
+                pattern_time_budget=pattern_time_budget,
+            )
+        )
+        yield chunk_df
+    report = merge_validation_reports(reports)
+    if report_path is not None:
+        write_validation_report(report, report_path)
+    raise_for_validation_report(report)
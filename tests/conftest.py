@@ -0,0 +1,29 @@
+# SPDX-FileCopyrightText: 2023-present James Seager <james.seager@rothamsted.ac.uk>
+#
+# SPDX-License-Identifier: MIT
+
+import openpyxl
+import pytest
+
+
+@pytest.fixture
+def spreadsheet_path(tmp_path):
+    path = tmp_path / 'phi-base_v4-12_test.xlsx'
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = '4-12 phibase_all'
+    rows = [
+        ['Record ID', 'PHI_MolConn_ID', 'Gene', 'Pathogen ID', 'Year'],
+        ['RecordID', 'PHIMolConnID', 'Gene', 'PathogenID', 'Year'],
+        ['Record 1', 'PHI:3', 'PGN1', 5017, 1990],
+        ['Record 2', 'PHI:7', None, 5499.0, 1992],
+        [None, None, None, None, None],
+        ['Record 3', 'PHI:8', 'NIP1 ', None, 1993],
+        ['Record 4', 'PHI:9', 'NIP2', 5017, 1994],
+        [None, None, None, None, None],
+    ]
+    for row in rows:
+        sheet.append(row)
+    workbook.create_sheet('other')
+    workbook.save(path)
+    return path
@@ -0,0 +1,87 @@
+# SPDX-FileCopyrightText: 2023-present James Seager <james.seager@rothamsted.ac.uk>
+#
+# SPDX-License-Identifier: MIT
+
+import pandas as pd
+from pandas.testing import assert_frame_equal, assert_series_equal
+
+from phi4pipeline import cache
+from phi4pipeline.cache import (
+    clear_cache,
+    load_excel_cached,
+    read_clean_state,
+    write_clean_state,
+)
+from phi4pipeline.frictionless import get_file_sha1_hash
+from phi4pipeline.load import load_spreadsheet
+
+
+def test_load_excel_cached(spreadsheet_path, tmp_path, monkeypatch):
+    cache_dir = tmp_path / 'cache'
+    expected = load_spreadsheet(spreadsheet_path, input_format='excel')
+    actual = load_excel_cached(spreadsheet_path, cache_dir)
+    assert_frame_equal(expected, actual)
+    file_hash = get_file_sha1_hash(spreadsheet_path)
+    assert (cache_dir / f'{file_hash}.pickle').exists()
+
+    def fail(*args, **kwargs):
+        raise AssertionError('spreadsheet should not be parsed')
+
+    # A warm run must not parse the spreadsheet again
+    monkeypatch.setattr(cache, 'load_spreadsheet', fail)
+    actual = load_excel_cached(spreadsheet_path, cache_dir)
+    assert_frame_equal(expected, actual)
+
+
+def test_load_excel_cached_version_mismatch(spreadsheet_path, tmp_path, monkeypatch):
+    cache_dir = tmp_path / 'cache'
+    load_excel_cached(spreadsheet_path, cache_dir)
+    calls = []
+
+    def load(path, **kwargs):
+        calls.append(path)
+        return load_spreadsheet(path, **kwargs)
+
+    monkeypatch.setattr(cache, 'load_spreadsheet', load)
+    monkeypatch.setattr(cache, '__version__', '0.0.0')
+    load_excel_cached(spreadsheet_path, cache_dir)
+    assert calls == [spreadsheet_path]
+
+
+def test_clean_state(tmp_path):
+    path = tmp_path / 'phi-base.xlsx'
+    columns = pd.Index(['Record ID', 'Gene'])
+    state = {'fingerprints': pd.Series([1, 2], index=['Record 1', 'Record 2'])}
+    assert read_clean_state(tmp_path, path, columns) is None
+    write_clean_state(tmp_path, path, columns, state)
+    actual = read_clean_state(tmp_path, path, columns)
+    assert_series_equal(actual['fingerprints'], state['fingerprints'])
+    # The state is not used for a spreadsheet with different columns
+    assert read_clean_state(tmp_path, path, pd.Index(['Record ID'])) is None
+
+
+def test_clean_state_per_source(tmp_path):
+    path_a = tmp_path / 'a.xlsx'
+    path_b = tmp_path / 'b.xlsx'
+    columns = pd.Index(['Record ID', 'Gene'])
+    state_a = {'fingerprints': pd.Series([1], index=['Record 1'])}
+    state_b = {'fingerprints': pd.Series([2], index=['Record 2'])}
+    write_clean_state(tmp_path, path_a, columns, state_a)
+    assert read_clean_state(tmp_path, path_b, columns) is None
+    write_clean_state(tmp_path, path_b, columns, state_b)
+    # Saving the state of one spreadsheet keeps the state of the other
+    actual_a = read_clean_state(tmp_path, path_a, columns)
+    actual_b = read_clean_state(tmp_path, path_b, columns)
+    assert_series_equal(actual_a['fingerprints'], state_a['fingerprints'])
+    assert_series_equal(actual_b['fingerprints'], state_b['fingerprints'])
+
+
+def test_clear_cache(spreadsheet_path, tmp_path):
+    cache_dir = tmp_path / 'cache'
+    load_excel_cached(spreadsheet_path, cache_dir)
+    other_file = cache_dir / 'other.txt'
+    other_file.write_text('keep')
+    clear_cache(cache_dir)
+    assert list(cache_dir.iterdir()) == [other_file]
+    # Clearing a missing cache directory should not raise
+    clear_cache(tmp_path / 'missing')
@@ -2,15 +2,49 @@
 #
 # SPDX-License-Identifier: MIT
 
+import re
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
 import pandas as pd
-from pandas.testing import assert_series_equal
+import pyarrow as pa
+import pytest
+from pandas.testing import assert_frame_equal, assert_series_equal
 
 from phi4pipeline.clean import (
+    apply_replacements,
+    clean_phibase,
+    clean_phibase_incremental,
+    compile_replacement_rule,
+    find_changed_rows,
     format_tissue_names,
+    get_replacements,
+    get_variable_casing_pattern,
+    iter_clean_phibase,
+    make_child_tables,
     get_converted_curation_dates,
+    get_step_dependencies,
+    make_cleaning_step,
+    map_text_values,
+    normalize_text,
+    parse_gene_inducer_id_array,
+    parse_gene_inducer_ids,
+    parse_go_annotation,
+    remove_excluded_columns,
+    select_cleaning_steps,
+)
+from phi4pipeline.load import (
+    iter_spreadsheet_chunks,
+    load_spreadsheet,
+    normalize_column_names,
 )
 
 
+TEST_DATA_DIR = Path(__file__).parent / 'data'
+
+
 def test_format_tissue_names():
     tissues = pd.Series(['Adult', 'Foo', 'Blood'])
     expected = pd.Series(['adult', 'Foo', 'blood'])
@@ -47,3 +81,363 @@ def test_get_converted_curation_dates():
     )
     actual = get_converted_curation_dates(dates)
     assert_series_equal(expected, actual)
+
+
+def test_get_converted_curation_dates_other_formats():
+    dates = pd.Series(
+        [43000, '2019-05-04 10:11:12', 'Sept 2019', None], dtype='object'
+    )
+    expected = pd.Series(
+        ['2017-09-22', '2019-05-04 10:11:12', '2019-09-01', None],
+        dtype='datetime64[ns]',
+    )
+    actual = get_converted_curation_dates(dates)
+    assert_series_equal(expected, actual)
+
+
+def test_get_converted_curation_dates_mixed_formats():
+    dates = pd.Series(
+        [
+            '1 Jan 2005',
+            '2005/01/04',
+            '2005-01-04T10:00:00',
+            '04.05.2005',
+            '12/31/2005',
+            '2005',
+        ],
+        dtype='object',
+    )
+    expected = pd.Series(
+        [
+            '2005-01-01',
+            '2005-01-04',
+            '2005-01-04 10:00:00',
+            '2005-05-04',
+            '2005-12-31',
+            '2005-01-01',
+        ],
+        dtype='datetime64[ns]',
+    )
+    actual = get_converted_curation_dates(dates)
+    assert_series_equal(expected, actual)
+
+
+def test_get_converted_curation_dates_missing():
+    dates = pd.Series([None, np.nan], dtype='object', name='curation_date')
+    expected = pd.Series(
+        [None, None], dtype='datetime64[ns]', name='curation_date'
+    )
+    actual = get_converted_curation_dates(dates)
+    assert_series_equal(expected, actual)
+
+
+def test_get_converted_curation_dates_unknown_format():
+    dates = pd.Series(['Nov-16', 'Jux-16', 'Foo', 'Jux-16'], dtype='object')
+    with pytest.raises(ValueError, match=r'unknown format: Jux-16, Foo$'):
+        get_converted_curation_dates(dates)
+
+
+def test_map_text_values():
+    calls = []
+
+    def func(value):
+        calls.append(value)
+        return value.upper()
+
+    column = pd.Series(['a', 'b', None, 'a', 1, 'b'], name='gene')
+    expected = pd.Series(['A', 'B', None, 'A', 1, 'B'], name='gene')
+    actual = map_text_values(column, func)
+    assert_series_equal(expected, actual)
+    assert calls == ['a', 'b']
+
+
+def test_normalize_text():
+    phi_df = pd.DataFrame({
+        'gene': pd.Series(
+            [' \N{LATIN SMALL LIGATURE FI}sh\t\tgene ', 'No data found', None],
+            dtype='string[pyarrow]',
+        ),
+        'doi': ['no data found', 1, '\N{LEFT-TO-RIGHT MARK}a \u200e b\n'],
+        'year': [2005, 2006, 2007],
+    })
+    expected = pd.DataFrame({
+        'gene': pd.Series(['fish gene', None, None], dtype='string[pyarrow]'),
+        'doi': ['no data found', 1, 'a  b'],
+        'year': [2005, 2006, 2007],
+    })
+    actual = normalize_text(phi_df)
+    assert_frame_equal(expected, actual)
+
+
+@pytest.mark.parametrize(
+    'pattern,value',
+    [
+        pytest.param(pattern, value, id=f'{col}-{pattern}')
+        for col, replacements in get_replacements().items()
+        for pattern, value in replacements.items()
+    ],
+)
+def test_compile_replacement_rule(pattern, value):
+    texts = [
+        'EU 984498 and EU 984498',
+        'no',
+        'no\n',
+        'No data found',
+        'reduced growth',
+        'UniProt:P12345; genbank:AB1234;',
+        'Mol Plant Pathol. 2023 Mar 13. doi: 10.1111/mpp.13321.',
+        'Arf GTPase - Class-II',
+        'Lethal pathogen phenotype',
+        'plain text',
+    ]
+    matches, replace = compile_replacement_rule(pattern, value)
+    expected = pd.Series(texts).replace(pattern, value, regex=True)
+    actual = pd.Series([replace(text) for text in texts])
+    assert_series_equal(expected, actual)
+    expected = [re.search(pattern, text) is not None for text in texts]
+    assert [matches(text) for text in texts] == expected
+
+
+def test_apply_replacements_matches_pandas():
+    phi_df = load_spreadsheet(TEST_DATA_DIR / 'phi-base_v4-12_test.csv')
+    phi_df = phi_df.rename(columns=lambda x: x.strip())
+    phi_df = normalize_column_names(remove_excluded_columns(phi_df))
+    phi_df = normalize_text(phi_df[list(get_replacements())].astype(object))
+    # Later rules only apply where they match the original value
+    phi_df.loc[0, 'chromosome_location'] = 'CHROMOSOME-6'
+    phi_df.loc[1, 'chromosome_location'] = 'CHROMOSOME8'
+    # pandas cannot replace in object columns without any strings
+    replacements = {
+        col: column_replacements
+        for col, column_replacements in get_replacements().items()
+        if phi_df[col].notna().any()
+    }
+    # pandas also infers new dtypes for the replaced columns
+    expected = phi_df.replace(replacements, regex=True).astype(object)
+    actual = apply_replacements(phi_df.copy())
+    assert_frame_equal(expected, actual)
+    assert actual.chromosome_location[:2].tolist() == ['chromosome-6', 'chromosome8']
+
+
+def test_apply_replacements():
+    phi_df = pd.DataFrame({
+        col: pd.Series(dtype='object') for col in get_replacements()
+    })
+    phi_df = phi_df.reindex(range(3))
+    phi_df['gene_id'] = ['EU 984498', 'EU 984498', 'HM 486909']
+    phi_df['multiple_mutation'] = ['no', 'PHI:1', np.nan]
+    rule_counts = {}
+    actual = apply_replacements(phi_df, rule_counts)
+    assert actual.gene_id.tolist() == ['EU984498', 'EU984498', 'HM486909']
+    assert actual.multiple_mutation.isna().tolist() == [True, False, True]
+    assert rule_counts['gene_id', 'EU 984498'] == 2
+    assert rule_counts['gene_id', 'HM 486909'] == 1
+    assert rule_counts['multiple_mutation', '^no$'] == 1
+    assert rule_counts['gene_id', 'HM 486908'] == 0
+
+
+@pytest.mark.parametrize(
+    'value,expected',
+    [
+        ('Gene Deletion', 'gene deletion'),
+        ('RNA-Seq (Western blot)', 'RNA-seq (Western blot)'),
+        ('Hog1 MAPK pathway', 'Hog1 MAPK pathway'),
+        ('Hog1a Ca2+ T-DNA', 'hog1a ca2+ T-DNA'),
+        ('B2H, X_y', 'B2H, x_y'),
+    ],
+)
+def test_get_variable_casing_pattern(value, expected):
+    pattern = get_variable_casing_pattern(('Hog1', 'Western', 'Ca2+'))
+    actual = pattern.sub(lambda match: match.group(0).lower(), value)
+    assert actual == expected
+
+
+def test_parse_gene_inducer_ids():
+    gene_inducer_ids = pd.Series(
+        [
+            'anti-infective CAS No. 50-00-0;',
+            'Congo red CHEBI: 34653',
+            'hydrogen peroxide CHEBI:16240 CHEBI:456',
+            '1234 456',
+            None,
+        ],
+        dtype='object',
+    )
+    expected = pd.Series(
+        [
+            'anti-infective, CAS:50-00-0',
+            'Congo red: CHEBI:34653',
+            'hydrogen peroxide: CHEBI:16240, CHEBI:456',
+            '1234; 456',
+            None,
+        ],
+        dtype='object',
+    )
+    actual = parse_gene_inducer_ids(gene_inducer_ids)
+    assert_series_equal(expected, actual)
+    actual = parse_gene_inducer_id_array(pa.array(gene_inducer_ids))
+    assert actual.equals(pa.array(expected))
+    actual = parse_gene_inducer_id_array(gene_inducer_ids.to_numpy())
+    assert actual.tolist() == expected.tolist()
+
+
+def test_parse_go_annotation():
+    # Missing values may not be the np.nan singleton, e.g. after unpickling
+    go_annotation = pd.Series(
+        ['GO:0004650,IDA', float('nan'), 'GO:0000001; IMP GO:0000002', 'foo'],
+        dtype='object',
+    )
+    expected = pd.Series(
+        ['GO:0004650, IDA', float('nan'), 'GO:0000001, IMP; GO:0000002', 'foo'],
+        dtype='object',
+    )
+    actual = parse_go_annotation(go_annotation)
+    assert_series_equal(expected, actual)
+
+
+def test_make_child_tables():
+    phi_df = pd.DataFrame({
+        'record_id': ['Record 1', 'Record 2', 'Record 3', 'Record 4'],
+        'go_annotation': [
+            'GO:0000001, IMP; GO:0000002',
+            None,
+            'GO:0000001, IMP; GO:0000002',
+            'GO:0000003',
+        ],
+        'interacting_partners_id': [
+            'no data found',
+            'abc1, UniProt: P12345; GenBank: AB1234',
+            None,
+            'EMBL',
+        ],
+    })
+    child_tables = make_child_tables(phi_df)
+
+    go_table, go_offsets = child_tables['go_annotation']
+    expected = pd.DataFrame.from_records(
+        [
+            ('Record 1', 'GO:0000001', 'IMP'),
+            ('Record 1', 'GO:0000002', None),
+            ('Record 3', 'GO:0000001', 'IMP'),
+            ('Record 3', 'GO:0000002', None),
+            ('Record 4', 'GO:0000003', None),
+        ],
+        columns=['record_id', 'go_id', 'evidence'],
+    )
+    assert_frame_equal(expected, go_table)
+    assert go_offsets.tolist() == [0, 2, 2, 4, 5]
+
+    partners_table, partners_offsets = child_tables['interacting_partners']
+    expected = pd.DataFrame.from_records(
+        [
+            ('Record 2', 'abc1', 'UniProt', 'P12345'),
+            ('Record 2', None, 'GenBank', 'AB1234'),
+            ('Record 4', None, 'EMBL', None),
+        ],
+        columns=['record_id', 'partner_gene', 'db', 'accession'],
+    )
+    assert_frame_equal(expected, partners_table)
+    assert partners_offsets.tolist() == [0, 0, 2, 2, 3]
+
+
+def test_clean_phibase_incremental():
+    phi_df = load_spreadsheet(TEST_DATA_DIR / 'phi-base_v4-12_test.csv')
+    cleaned_df, changed_df, state = clean_phibase_incremental(phi_df.copy())
+    assert_frame_equal(cleaned_df, clean_phibase(phi_df.copy()))
+    assert len(changed_df) == len(phi_df)
+
+    # Change one row and remove another
+    phi_df.loc[0, 'Gene'] = 'NEW1  '
+    phi_df = phi_df.drop(index=1).reset_index(drop=True)
+    cleaned_df, changed_df, _ = clean_phibase_incremental(phi_df.copy(), state)
+    assert_frame_equal(cleaned_df, clean_phibase(phi_df.copy()))
+    assert changed_df.record_id.tolist() == [phi_df.loc[0, 'Record ID']]
+
+    # The changed rows have no values in some columns
+    phi_df.loc[0, 'Gene'] = 'NEW2'
+    phi_df.loc[0, phi_df.columns[phi_df.columns.str.contains('date|ID$')]] = None
+    cleaned_df, changed_df, _ = clean_phibase_incremental(phi_df.copy(), state)
+    assert_frame_equal(cleaned_df, clean_phibase(phi_df.copy()))
+    assert len(changed_df) == 1
+
+
+def test_find_changed_rows():
+    previous_df = load_spreadsheet(TEST_DATA_DIR / 'phi-base_v4-12_test.csv')
+    phi_df = previous_df.copy()
+    assert not find_changed_rows(phi_df, previous_df).any()
+
+    # Change one row, add a row and duplicate a record ID
+    phi_df.loc[0, 'Gene'] = 'NEW1'
+    phi_df.loc[len(phi_df)] = phi_df.loc[2]
+    phi_df.loc[len(phi_df) - 1, 'Record ID'] = 'Record 100'
+    phi_df.loc[4, 'Record ID'] = phi_df.loc[5, 'Record ID']
+    expected = [0, 4, 5, len(phi_df) - 1]
+    actual = find_changed_rows(phi_df, previous_df)
+    assert actual[actual].index.tolist() == expected
+    assert find_changed_rows(phi_df.iloc[:, :-1], previous_df).all()
+
+
+def test_get_step_dependencies():
+    plan = [
+        make_cleaning_step('a', None, ['x']),
+        make_cleaning_step('b', None, ['y']),
+        make_cleaning_step('c', None, ['x', 'y'], ['z']),
+        make_cleaning_step('d', None, ['x']),
+        make_cleaning_step('e', None, ['z']),
+    ]
+    assert get_step_dependencies(plan) == [set(), set(), {0, 1}, {0, 2}, {2}]
+    assert [step['name'] for step in select_cleaning_steps(plan, ['z'])] == [
+        'a',
+        'b',
+        'c',
+        'e',
+    ]
+    assert [step['name'] for step in select_cleaning_steps(plan, ['x'])] == [
+        'a',
+        'd',
+    ]
+
+
+def test_clean_phibase_columns():
+    phi_df = load_spreadsheet(TEST_DATA_DIR / 'phi-base_v4-12_test.csv')
+    expected = clean_phibase(phi_df.copy())
+    columns = ['gene', 'disease', 'curation_date', 'go_annotation']
+    actual = clean_phibase(phi_df.copy(), columns=columns)
+    assert_frame_equal(actual, expected[columns])
+
+
+def test_clean_phibase_warnings():
+    phi_df = load_spreadsheet(TEST_DATA_DIR / 'phi-base_v4-12_test.csv')
+    filters = list(warnings.filters)
+    # Cleaning does not fall back from pyarrow for string columns
+    with warnings.catch_warnings():
+        warnings.simplefilter('error', pd.errors.PerformanceWarning)
+        clean_phibase(phi_df)
+    assert warnings.filters == filters
+
+
+def test_clean_phibase_executor():
+    phi_df = load_spreadsheet(TEST_DATA_DIR / 'phi-base_v4-12_test.csv')
+    expected = clean_phibase(phi_df.copy())
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        actual = clean_phibase(phi_df.copy(), executor=executor)
+    assert_frame_equal(actual, expected)
+
+
+def test_clean_phibase_jobs():
+    phi_df = load_spreadsheet(TEST_DATA_DIR / 'phi-base_v4-12_test.csv')
+    expected = clean_phibase(phi_df.copy())
+    actual = clean_phibase(phi_df.copy(), jobs=2)
+    assert_frame_equal(actual, expected)
+    with pytest.raises(ValueError, match='jobs must be a positive integer'):
+        clean_phibase(phi_df.copy(), jobs=0)
+
+
+def test_iter_clean_phibase():
+    path = TEST_DATA_DIR / 'phi-base_v4-12_test.csv'
+    # Read the whole file as one chunk, so that text columns are read the
+    # same way as in smaller chunks
+    expected = clean_phibase(next(iter_spreadsheet_chunks(path, chunksize=1000)))
+    chunks = iter_spreadsheet_chunks(path, chunksize=3)
+    actual = pd.concat(iter_clean_phibase(chunks))
+    assert actual.to_csv(index=False) == expected.to_csv(index=False)
@@ -2,9 +2,14 @@
 #
 # SPDX-License-Identifier: MIT
 
+import csv
+from pathlib import Path
+
 import pytest
 
-from phi4pipeline.cli import parse_args
+from phi4pipeline.cli import VALIDATION_FAILED_STATUS, parse_args, run
+
+TEST_DATA_DIR = Path(__file__).parent / 'data'
 
 
 test_parse_args_params = [
@@ -25,15 +30,66 @@ test_parse_args_params = [
         ],
         {
             'target': 'zenodo',
+            'cache_dir': None,
+            'chunksize': None,
+            'clear_cache': False,
+            'incremental': False,
+            'input_format': None,
+            'jobs': 1,
+            'no_cache': False,
+            'validation_report': None,
+            'pattern_time_budget': None,
+            'child_tables': False,
             'contributors': 'contrib_path.csv',
             'doi': '10.5281/zenodo.5356871',
             'fasta': 'fasta_path.fas',
             'input': 'spreadsheet_path.xlsx',
             'out_dir': 'out_dir/',
+            'stream': False,
             'year': 2021,
         },
         id='zenodo_all_options',
     ),
+    pytest.param(
+        [
+            'zenodo',
+            '--stream',
+            '--chunksize',
+            '5000',
+            '--contributors',
+            'contrib_path.csv',
+            '--doi',
+            '10.5281/zenodo.5356871',
+            '--fasta',
+            'fasta_path.fas',
+            '-o',
+            'out_dir/',
+            '--year',
+            '2021',
+            'spreadsheet_path.xlsx',
+        ],
+        {
+            'target': 'zenodo',
+            'cache_dir': None,
+            'chunksize': 5000,
+            'clear_cache': False,
+            'incremental': False,
+            'input_format': None,
+            'jobs': 1,
+            'no_cache': False,
+            'validation_report': None,
+            'pattern_time_budget': None,
+            'child_tables': False,
+            'contributors': 'contrib_path.csv',
+            'doi': '10.5281/zenodo.5356871',
+            'fasta': 'fasta_path.fas',
+            'input': 'spreadsheet_path.xlsx',
+            'out_dir': 'out_dir/',
+            'stream': True,
+            'year': 2021,
+        },
+        id='zenodo_stream',
+    ),
     pytest.param(
         [
             'excel',
@@ -43,11 +99,214 @@ test_parse_args_params = [
         ],
         {
             'target': 'excel',
+            'cache_dir': None,
+            'chunksize': None,
+            'clear_cache': False,
+            'incremental': False,
+            'input_format': None,
+            'jobs': 1,
+            'no_cache': False,
+            'validation_report': None,
+            'pattern_time_budget': None,
             'input': 'spreadsheet_path.xlsx',
             'output': 'out_path.xlsx',
         },
         id='excel',
     ),
+    pytest.param(
+        [
+            'excel',
+            '--chunksize',
+            '5000',
+            '-o',
+            'out_path.xlsx',
+            'spreadsheet_path.xlsx',
+        ],
+        {
+            'target': 'excel',
+            'cache_dir': None,
+            'chunksize': 5000,
+            'clear_cache': False,
+            'incremental': False,
+            'input_format': None,
+            'jobs': 1,
+            'no_cache': False,
+            'validation_report': None,
+            'pattern_time_budget': None,
+            'input': 'spreadsheet_path.xlsx',
+            'output': 'out_path.xlsx',
+        },
+        id='excel_chunksize',
+    ),
+    pytest.param(
+        [
+            'excel',
+            '--jobs',
+            '4',
+            '-o',
+            'out_path.xlsx',
+            'spreadsheet_path.xlsx',
+        ],
+        {
+            'target': 'excel',
+            'cache_dir': None,
+            'chunksize': None,
+            'clear_cache': False,
+            'incremental': False,
+            'input_format': None,
+            'jobs': 4,
+            'no_cache': False,
+            'validation_report': None,
+            'pattern_time_budget': None,
+            'input': 'spreadsheet_path.xlsx',
+            'output': 'out_path.xlsx',
+        },
+        id='excel_jobs',
+    ),
+    pytest.param(
+        [
+            'excel',
+            '--cache-dir',
+            'cache/',
+            '--no-cache',
+            '--clear-cache',
+            '-o',
+            'out_path.xlsx',
+            'spreadsheet_path.xlsx',
+        ],
+        {
+            'target': 'excel',
+            'cache_dir': 'cache/',
+            'chunksize': None,
+            'clear_cache': True,
+            'incremental': False,
+            'input_format': None,
+            'jobs': 1,
+            'no_cache': True,
+            'validation_report': None,
+            'pattern_time_budget': None,
+            'input': 'spreadsheet_path.xlsx',
+            'output': 'out_path.xlsx',
+        },
+        id='excel_cache_options',
+    ),
+    pytest.param(
+        [
+            'excel',
+            '--incremental',
+            '-o',
+            'out_path.xlsx',
+            'spreadsheet_path.xlsx',
+        ],
+        {
+            'target': 'excel',
+            'cache_dir': None,
+            'chunksize': None,
+            'clear_cache': False,
+            'incremental': True,
+            'input_format': None,
+            'jobs': 1,
+            'no_cache': False,
+            'validation_report': None,
+            'pattern_time_budget': None,
+            'input': 'spreadsheet_path.xlsx',
+            'output': 'out_path.xlsx',
+        },
+        id='excel_incremental',
+    ),
+    pytest.param(
+        [
+            'excel',
+            '--validation-report',
+            'report.json',
+            '--pattern-time-budget',
+            '0.5',
+            '-o',
+            'out_path.xlsx',
+            'spreadsheet_path.xlsx',
+        ],
+        {
+            'target': 'excel',
+            'cache_dir': None,
+            'chunksize': None,
+            'clear_cache': False,
+            'incremental': False,
+            'input_format': None,
+            'jobs': 1,
+            'no_cache': False,
+            'validation_report': 'report.json',
+            'pattern_time_budget': 0.5,
+            'input': 'spreadsheet_path.xlsx',
+            'output': 'out_path.xlsx',
+        },
+        id='excel_validation_options',
+    ),
+    pytest.param(
+        [
+            'all',
+            '--contributors',
+            'contrib_path.csv',
+            '--doi',
+            '10.5281/zenodo.5356871',
+            '--excel',
+            'out_path.xlsx',
+            '--fasta',
+            'fasta_path.fas',
+            '-o',
+            'out_dir/',
+            '--year',
+            '2021',
+            'spreadsheet_path.xlsx',
+        ],
+        {
+            'target': 'all',
+            'cache_dir': None,
+            'chunksize': None,
+            'clear_cache': False,
+            'incremental': False,
+            'input_format': None,
+            'jobs': 1,
+            'child_tables': False,
+            'contributors': 'contrib_path.csv',
+            'doi': '10.5281/zenodo.5356871',
+            'excel': 'out_path.xlsx',
+            'fasta': 'fasta_path.fas',
+            'input': 'spreadsheet_path.xlsx',
+            'no_cache': False,
+            'validation_report': None,
+            'pattern_time_budget': None,
+            'out_dir': 'out_dir/',
+            'year': 2021,
+        },
+        id='all',
+    ),
+    pytest.param(
+        [
+            'validate',
+            '--columns',
+            'phi_id, gene_id',
+            '--sample',
+            '10',
+            'spreadsheet_path.xlsx',
+        ],
+        {
+            'target': 'validate',
+            'cache_dir': None,
+            'chunksize': None,
+            'clear_cache': False,
+            'incremental': False,
+            'input_format': None,
+            'jobs': 1,
+            'no_cache': False,
+            'validation_report': None,
+            'pattern_time_budget': None,
+            'columns': ['phi_id', 'gene_id'],
+            'sample': 10,
+            'changed_since': None,
+            'input': 'spreadsheet_path.xlsx',
+        },
+        id='validate',
+    ),
 ]
 
 
@@ -55,3 +314,110 @@ test_parse_args_params = [
 def test_parse_args(args, expected):
     actual = parse_args(args)
     assert expected == vars(actual)
+
+
+def test_parse_args_incremental_no_cache():
+    args = ['excel', '--incremental', '--no-cache', '-o', 'out.xlsx', 'in.xlsx']
+    with pytest.raises(SystemExit):
+        parse_args(args)
+
+
+def test_parse_args_child_tables_stream():
+    args = [
+        'zenodo',
+        '--stream',
+        '--child-tables',
+        '--contributors',
+        'contrib_path.csv',
+        '--doi',
+        '10.5281/zenodo.5356871',
+        '--fasta',
+        'fasta_path.fas',
+        '-o',
+        'out_dir/',
+        '--year',
+        '2021',
+        'in.xlsx',
+    ]
+    with pytest.raises(SystemExit):
+        parse_args(args)
+
+
+@pytest.mark.parametrize(
+    'args',
+    [
+        pytest.param(['--columns', 'phi_id,unknown'], id='unknown_column'),
+        pytest.param(['--sample', '0'], id='sample_zero'),
+        pytest.param(['--sample', '5', '--changed-since', 'old.xlsx'], id='both_modes'),
+        pytest.param(['--incremental'], id='incremental'),
+    ],
+)
+def test_parse_args_validate_errors(args):
+    with pytest.raises(SystemExit):
+        parse_args(['validate', *args, 'in.xlsx'])
+
+
+def test_run_validate(tmp_path):
+    spreadsheet_path = TEST_DATA_DIR / 'phi-base_v4-12_test.csv'
+    args = ['validate', '--no-cache', str(spreadsheet_path)]
+    assert run(args) == 0
+    assert run(['validate', '--no-cache', '--sample', '3', str(spreadsheet_path)]) == 0
+
+    # Break the PHI ID of one row
+    lines = spreadsheet_path.read_text(encoding='utf-8').split('\n')
+    lines[3] = lines[3].replace('PHI:', 'PHI ', 1)
+    edited_path = tmp_path / 'edited.csv'
+    edited_path.write_text('\n'.join(lines), encoding='utf-8')
+    report_path = tmp_path / 'report.csv'
+    args = [
+        'validate',
+        '--no-cache',
+        '--changed-since',
+        str(spreadsheet_path),
+        '--validation-report',
+        str(report_path),
+        str(edited_path),
+    ]
+    assert run(args) == VALIDATION_FAILED_STATUS
+    assert report_path.read_text().splitlines()[1].startswith('phi_id,pattern,')
+    args = ['validate', '--no-cache', '--columns', 'gene_id', str(edited_path)]
+    assert run(args) == 0
+
+
+def test_run_internal_assertion(monkeypatch):
+    def run_target(args, load_kwargs):
+        raise AssertionError('internal error')
+
+    monkeypatch.setattr('phi4pipeline.cli.run_target', run_target)
+    # Only validation errors are reported as a failed validation
+    with pytest.raises(AssertionError, match='internal error'):
+        run(['validate', '--no-cache', str(TEST_DATA_DIR / 'phi-base_v4-12_test.csv')])
+
+
+def test_run_validate_missing_curation_dates(tmp_path):
+    spreadsheet_path = TEST_DATA_DIR / 'phi-base_v4-12_test.csv'
+    with open(spreadsheet_path, newline='', encoding='utf-8') as file:
+        rows = list(csv.reader(file))
+    date_index = rows[0].index('Curation date')
+    for row in rows[1:]:
+        row[date_index] = ''
+    edited_path = tmp_path / 'edited.csv'
+    with open(edited_path, 'w', newline='', encoding='utf-8') as file:
+        csv.writer(file).writerows(rows)
+    # The selected rows have no curation dates, which are reported as
+    # missing instead of failing to be cleaned
+    report_path = tmp_path / 'report.csv'
+    for selection in (['--sample', '2'], ['--changed-since', str(spreadsheet_path)]):
+        args = [
+            'validate',
+            '--no-cache',
+            *selection,
+            '--validation-report',
+            str(report_path),
+            str(edited_path),
+        ]
+        assert run(args) == VALIDATION_FAILED_STATUS
+        lines = report_path.read_text().splitlines()[1:]
+        assert {tuple(line.split(',')[:2]) for line in lines} == {
+            ('curation_date', 'required')
+        }
@@ -9,8 +9,12 @@ from freezegun import freeze_time
 from phi4pipeline.frictionless import (
     anonymize_contributors,
     convert_readme_to_html,
+    copy_file_with_stats,
     format_datapackage_readme,
     format_zenodo_description,
+    collect_data_stats,
+    count_data_stats,
+    get_csv_data_stats,
     get_data_stats,
     get_file_sha1_hash,
     load_formatted_datapackage,
@@ -134,6 +138,23 @@ def test_get_file_sha1_hash(path, expected):
     assert actual == expected
 
 
+@pytest.mark.parametrize('chunk_size', [1, 7, 1024 * 1024])
+def test_copy_file_with_stats(tmp_path, monkeypatch, chunk_size):
+    monkeypatch.setattr('phi4pipeline.frictionless.FILE_CHUNK_SIZE', chunk_size)
+    target_path = tmp_path / 'copy.fas'
+    expected = {
+        'sha1': '1a65c4809dfa91ea35ae0bd5b3f5c6221e0eab35',
+        'bytes': 5632,
+        'records': 2,
+    }
+    actual = copy_file_with_stats(FASTA_PATH, target_path, count_records=True)
+    assert actual == expected
+    assert target_path.read_bytes() == Path(FASTA_PATH).read_bytes()
+    assert get_file_sha1_hash(target_path) == expected['sha1']
+    actual = copy_file_with_stats(FASTA_PATH, target_path)
+    assert 'records' not in actual
+
+
 @freeze_time(CREATED_DATE, tz_offset=1)
 def test_make_datapackage_json_str(datapackage_json, anonymized_contributors):
     actual = make_datapackage_json(
@@ -160,6 +181,17 @@ def test_get_data_stats():
     assert actual == expected
 
 
+def test_get_data_stats_from_chunks():
+    csv_path = TEST_DATA_DIR / 'phi-base_v4-12_cleaned.csv'
+    phi_df = pd.read_csv(csv_path)
+    expected = get_data_stats(phi_df)
+    unique_values = None
+    for i in range(0, len(phi_df), 4):
+        unique_values = collect_data_stats(phi_df.iloc[i : i + 4], unique_values)
+    assert count_data_stats(unique_values) == expected
+    assert get_csv_data_stats(csv_path, chunksize=3) == expected
+
+
 def test_make_datapackage_readme(readme_templated, anonymized_contributors):
     actual = make_datapackage_readme(
         csv_path=TEST_DATA_DIR / 'phi-base_v4-12_cleaned.csv',
@@ -1,16 +1,104 @@
+import io
 from pathlib import Path
 
 import numpy as np
+import openpyxl
 import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
 
 from phi4pipeline.load import (
+    apply_dtype_plan,
+    can_parse_sheets_in_parallel,
+    detect_input_format,
+    get_column_header_mapping,
+    get_dtype_plan,
+    get_header_mode,
+    iter_excel_chunks,
+    iter_spreadsheet_chunks,
     load_contributors_file,
+    load_excel,
+    load_spreadsheet,
+    probe_spreadsheet,
+    split_sheet_xml,
 )
 
 
 TEST_DATA_DIR = Path(__file__).parent / 'data'
 
 
+@pytest.mark.parametrize('chunksize', [1, 2, 3, 100])
+def test_iter_excel_chunks(spreadsheet_path, chunksize):
+    expected = pd.read_excel(spreadsheet_path, '4-12 phibase_all', header=[0, 1])
+    chunks = list(iter_excel_chunks(spreadsheet_path, chunksize))
+    assert all(len(chunk) <= chunksize for chunk in chunks)
+    assert all(chunk.columns.equals(expected.columns) for chunk in chunks)
+    actual = pd.concat(chunks)
+    assert_frame_equal(
+        expected.astype(object),
+        actual.astype(object),
+        check_dtype=False,
+    )
+
+
+@pytest.mark.parametrize('chunksize', [1, 2, 100])
+def test_load_excel_chunksize(spreadsheet_path, chunksize):
+    expected = load_excel(spreadsheet_path)
+    actual = load_excel(spreadsheet_path, chunksize=chunksize)
+    assert_frame_equal(expected, actual)
+
+
+def test_load_excel_chunksize_text_numbers(spreadsheet_path):
+    workbook = openpyxl.load_workbook(spreadsheet_path)
+    workbook.active['C3'] = 29850
+    workbook.save(spreadsheet_path)
+    expected = load_excel(spreadsheet_path)
+    # The first chunk of the Gene column only has a number and a blank
+    actual = load_excel(spreadsheet_path, chunksize=2)
+    assert_frame_equal(expected, actual)
+    assert actual.iloc[0, 2] == 29850
+    assert isinstance(actual.iloc[0, 2], int)
+
+
+@pytest.mark.parametrize('chunksize', [None, 2])
+def test_load_excel_jobs(spreadsheet_path, chunksize):
+    expected = load_excel(spreadsheet_path, chunksize=chunksize)
+    actual = load_excel(spreadsheet_path, chunksize=chunksize, jobs=2)
+    assert_frame_equal(expected, actual)
+
+
+def test_split_sheet_xml():
+    xml = (
+        b'<worksheet><sheetData>'
+        b'<row r="1"><c r="A1"/></row>'
+        b'<row><c r="A2"/></row>'
+        b'<row r="4"><c r="A4"/></row>'
+        b'</sheetData><rowBreaks/></worksheet>'
+    )
+    fragments = split_sheet_xml(io.BytesIO(xml), fragment_size=1)
+    # Rows without row numbers cannot start a fragment
+    assert list(fragments) == [
+        b'<worksheet><sheetData><row r="1"><c r="A1"/></row>'
+        b'<row><c r="A2"/></row></sheetData></worksheet>',
+        b'<worksheet><sheetData><row r="4"><c r="A4"/></row>'
+        b'</sheetData></worksheet>',
+    ]
+    fragments = split_sheet_xml(io.BytesIO(xml), fragment_size=len(xml))
+    assert list(fragments) == [xml.replace(b'<rowBreaks/>', b'')]
+    assert split_sheet_xml(io.BytesIO(b'<worksheet><sheetData/></worksheet>'), 1) is None
+
+
+def test_iter_sheet_rows_parallel(spreadsheet_path, monkeypatch):
+    expected = load_excel(spreadsheet_path)
+    # Parse each row in a separate fragment
+    monkeypatch.setattr('phi4pipeline.load.SHEET_FRAGMENT_SIZE', 1)
+    assert_frame_equal(load_excel(spreadsheet_path, jobs=2), expected)
+    # Unsupported versions of openpyxl parse the sheet in one process
+    monkeypatch.setattr('phi4pipeline.load.PARALLEL_OPENPYXL_VERSIONS', ())
+    assert not can_parse_sheets_in_parallel()
+    assert_frame_equal(load_excel(spreadsheet_path, jobs=2), expected)
+
+
 def test_load_contributors_file():
     actual = load_contributors_file(TEST_DATA_DIR / 'contributors.csv')
     expected = [
@@ -56,3 +144,169 @@ def test_load_contributors_file():
         },
     ]
     assert expected == actual
+
+
+@pytest.mark.parametrize(
+    'file_name,content,expected',
+    [
+        pytest.param('data.xlsx', b'', 'excel', id='xlsx'),
+        pytest.param('data.CSV', b'', 'csv', id='csv_upper'),
+        pytest.param('data.parquet', b'', 'parquet', id='parquet'),
+        pytest.param('data.feather', b'', 'arrow', id='feather'),
+        pytest.param('data', b'PK\x03\x04', 'excel', id='sniff_excel'),
+        pytest.param('data', b'PAR1', 'parquet', id='sniff_parquet'),
+        pytest.param('data', b'ARROW1\x00\x00', 'arrow', id='sniff_arrow'),
+        pytest.param('data.txt', b'Record ID,PHI_MolConn_ID', 'csv', id='sniff_csv'),
+    ],
+)
+def test_detect_input_format(tmp_path, file_name, content, expected):
+    path = tmp_path / file_name
+    path.write_bytes(content)
+    assert detect_input_format(path) == expected
+
+
+@pytest.mark.parametrize('input_format', ['csv', 'parquet', 'arrow'])
+def test_load_spreadsheet(spreadsheet_path, tmp_path, input_format):
+    expected = load_excel(spreadsheet_path)
+    path = tmp_path / f'phi-base_v4-12_test.{input_format}'
+    if input_format == 'csv':
+        expected.to_csv(path, index=False)
+    elif input_format == 'parquet':
+        expected.to_parquet(path)
+    else:
+        expected.to_feather(path)
+    actual = load_spreadsheet(path, use_dtype_plan=False)
+    assert_frame_equal(expected, actual)
+
+
+@pytest.mark.parametrize('input_format', ['parquet', 'arrow'])
+def test_load_spreadsheet_chunksize(spreadsheet_path, tmp_path, input_format):
+    expected = load_spreadsheet(spreadsheet_path)
+    path = tmp_path / f'phi-base_v4-12_test.{input_format}'
+    if input_format == 'parquet':
+        expected.to_parquet(path)
+    else:
+        expected.to_feather(path)
+    actual = load_spreadsheet(path, chunksize=4)
+    assert_frame_equal(expected, actual)
+
+
+@pytest.mark.parametrize('input_format', ['excel', 'csv', 'parquet', 'arrow'])
+def test_iter_spreadsheet_chunks(spreadsheet_path, tmp_path, input_format):
+    expected = load_spreadsheet(spreadsheet_path)
+    path = spreadsheet_path
+    if input_format == 'csv':
+        path = tmp_path / 'phi-base_v4-12_test.csv'
+        load_excel(spreadsheet_path).to_csv(path, index=False)
+    elif input_format == 'parquet':
+        path = tmp_path / 'phi-base_v4-12_test.parquet'
+        expected.to_parquet(path)
+    elif input_format == 'arrow':
+        path = tmp_path / 'phi-base_v4-12_test.arrow'
+        expected.to_feather(path)
+    chunks = list(iter_spreadsheet_chunks(path, input_format, chunksize=4))
+    assert all(len(chunk) <= 4 for chunk in chunks)
+    actual = pd.concat(chunks)
+    assert actual.index.equals(expected.index)
+    if input_format in ('parquet', 'arrow'):
+        assert_frame_equal(actual, expected)
+    else:
+        # Numeric columns that are empty in some chunks may be read as a
+        # different type, but their values are the same.
+        assert_frame_equal(
+            actual.astype(object), expected.astype(object), check_dtype=False
+        )
+
+
+def test_load_spreadsheet_csv_single_header():
+    path = TEST_DATA_DIR / 'phi-base_v4-12_test.csv'
+    expected = pd.read_csv(path)
+    actual = load_spreadsheet(path, use_dtype_plan=False)
+    assert_frame_equal(expected, actual)
+    actual_chunked = load_spreadsheet(path, chunksize=5, use_dtype_plan=False)
+    assert_frame_equal(expected, actual_chunked)
+
+
+def test_get_dtype_plan():
+    dtype_plan = get_dtype_plan()
+    assert dtype_plan['pmid'] == 'Int64'
+    assert dtype_plan['year'] == 'Int64'
+    assert dtype_plan['database'] == 'category'
+    assert dtype_plan['curator_organization'] == 'category'
+    assert dtype_plan['disease'] == 'string[pyarrow]'
+    assert 'curation_date' not in dtype_plan
+
+
+def test_apply_dtype_plan():
+    phi_df = pd.DataFrame({
+        ('PMID', 'PMID'): [12345, np.nan],
+        ('Year', 'Year'): ['2005', '978-1-908230-25-6'],
+        ('Database', 'Database'): ['GO', np.nan],
+        ('Disease', 'Disease'): ['rice blast', np.nan],
+        ('Gene', 'Gene'): ['ABC1', 3],
+        ('Curation comments', 'CurationComments'): ['text', np.nan],
+    })
+    actual = apply_dtype_plan(phi_df.copy(), categories=False)
+    assert actual['PMID', 'PMID'].dtype == 'Int64'
+    assert actual['Database', 'Database'].dtype == 'string[pyarrow]'
+    assert actual['Disease', 'Disease'].dtype == 'string[pyarrow]'
+    # Columns that cannot be converted without loss are left unchanged
+    assert actual['Year', 'Year'].dtype == object
+    assert actual['Gene', 'Gene'].dtype == object
+    # Columns that are not in the schema are left unchanged
+    assert actual['Curation comments', 'CurationComments'].dtype == object
+
+    actual = apply_dtype_plan(phi_df.copy())
+    assert actual['Database', 'Database'].dtype == 'category'
+
+
+def test_probe_spreadsheet(spreadsheet_path):
+    phi_df = load_excel(spreadsheet_path)
+    actual = probe_spreadsheet(spreadsheet_path)
+    assert actual['input_format'] == 'excel'
+    assert actual['version'] == '4-12'
+    assert actual['sheet_name'] == '4-12 phibase_all'
+    assert actual['header_mode'] == 'excel'
+    assert actual['columns'].equals(phi_df.columns)
+    assert actual['column_mapping'] == get_column_header_mapping(phi_df)
+
+
+def test_probe_spreadsheet_csv_single_header():
+    path = TEST_DATA_DIR / 'phi-base_v4-12_test.csv'
+    actual = probe_spreadsheet(path)
+    assert actual['input_format'] == 'csv'
+    assert actual['version'] == '4-12'
+    assert actual['sheet_name'] is None
+    assert actual['header_mode'] == 'csv'
+    assert actual['columns'].equals(pd.read_csv(path).columns)
+
+
+def test_probe_spreadsheet_version_mismatch(spreadsheet_path):
+    path = spreadsheet_path.rename(spreadsheet_path.with_name('phi-base_v4-13.xlsx'))
+    with pytest.raises(ValueError, match='version'):
+        probe_spreadsheet(path)
+
+
+@pytest.mark.parametrize(
+    'columns,expected',
+    [
+        (pd.MultiIndex.from_tuples([('Record ID', 'RecordID')]), 'excel'),
+        (pd.Index(['RecordID', 'PHIMolConnID']), 'excel'),
+        (pd.Index(['Record ID', 'PHI_MolConn_ID']), 'csv'),
+        (pd.Index(['Curation comments', 'Record ID']), 'csv'),
+    ],
+)
+def test_get_header_mode(columns, expected):
+    assert get_header_mode(columns) == expected
+
+
+def test_get_column_header_mapping_single_header():
+    phi_df = pd.DataFrame(columns=['Record ID', 'Interacting partner(s) Id'])
+    actual = get_column_header_mapping(phi_df)
+    assert actual['record_id'] == ('Record ID', 'RecordID')
+    assert actual['interacting_partners_id'] == (
+        'Interacting partner(s) Id',
+        'InteractingpartnersId',
+    )
+    # Columns added by cleaning fall back to the Excel column names
+    assert actual['curation_comments'] == ('CurationComments', 'CurationComments')
@@ -0,0 +1,59 @@
+# SPDX-FileCopyrightText: 2023-present James Seager <james.seager@rothamsted.ac.uk>
+#
+# SPDX-License-Identifier: MIT
+
+import csv
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+
+from phi4pipeline.clean import make_child_tables
+from phi4pipeline.release import load_clean_phibase
+from phi4pipeline.validate import ValidationError
+
+TEST_DATA_DIR = Path(__file__).parent / 'data'
+
+
+def test_load_clean_phibase_incremental_unique(tmp_path):
+    spreadsheet_path = tmp_path / 'phi-base.csv'
+    with open(TEST_DATA_DIR / 'phi-base_v4-12_test.csv', encoding='utf-8') as file:
+        rows = list(csv.reader(file))
+    with open(spreadsheet_path, 'w', newline='', encoding='utf-8') as file:
+        csv.writer(file).writerows(rows)
+    cache_dir = tmp_path / 'cache'
+    load_clean_phibase(spreadsheet_path, cache_dir=cache_dir, incremental=True)
+
+    # Add a row whose record ID only matches a reused row after cleaning
+    new_row = rows[2].copy()
+    new_row[rows[0].index('Record ID')] = f'{rows[1][0]} '
+    with open(spreadsheet_path, 'w', newline='', encoding='utf-8') as file:
+        csv.writer(file).writerows([*rows, new_row])
+    report_path = tmp_path / 'report.csv'
+    with pytest.raises(ValidationError, match='column record_id has invalid'):
+        load_clean_phibase(
+            spreadsheet_path,
+            cache_dir=cache_dir,
+            incremental=True,
+            report_path=report_path,
+        )
+    assert report_path.read_text().splitlines()[1].startswith('record_id,unique,')
+
+
+def test_load_clean_phibase_child_tables(tmp_path):
+    spreadsheet_path = TEST_DATA_DIR / 'phi-base_v4-12_test.csv'
+    out_dir = tmp_path / 'out'
+    phi_df, _ = load_clean_phibase(spreadsheet_path, child_tables_dir=out_dir)
+    expected = make_child_tables(phi_df)
+    assert sorted(path.name for path in out_dir.iterdir()) == [
+        'go_annotation.csv',
+        'interacting_partners.csv',
+    ]
+    go_table = pd.read_csv(out_dir / 'go_annotation.csv', dtype=object)
+    assert_frame_equal(
+        go_table.fillna(np.nan),
+        expected['go_annotation'][0].fillna(np.nan),
+        check_dtype=False,
+    )
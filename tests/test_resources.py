@@ -0,0 +1,31 @@
+import json
+from string import Template
+
+from phi4pipeline.resources import (
+    DATA_DIR,
+    load_datapackage_template,
+    load_schema,
+    read_resource_text,
+)
+
+
+def test_read_resource_text():
+    expected = (DATA_DIR / 'readme_template.md').read_text(encoding='utf-8')
+    actual = read_resource_text('readme_template.md')
+    assert actual == expected
+    assert read_resource_text('readme_template.md') is actual
+
+
+def test_load_schema():
+    path = DATA_DIR / 'phi-base_schema.json'
+    with open(path, encoding='utf-8') as file:
+        expected = json.load(file)
+    actual = load_schema()
+    assert actual == expected
+    assert load_schema() is actual
+
+
+def test_load_datapackage_template():
+    template = load_datapackage_template()
+    assert isinstance(template, Template)
+    assert load_datapackage_template() is template
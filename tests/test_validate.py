@@ -0,0 +1,290 @@
+# SPDX-FileCopyrightText: 2023-present James Seager <james.seager@rothamsted.ac.uk>
+#
+# SPDX-License-Identifier: MIT
+
+import json
+import re
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+
+from phi4pipeline.clean import clean_phibase, make_child_tables
+from phi4pipeline.load import load_spreadsheet
+from phi4pipeline.validate import (
+    VALIDATION_REPORT_COLUMNS,
+    ValidationError,
+    compile_linear_pattern,
+    find_interacting_partners_id_violations,
+    find_pattern_violations,
+    get_validation_rules,
+    iter_validated_chunks,
+    make_validation_report,
+    merge_validation_reports,
+    translate_re2_pattern,
+    validate_interacting_partners_id,
+    validate_phibase,
+)
+
+TEST_DATA_DIR = Path(__file__).parent / 'data'
+
+
+@pytest.fixture
+def phi_df():
+    return clean_phibase(load_spreadsheet(TEST_DATA_DIR / 'phi-base_v4-12_test.csv'))
+
+
+@pytest.fixture
+def invalid_phi_df(phi_df):
+    phi_df = phi_df.copy()
+    phi_df.loc[[1, 3, 7], 'phi_id'] = ['PHI 1', 'PHI:x', 'PHI 1']
+    phi_df['interacting_partners_id'] = phi_df.interacting_partners_id.astype(object)
+    phi_df.loc[2, 'interacting_partners_id'] = 'UniProt P12345'
+    return phi_df
+
+
+def test_make_validation_report(phi_df, invalid_phi_df):
+    report = make_validation_report(phi_df)
+    assert report.empty
+    assert list(report.columns) == VALIDATION_REPORT_COLUMNS
+
+    expected = pd.DataFrame(
+        [
+            ['phi_id', 'pattern', 'Record 2', 'PHI 1', 2],
+            ['phi_id', 'pattern', 'Record 4', 'PHI:x', 1],
+            [
+                'interacting_partners_id',
+                'unknown_database',
+                'Record 3',
+                'UniProt P12345',
+                1,
+            ],
+            [
+                'interacting_partners_id',
+                'blank_accession',
+                'Record 3',
+                'UniProt P12345',
+                1,
+            ],
+        ],
+        columns=VALIDATION_REPORT_COLUMNS,
+    )
+    actual = make_validation_report(invalid_phi_df)
+    assert_frame_equal(actual, expected)
+
+
+def test_merge_validation_reports(invalid_phi_df):
+    expected = make_validation_report(invalid_phi_df)
+    chunks = [invalid_phi_df.iloc[i : i + 3] for i in range(0, len(invalid_phi_df), 3)]
+    actual = merge_validation_reports(make_validation_report(c) for c in chunks)
+    assert_frame_equal(actual, expected)
+
+
+def test_validate_phibase(invalid_phi_df, tmp_path):
+    report_path = tmp_path / 'report.json'
+    with pytest.raises(ValidationError) as error:
+        validate_phibase(invalid_phi_df, report_path=report_path)
+    # Every column with invalid values is listed
+    assert str(error.value) == (
+        'column phi_id has invalid values:\nPHI 1\nPHI:x\n'
+        'column interacting_partners_id has invalid values:\nUniProt P12345'
+    )
+    report = json.loads(report_path.read_text())
+    assert len(report) == 4
+    assert report[0] == {
+        'column': 'phi_id',
+        'rule': 'pattern',
+        'record_id': 'Record 2',
+        'value': 'PHI 1',
+        'count': 2,
+    }
+
+
+def test_iter_validated_chunks(phi_df, invalid_phi_df, tmp_path):
+    chunks = [phi_df.iloc[i : i + 3] for i in range(0, len(phi_df), 3)]
+    assert list(iter_validated_chunks(chunks)) == chunks
+
+    chunks = [invalid_phi_df.iloc[i : i + 3] for i in range(0, len(invalid_phi_df), 3)]
+    with pytest.raises(ValidationError) as expected:
+        validate_phibase(invalid_phi_df)
+    report_path = tmp_path / 'report.csv'
+    validated = iter_validated_chunks(chunks, report_path=report_path)
+    # Every chunk is passed through before the error is raised
+    for chunk in chunks:
+        assert next(validated) is chunk
+    with pytest.raises(ValidationError) as actual:
+        next(validated)
+    assert str(actual.value) == str(expected.value)
+    assert_frame_equal(
+        pd.read_csv(report_path), make_validation_report(invalid_phi_df)
+    )
+
+
+def test_get_validation_rules():
+    rules = get_validation_rules()
+    assert get_validation_rules() is rules
+    assert rules['record_id'] == {
+        'required': True,
+        'unique': True,
+        'pattern': re.compile(r'Record \d+'),
+    }
+    # Patterns that are not in the schema are added
+    assert rules['gene'] == {'required': True}
+    assert rules['database'] == {'pattern': re.compile('GO')}
+    assert 'pmid' not in rules
+    assert 'pattern' in rules['curator_organization']
+
+    schema = {'fields': [{'name': 'phi_id', 'required': False, 'pattern': 'PHI:\\d+'}]}
+    actual = get_validation_rules(schema)
+    assert actual is get_validation_rules(dict(schema))
+    assert actual['phi_id'] == {'pattern': re.compile(r'PHI:\d+')}
+
+
+def test_make_validation_report_schema_constraints(phi_df):
+    phi_df = phi_df.copy()
+    phi_df.loc[4, 'record_id'] = 'Record 2'
+    phi_df.loc[[0, 5], 'gene'] = None
+    expected = pd.DataFrame(
+        [
+            ['record_id', 'unique', 'Record 2', 'Record 2', 1],
+            ['gene', 'required', 'Record 1', None, 2],
+        ],
+        columns=VALIDATION_REPORT_COLUMNS,
+    )
+    actual = make_validation_report(phi_df)
+    assert_frame_equal(actual, expected)
+
+    # Repeated values are found across chunks of rows
+    chunks = [phi_df.iloc[i : i + 3] for i in range(0, len(phi_df), 3)]
+    seen_values = {}
+    reports = [make_validation_report(c, seen_values=seen_values) for c in chunks]
+    assert_frame_equal(merge_validation_reports(reports), expected)
+
+
+def test_find_interacting_partners_id_violations():
+    ids = pd.Series([
+        'UniProt: P1',
+        'gene1, Foo: P2; no data found',
+        None,
+        'gene1, Foo: P2; no data found',
+        ' , UniProt: P3; GenBank: A: B',
+        'UniProt',
+    ])
+    expected = {
+        'blank_partner_gene': [False, False, False, False, True, False],
+        'unknown_database': [False, True, False, True, False, False],
+        'blank_accession': [False, False, False, False, False, True],
+        'nested_accession': [False, False, False, False, True, False],
+    }
+    actual = find_interacting_partners_id_violations(ids)
+    assert {k: v.tolist() for k, v in actual.items()} == expected
+    # Splitting each unique value gives the same result as the child table
+    partners = make_child_tables(pd.DataFrame({
+        'record_id': range(len(ids)),
+        'go_annotation': None,
+        'interacting_partners_id': ids,
+    }))['interacting_partners']
+    actual = find_interacting_partners_id_violations(ids, partners)
+    assert {k: v.tolist() for k, v in actual.items()} == expected
+
+
+def test_validate_interacting_partners_id(tmp_path):
+    ids = pd.Series([
+        'UniProt: P1',
+        'gene1, Foo: P2; no data found',
+        None,
+        'gene1, Foo: P2; no data found',
+        'UniProt',
+    ])
+    record_ids = pd.Series([f'Record {i}' for i in range(1, 6)])
+    report_path = tmp_path / 'report.json'
+    with pytest.raises(ValidationError) as error:
+        validate_interacting_partners_id(
+            ids, record_ids=record_ids, report_path=report_path
+        )
+    assert str(error.value) == (
+        'column interacting_partners_id has invalid values:\n'
+        'gene1, Foo: P2; no data found\nUniProt'
+    )
+    # Each invalid value has the record ID of the first row with the value
+    report = json.loads(report_path.read_text())
+    assert [(row['record_id'], row['count']) for row in report] == [
+        ('Record 2', 2),
+        ('Record 5', 1),
+    ]
+    validate_interacting_partners_id(ids.iloc[:1], report_path=report_path)
+    assert json.loads(report_path.read_text()) == []
+
+
+def test_find_pattern_violations_time_budget():
+    column = pd.Series(['ab', 'a' * 30 + 'c', None, 'aab', 'ab'])
+    # Nested repeats backtrack exponentially on values that do not match
+    pattern = re.compile('(?:a+)+b')
+    actual = find_pattern_violations(column, pattern, time_budget=0.05)
+    assert actual['pattern'].tolist() == [False] * 5
+    assert actual['pattern_timeout'].tolist() == [False, True, False, False, False]
+    actual = find_pattern_violations(column.iloc[[0, 3]], pattern)
+    assert list(actual) == ['pattern']
+
+
+def test_make_validation_report_pattern_time_budget(phi_df, monkeypatch):
+    monkeypatch.setattr('phi4pipeline.validate.re2', None)
+    with pytest.warns(UserWarning, match='record_id, phi_id, protein_id_source'):
+        report = make_validation_report(phi_df, pattern_time_budget=1.0)
+    assert report.empty
+
+
+def test_compile_linear_pattern():
+    pytest.importorskip('re2')
+    # Every pattern is supported by RE2, so none need a time budget
+    for rules in get_validation_rules().values():
+        if 'pattern' in rules:
+            assert compile_linear_pattern(rules['pattern'].pattern) is not None
+    assert compile_linear_pattern('(?=a)a') is None
+    # Character classes match Unicode characters, as in the re module
+    values = ['Record ١٢', 'Record 12', 'gène-1', 'a\u3000b', 'a_b', 'a.b']
+    for pattern in [r'Record \d+', r'\w+-\d', r'a\sb', r'[\w.]+', r'\W+', r'\S+']:
+        linear_pattern = compile_linear_pattern(pattern)
+        for value in values:
+            expected = re.fullmatch(pattern, value) is None
+            assert (linear_pattern.fullmatch(value) is None) == expected
+
+
+@pytest.mark.parametrize(
+    'pattern,expected',
+    [
+        pytest.param('[A-Z]+(?:; [A-Z]+)*', '[A-Z]+(?:; [A-Z]+)*', id='no_classes'),
+        pytest.param(r'a\.\\d', r'a\.\\d', id='escaped_backslash'),
+        pytest.param(r'\d', r'[\x{30}-\x{39}', id='digit'),
+        pytest.param(r'\D', r'[^\x{30}-\x{39}', id='not_digit'),
+        pytest.param(r'[\d.]', r'[\x{30}-\x{39}', id='digit_in_class'),
+    ],
+)
+def test_translate_re2_pattern(pattern, expected):
+    assert translate_re2_pattern(pattern).startswith(expected)
+
+
+@pytest.mark.parametrize('pattern', [r'\bx', r'[\W.]'])
+def test_translate_re2_pattern_unsupported(pattern):
+    assert translate_re2_pattern(pattern) is None
+
+
+def test_make_validation_report_pattern_engines(phi_df, caplog):
+    pytest.importorskip('re2')
+    with caplog.at_level('INFO', logger='phi4pipeline.validate'):
+        report = make_validation_report(phi_df, pattern_time_budget=1.0)
+    assert report.empty
+    assert 'matched in linear time with RE2: record_id, phi_id' in caplog.text
+
+
+def test_make_validation_report_columns(invalid_phi_df):
+    report = make_validation_report(invalid_phi_df)
+    expected = report[report.column == 'interacting_partners_id'].reset_index(drop=True)
+    actual = make_validation_report(
+        invalid_phi_df[['record_id', 'interacting_partners_id']],
+        columns=['interacting_partners_id'],
+    )
+    assert_frame_equal(actual, expected)
+    with pytest.raises(ValueError, match='unknown_column'):
+        make_validation_report(invalid_phi_df, columns=['unknown_column'])